@@ -0,0 +1,30 @@
+"""unique post like index
+
+Revision ID: 5c2d8e4a9b31
+Revises: 3b9e1c2f7a10
+Create Date: 2026-10-18 11:40:27.503912
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2d8e4a9b31'
+down_revision = '3b9e1c2f7a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Перед созданием уникального индекса убираем накопившиеся дубликаты лайков.
+    op.execute(
+        'DELETE FROM postlike WHERE id NOT IN '
+        '(SELECT MIN(id) FROM postlike GROUP BY post_id, user_id)'
+    )
+    with op.batch_alter_table('postlike', schema=None) as batch_op:
+        batch_op.create_index('post_like_user_index', ['post_id', 'user_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('postlike', schema=None) as batch_op:
+        batch_op.drop_index('post_like_user_index')
@@ -0,0 +1,50 @@
+"""add post full text search
+
+Revision ID: 6d224930bf5b
+Revises: 6a5829c76154
+Create Date: 2026-10-18 16:52:03.118204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6d224930bf5b'
+down_revision = '6a5829c76154'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Индекс FTS5 с внешним содержимым: текст хранится только в post,
+    # триггеры поддерживают индекс в актуальном состоянии.
+    op.execute(
+        "CREATE VIRTUAL TABLE post_fts USING fts5("
+        "text, content='post', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER post_fts_after_insert AFTER INSERT ON post BEGIN "
+        "INSERT INTO post_fts(rowid, text) VALUES (new.id, new.text); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER post_fts_after_delete AFTER DELETE ON post BEGIN "
+        "INSERT INTO post_fts(post_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER post_fts_after_update AFTER UPDATE OF text ON post BEGIN "
+        "INSERT INTO post_fts(post_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO post_fts(rowid, text) VALUES (new.id, new.text); "
+        "END"
+    )
+    # Индексируем уже существующие посты.
+    op.execute("INSERT INTO post_fts(post_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS post_fts_after_update')
+    op.execute('DROP TRIGGER IF EXISTS post_fts_after_delete')
+    op.execute('DROP TRIGGER IF EXISTS post_fts_after_insert')
+    op.execute('DROP TABLE IF EXISTS post_fts')
@@ -0,0 +1,40 @@
+"""add like counters
+
+Revision ID: 8f41a6d2c057
+Revises: 5c2d8e4a9b31
+Create Date: 2026-10-18 13:05:51.772406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f41a6d2c057'
+down_revision = '5c2d8e4a9b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('likes_given', sa.Integer(), server_default='0', nullable=False))
+
+    # Заполняем счетчики по уже существующим лайкам.
+    op.execute(
+        'UPDATE post SET like_count = '
+        '(SELECT COUNT(*) FROM postlike WHERE postlike.post_id = post.id)'
+    )
+    op.execute(
+        'UPDATE "user" SET likes_given = '
+        '(SELECT COUNT(*) FROM postlike WHERE postlike.user_id = "user".id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('likes_given')
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('like_count')
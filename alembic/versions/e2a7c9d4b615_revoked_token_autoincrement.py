@@ -0,0 +1,32 @@
+"""revoked token autoincrement
+
+Revision ID: e2a7c9d4b615
+Revises: c4f8a2e61d93
+Create Date: 2026-10-18 21:04:37.118204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c9d4b615'
+down_revision = 'c4f8a2e61d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Процессы подгружают отозванные токены по id > последнего прочитанного,
+    # а очистка удаляет записи: без AUTOINCREMENT SQLite может выдать id
+    # удаленной записи повторно, и новая запись будет пропущена.
+    with op.batch_alter_table(
+            'revokedtoken',
+            recreate='always',
+            table_kwargs={'sqlite_autoincrement': True}
+    ) as batch_op:
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('revokedtoken', recreate='always') as batch_op:
+        pass
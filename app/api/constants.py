@@ -1,7 +1,21 @@
+NOT_FOUND_USER: str = 'Пользователь не найден!'
 NOT_FOUND_POST: str = 'Пост не найден!Самоуничтожение вселенной через 3..2..'
 DELETE_USER_NOT_ALLOWED: str = 'Удаление пользователей запрещено!'
 NOT_OWNER: str = 'Вы не можете редактировать или удалить этот пост!'
 NOT_FOUND_LIKE: str = 'Лайк не найден!'
 CANNOT_LIKE_OWN_POST: str = 'Вы не можете поставить лайк под своим постом!'
 LIKE_ALREADY_EXISTS: str = 'Вы уже поставили лайк на этот пост!'
+LIKE_CONFLICT: str = 'Лайк одновременно изменен другим запросом, повторите попытку!'
 EMAIL_ALREADY_EXISTS: str = 'Такая почта уже зарегистрирована!'
+CANNOT_FOLLOW_SELF: str = 'Вы не можете подписаться на самого себя!'
+FOLLOW_ALREADY_EXISTS: str = 'Вы уже подписаны на этого пользователя!'
+NOT_FOUND_FOLLOW: str = 'Подписка не найдена!'
+INVALID_CURSOR: str = 'Некорректный курсор пагинации!'
+POSTS_PAGE_DEFAULT_LIMIT: int = 50
+POSTS_PAGE_MAX_LIMIT: int = 200
+INVALID_SEARCH_QUERY: str = 'Пустой поисковый запрос!'
+SEARCH_MAX_OFFSET: int = 1000
+NOT_FOUND_PROFILE: str = 'Профиль запроса не найден!'
+INVALID_METRICS_TOKEN: str = 'Неверный токен доступа к метрикам!'
+INVALID_REFRESH_TOKEN: str = 'Refresh-токен недействителен или отозван!'
+RATE_LIMIT_EXCEEDED: str = 'Слишком много запросов, повторите позже!'
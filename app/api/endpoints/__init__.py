@@ -1,2 +1,4 @@
 from .user import router as user_router
 from .post import router as post_router
+from .metrics import router as metrics_router
+from .debug import router as debug_router
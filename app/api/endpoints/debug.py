@@ -0,0 +1,33 @@
+from http import HTTPStatus
+from typing import List
+
+from app.api.constants import NOT_FOUND_PROFILE
+from app.core.profiler import profile_store
+from app.core.user import current_superuser
+from fastapi import APIRouter, Depends, HTTPException
+
+router = APIRouter(dependencies=[Depends(current_superuser)])
+
+
+@router.get('/debug/requests')
+async def get_recent_profiles() -> List[dict]:
+    """
+    Сводка по последним профилированным запросам, от новых к старым.
+    """
+    return [profile.summary() for profile in profile_store.recent()]
+
+
+@router.get('/debug/requests/{request_id}')
+async def get_profile(request_id: str) -> dict:
+    """
+    SQL-запросы профилированного запроса по значению заголовка X-Request-Id.
+    :param request_id: Идентификатор профиля.
+    :raises HTTPException: Если профиль не найден (или уже вытеснен).
+    """
+    profile = profile_store.get(request_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=NOT_FOUND_PROFILE
+        )
+    return profile.to_dict()
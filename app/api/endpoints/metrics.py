@@ -0,0 +1,46 @@
+import secrets
+from http import HTTPStatus
+
+from app.api.constants import INVALID_METRICS_TOKEN
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.user import current_superuser
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+
+async def check_metrics_token(request: Request) -> None:
+    """
+    Проверка токена сборщика метрик из заголовка Authorization.
+    :param request: Текущий запрос.
+    :raises HTTPException: 401, если токен не передан или неверен.
+    """
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not secrets.compare_digest(
+            token.encode(), settings.metrics_token.encode()
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=INVALID_METRICS_TOKEN,
+            headers={'WWW-Authenticate': 'Bearer'}
+        )
+
+
+router = APIRouter(dependencies=[
+    Depends(check_metrics_token if settings.metrics_token else current_superuser)
+])
+
+
+@router.get(
+    '/metrics',
+    response_class=PlainTextResponse,
+    include_in_schema=False
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Метрики приложения в текстовом формате Prometheus.
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type='text/plain; version=0.0.4'
+    )
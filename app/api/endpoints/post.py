@@ -1,16 +1,31 @@
+from datetime import datetime
 from http import HTTPStatus
-from typing import List
-from app.api.validators import (check_like_exists, check_not_liking_own_post,
-                                check_on_duplicate_like, check_post_exists,
-                                check_post_owner)
-from app.core.db import get_async_session
-from app.core.user import current_user
-from app.crud.post import post_crud
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from app.api.constants import (POSTS_PAGE_DEFAULT_LIMIT, POSTS_PAGE_MAX_LIMIT,
+                               SEARCH_MAX_OFFSET)
+from app.api.validators import (check_cursor, check_like_status,
+                                check_post_exists, check_post_owner,
+                                check_search_query, describe_like_status)
+from app.core.db import get_async_session, get_read_session
+from app.core.fast_json import FAST_JSON, dumps
+from app.core.like_writer import like_writer
+from app.core.rate_limit import (limit_bulk_like_writes,
+                                 limit_bulk_post_writes, limit_like_writes,
+                                 limit_post_writes)
+from app.core.response_cache import post_response_cache
+from app.core.user import current_reader, current_user
+from app.crud.post import LikeAction, LikeStatus, post_crud
 from app.crud.user import user_crud
-from app.models import User
-from app.schemas.post import PostCreate, PostInDB, PostLikeInDB, PostUpdate
+from app.models import Post, PostLike, User
+from app.schemas.post import (PostBulkCreate, PostCreate, PostInDB,
+                              PostLikeBulkCreate, PostLikeBulkResult,
+                              PostLikeInDB, PostPage, PostSearchHit,
+                              PostSearchPage, PostUpdate)
 from app.schemas.user import UserLikesResponse
-from fastapi import APIRouter, Depends
+from app.utils.pagination import encode_cursor
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
@@ -21,7 +36,7 @@ router = APIRouter()
     response_model=PostInDB,
     response_model_exclude_none=True,
     status_code=HTTPStatus.CREATED,
-    dependencies=[Depends(current_user)]
+    dependencies=[Depends(current_user), Depends(limit_post_writes)]
 )
 async def create_new_post(
         post: PostCreate,
@@ -39,51 +54,245 @@ async def create_new_post(
     return new_post
 
 
+@router.post(
+    '/bulk',
+    response_model=List[PostInDB],
+    response_model_exclude_none=True,
+    status_code=HTTPStatus.CREATED,
+    dependencies=[Depends(limit_bulk_post_writes)]
+)
+async def create_posts_bulk(
+        posts: PostBulkCreate,
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+) -> List[PostInDB]:
+    """
+    Массовое создание постов одним запросом к базе.
+    :param posts: Список новых постов из схемы PostBulkCreate.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Созданные посты в формате List[PostInDB] в порядке запроса.
+    """
+    return await post_crud.create_objects(posts.items, session, user)
+
+
+@router.post(
+    '/likes/bulk',
+    response_model=List[PostLikeBulkResult],
+    response_model_exclude_none=True,
+    dependencies=[Depends(limit_bulk_like_writes)]
+)
+async def post_likes_bulk(
+        likes: PostLikeBulkCreate,
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+) -> List[PostLikeBulkResult]:
+    """
+    Поставить лайки на несколько постов в одной транзакции.
+    Ошибка по одному посту не отменяет лайки на остальные.
+    :param likes: Идентификаторы постов из схемы PostLikeBulkCreate.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Статус для каждого поста в формате List[PostLikeBulkResult].
+    """
+    statuses = await post_crud.put_likes_bulk(likes.post_ids, user, session)
+    results = []
+    for post_id, like_status in zip(likes.post_ids, statuses):
+        status_code, detail = describe_like_status(like_status)
+        results.append(
+            PostLikeBulkResult(post_id=post_id, status=status_code, detail=detail)
+        )
+    return results
+
+
 @router.get(
     '/',
-    response_model=List[PostInDB],
+    response_model=PostPage,
     response_model_exclude_none=True,
-    dependencies=[Depends(current_user)]
+    dependencies=[Depends(current_reader)]
 )
-async def get_all_posts(session: AsyncSession = Depends(get_async_session)) -> List[PostInDB]:
+async def get_all_posts(
+        request: Request,
+        limit: int = Query(POSTS_PAGE_DEFAULT_LIMIT, ge=1, le=POSTS_PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None,
+        stream: bool = False,
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostPage, Response]:
     """
-    Получение всех постов.
+    Получение ленты постов от новых к старым с keyset-пагинацией.
+    Страницы кэшируются и отдаются с ETag; при совпадении If-None-Match - 304.
+    :param request: Текущий запрос.
+    :param limit: Количество постов на странице.
+    :param cursor: Курсор next_cursor из предыдущего ответа.
+    :param stream: Отдать всю ленту начиная с курсора в формате NDJSON,
+        выбирая ее из базы страницами по limit постов.
     :param session: Асинхронная сессия SQLAlchemy.
-    :return: Список всех постов в формате List[PostInDB].
+    :return: Страница постов в формате PostPage или NDJSON-поток.
     """
-    all_posts = await post_crud.get_all_objects(session)
-    return all_posts
+    after = check_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            stream_posts(session, limit, after),
+            media_type='application/x-ndjson'
+        )
+
+    async def build() -> bytes:
+        if FAST_JSON:
+            rows = await post_crud.get_posts_page_rows(session, limit, after)
+            return make_post_page_json(rows, limit)
+        posts = await post_crud.get_posts_page(session, limit, after)
+        return serialize(make_post_page(posts, limit))
+
+    etag = await post_response_cache.feed_etag(limit, cursor)
+    return await post_response_cache.respond(request, etag, build)
+
+
+@router.get(
+    '/search',
+    response_model=PostSearchPage,
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_reader)]
+)
+async def search_posts(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(POSTS_PAGE_DEFAULT_LIMIT, ge=1, le=POSTS_PAGE_MAX_LIMIT),
+        offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostSearchPage, Response]:
+    """
+    Полнотекстовый поиск постов, наиболее релевантные первыми.
+    Ищутся посты, содержащие все слова запроса.
+    :param request: Текущий запрос.
+    :param q: Строка поиска.
+    :param limit: Количество постов на странице.
+    :param offset: Смещение: next_offset из предыдущего ответа.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Страница результатов в формате PostSearchPage.
+    """
+    match = check_search_query(q)
+
+    async def build() -> bytes:
+        rows = await post_crud.search_posts(session, match, limit, offset)
+        items = [
+            PostSearchHit(snippet=snippet, **PostInDB.from_orm(post).dict())
+            for post, snippet in rows
+        ]
+        next_offset = None
+        if len(rows) == limit and offset + limit <= SEARCH_MAX_OFFSET:
+            next_offset = offset + limit
+        return serialize(PostSearchPage(items=items, next_offset=next_offset))
+
+    etag = await post_response_cache.feed_etag('search', match, limit, offset)
+    return await post_response_cache.respond(request, etag, build)
+
+
+def make_post_page(posts: List[Post], limit: int) -> PostPage:
+    """
+    Страница постов с курсором следующей страницы.
+    Курсор не выдается, если страница заполнена не полностью.
+    :param posts: Посты страницы, отсортированные по (create_date, id) по убыванию.
+    :param limit: Запрошенный размер страницы.
+    """
+    next_cursor = None
+    if len(posts) == limit:
+        next_cursor = encode_cursor(posts[-1].create_date, posts[-1].id)
+    return PostPage(items=posts, next_cursor=next_cursor)
+
+
+def make_post_page_json(rows: List[Dict[str, Any]], limit: int) -> bytes:
+    """
+    Сериализованная страница постов из строк get_posts_page_rows
+    (режим FAST_JSON): тот же JSON, что serialize(make_post_page(...)),
+    без ORM-объектов и схем pydantic.
+    :param rows: Посты страницы, отсортированные по (create_date, id) по убыванию.
+    :param limit: Запрошенный размер страницы.
+    """
+    page: Dict[str, Any] = {'items': rows}
+    if len(rows) == limit:
+        page['next_cursor'] = encode_cursor(rows[-1]['create_date'], rows[-1]['id'])
+    return dumps(page)
+
+
+def serialize(model: BaseModel) -> bytes:
+    """
+    Сериализация схемы ответа так же, как это делает FastAPI для response_model.
+    """
+    if FAST_JSON:
+        return dumps(model.dict(exclude_none=True))
+    return model.json(
+        exclude_none=True, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+async def stream_posts(
+        session: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[datetime, int]]
+) -> AsyncIterator[Union[str, bytes]]:
+    """
+    Генератор NDJSON-строк ленты постов.
+    В памяти одновременно находится не больше одной страницы.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param limit: Размер страницы, которой посты выбираются из базы.
+    :param after: Позиция, с которой начинается выдача.
+    """
+    while True:
+        if FAST_JSON:
+            rows = await post_crud.get_posts_page_rows(session, limit, after)
+            for row in rows:
+                yield dumps(row) + b'\n'
+            if len(rows) < limit:
+                break
+            after = (rows[-1]['create_date'], rows[-1]['id'])
+            continue
+        posts = await post_crud.get_posts_page(session, limit, after)
+        for post in posts:
+            yield PostInDB.from_orm(post).json() + '\n'
+        if len(posts) < limit:
+            break
+        after = (posts[-1].create_date, posts[-1].id)
+        session.expunge_all()
 
 
 @router.get(
     '{post_id}',
     response_model=PostInDB,
     response_model_exclude_none=True,
-    dependencies=[Depends(current_user)]
+    dependencies=[Depends(current_reader)]
 )
 async def get_post(
         post_id: int,
-        session: AsyncSession = Depends(get_async_session)
-) -> PostInDB:
+        request: Request,
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostInDB, Response]:
     """
     Получение информации о конкретном посте.
+    Ответ кэшируется и отдается с ETag; при совпадении If-None-Match - 304.
     :param post_id: Идентификатор поста для получения информации.
+    :param request: Текущий запрос.
     :param session: Асинхронная сессия SQLAlchemy.
     :return: Информация о посте в формате PostInDB.
     """
-    post = await post_crud.get_object(post_id, session)
-    return post
+    async def build() -> bytes:
+        post = await check_post_exists(post_id, session)
+        return serialize(PostInDB.from_orm(post))
+
+    etag = await post_response_cache.post_etag(post_id)
+    return await post_response_cache.respond(request, etag, build)
 
 
 @router.patch(
     '{post_id}',
     response_model_exclude_none=True,
-    status_code=HTTPStatus.NO_CONTENT
+    status_code=HTTPStatus.NO_CONTENT,
+    dependencies=[Depends(limit_post_writes)]
 )
 async def update_post(
         post_id: int,
         obj_in: PostUpdate,
         session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session),
         user: User = Depends(current_user)
 ) -> None:
     """
@@ -91,31 +300,33 @@ async def update_post(
     :param post_id: Идентификатор поста, который нужно обновить.
     :param obj_in: Данные для обновления из схемы PostUpdate.
     :param session: Асинхронная сессия SQLAlchemy.
+    :param read_session: Асинхронная сессия SQLAlchemy для чтения.
     :param user: Текущий авторизованный пользователь.
     """
-    post = await check_post_exists(post_id, session)
-    await check_post_owner(post_id, session, user)
+    post = await check_post_owner(post_id, read_session, user)
     await post_crud.update_object(post, obj_in, session)
 
 
 @router.delete(
     '{post_id}',
     status_code=HTTPStatus.NO_CONTENT,
-    response_model_exclude_none=True
+    response_model_exclude_none=True,
+    dependencies=[Depends(limit_post_writes)]
 )
 async def delete_post(
         post_id: int,
         session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session),
         user: User = Depends(current_user)
 ) -> None:
     """
     Удаление существующего поста.
     :param post_id: Идентификатор поста, который нужно удалить.
     :param session: Асинхронная сессия SQLAlchemy.
+    :param read_session: Асинхронная сессия SQLAlchemy для чтения.
     :param user: Текущий авторизованный пользователь.
     """
-    post = await check_post_owner(post_id, session, user)
-    post = await check_post_exists(post.id, session)
+    post = await check_post_owner(post_id, read_session, user)
     await post_crud.delete_object(post, session)
 
 
@@ -124,44 +335,77 @@ async def delete_post(
     status_code=HTTPStatus.CREATED,
     response_model=PostLikeInDB,
     response_model_exclude_none=True,
+    dependencies=[Depends(limit_like_writes)]
 )
 async def post_like(
         post_id: int,
         user: User = Depends(current_user),
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session)
 ) -> PostLikeInDB:
     """
     Поставить лайк на пост.
+    В режиме write_behind лайк записывается через очередь (like_writer).
     :param post_id: Идентификатор поста, на который нужно поставить лайк.
     :param user: Текущий авторизованный пользователь.
     :param session: Асинхронная сессия SQLAlchemy.
+    :param read_session: Асинхронная сессия SQLAlchemy для чтения.
     :return: Объект PostLikeInDB - информация о лайке.
     """
-    await check_post_exists(post_id, session)
-    await check_not_liking_own_post(post_id, user, session)
-    await check_on_duplicate_like(post_id, user, session)
-    like = await post_crud.put_a_like(post_id, user, session)
+    if like_writer.running:
+        like_status = await submit_like(
+            LikeAction.LIKE, post_id, user, session, read_session
+        )
+        check_like_status(like_status)
+        return PostLike(post_id=post_id, user_id=user.id)
+    like_status, like = await post_crud.put_a_like(post_id, user, session)
+    check_like_status(like_status)
     return like
 
 
 @router.delete(
     '{post_id}/remove_like',
-    status_code=HTTPStatus.NO_CONTENT
+    status_code=HTTPStatus.NO_CONTENT,
+    dependencies=[Depends(limit_like_writes)]
 )
 async def remove_post_like(
         post_id: int,
         user: User = Depends(current_user),
-        session: AsyncSession = Depends(get_async_session)
+        session: AsyncSession = Depends(get_async_session),
+        read_session: AsyncSession = Depends(get_read_session)
 ) -> None:
     """
     Удалить лайк с поста.
+    В режиме write_behind удаление записывается через очередь (like_writer).
     :param post_id: Идентификатор поста, с которого нужно удалить лайк.
     :param user: Текущий авторизованный пользователь.
     :param session: Асинхронная сессия SQLAlchemy.
+    :param read_session: Асинхронная сессия SQLAlchemy для чтения.
+    """
+    if like_writer.running:
+        like_status = await submit_like(
+            LikeAction.UNLIKE, post_id, user, session, read_session
+        )
+    else:
+        like_status = await post_crud.remove_like(post_id, user, session)
+    check_like_status(like_status)
+
+
+async def submit_like(
+        action: LikeAction,
+        post_id: int,
+        user: User,
+        session: AsyncSession,
+        read_session: AsyncSession
+) -> LikeStatus:
+    """
+    Передать операцию с лайком в очередь отложенной записи.
+    Сессия записи могла занять соединение при загрузке пользователя;
+    оно освобождается до ожидания, чтобы его мог взять обработчик очереди.
     """
-    await check_post_exists(post_id, session)
-    await check_like_exists(post_id, user.id, session)
-    await post_crud.remove_like(post_id, user, session)
+    user_id = user.id
+    await session.close()
+    return await like_writer.submit(action, post_id, user_id, read_session)
 
 
 @router.get(
@@ -169,8 +413,8 @@ async def remove_post_like(
     response_model=UserLikesResponse
 )
 async def get_count_my_like(
-        user: User = Depends(current_user),
-        session: AsyncSession = Depends(get_async_session)
+        user: User = Depends(current_reader),
+        session: AsyncSession = Depends(get_read_session)
 ) -> UserLikesResponse:
     """
     Получить количество лайков текущего пользователя.
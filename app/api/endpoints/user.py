@@ -1,7 +1,27 @@
-from app.api.constants import DELETE_USER_NOT_ALLOWED
-from app.core.user import auth_backend, fastapi_users
-from app.schemas.user import UserCreate, UserRead, UserUpdate
-from fastapi import APIRouter, HTTPException
+from http import HTTPStatus
+from typing import Optional, Union
+
+from app.api.constants import (DELETE_USER_NOT_ALLOWED, INVALID_REFRESH_TOKEN,
+                               POSTS_PAGE_DEFAULT_LIMIT, POSTS_PAGE_MAX_LIMIT)
+from app.api.endpoints.post import (make_post_page, make_post_page_json,
+                                    serialize)
+from app.api.validators import (check_cursor, check_follow_status,
+                                check_user_exists)
+from app.core.db import get_async_session, get_read_session
+from app.core.fast_json import FAST_JSON
+from app.core.rate_limit import limit_auth, limit_follow_writes
+from app.core.response_cache import post_response_cache
+from app.core.user import (UserManager, auth_backend, current_reader,
+                           current_user, fastapi_users, get_user_manager,
+                           jwt_strategy)
+from app.crud.follow import follow_crud
+from app.crud.post import post_crud
+from app.models import User
+from app.schemas.post import PostPage
+from app.schemas.user import (FollowInDB, RefreshTokenRequest, TokenPair,
+                              UserCreate, UserRead, UserUpdate)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
@@ -10,12 +30,14 @@ router.include_router(
     fastapi_users.get_auth_router(auth_backend),
     prefix='/auth/jwt',
     tags=['auth'],
+    dependencies=[Depends(limit_auth)],
 )
 # Маршрут для регистрации новых пользователей
 router.include_router(
     fastapi_users.get_register_router(UserRead, UserCreate),
     prefix='/auth',
     tags=['auth'],
+    dependencies=[Depends(limit_auth)],
 )
 # Маршрут для работы с пользователями (получение, обновление и т.д.)
 router.include_router(
@@ -25,6 +47,215 @@ router.include_router(
 )
 
 
+@router.post(
+    '/auth/jwt/refresh',
+    response_model=TokenPair,
+    tags=['auth'],
+    dependencies=[Depends(limit_auth)]
+)
+async def refresh_tokens(
+        body: RefreshTokenRequest,
+        user_manager: UserManager = Depends(get_user_manager)
+) -> TokenPair:
+    """
+    Обмен refresh-токена на новую пару токенов без проверки пароля.
+    Использованный refresh-токен отзывается.
+    :param body: Refresh-токен.
+    :param user_manager: Менеджер пользователей.
+    :return: Объект TokenPair.
+    """
+    user = await jwt_strategy.rotate_refresh_token(body.refresh_token, user_manager)
+    if user is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=INVALID_REFRESH_TOKEN
+        )
+    return await auth_backend.login(jwt_strategy, user, None)
+
+
+@router.post(
+    '/auth/jwt/revoke',
+    status_code=HTTPStatus.NO_CONTENT,
+    tags=['auth'],
+    dependencies=[Depends(limit_auth)]
+)
+async def revoke_refresh_token(body: RefreshTokenRequest) -> None:
+    """
+    Отзыв refresh-токена. Вместе с /auth/jwt/logout, отзывающим
+    access-токен, завершает сессию.
+    :param body: Refresh-токен.
+    """
+    if await jwt_strategy.revoke_refresh_token(body.refresh_token) is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail=INVALID_REFRESH_TOKEN
+        )
+
+
+@router.get(
+    '/users/me/posts',
+    response_model=PostPage,
+    response_model_exclude_none=True,
+    tags=['users']
+)
+async def get_my_posts(
+        request: Request,
+        limit: int = Query(POSTS_PAGE_DEFAULT_LIMIT, ge=1, le=POSTS_PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None,
+        user: User = Depends(current_reader),
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostPage, Response]:
+    """
+    Получение постов текущего пользователя от новых к старым.
+    :param request: Текущий запрос.
+    :param limit: Количество постов на странице.
+    :param cursor: Курсор next_cursor из предыдущего ответа.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Страница постов в формате PostPage.
+    """
+    return await user_posts_response(request, user.id, limit, cursor, session)
+
+
+@router.get(
+    '/users/me/feed',
+    response_model=PostPage,
+    response_model_exclude_none=True,
+    tags=['users']
+)
+async def get_my_feed(
+        request: Request,
+        limit: int = Query(POSTS_PAGE_DEFAULT_LIMIT, ge=1, le=POSTS_PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None,
+        user: User = Depends(current_reader),
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostPage, Response]:
+    """
+    Лента подписок текущего пользователя от новых постов к старым.
+    :param request: Текущий запрос.
+    :param limit: Количество постов на странице.
+    :param cursor: Курсор next_cursor из предыдущего ответа.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Страница постов в формате PostPage.
+    """
+    after = check_cursor(cursor)
+    user_id = user.id
+
+    async def build() -> bytes:
+        posts = await post_crud.get_feed_page(session, user_id, limit, after)
+        return serialize(make_post_page(posts, limit))
+
+    etag = await post_response_cache.feed_etag('home', user_id, limit, cursor)
+    return await post_response_cache.respond(request, etag, build)
+
+
+@router.post(
+    '/users/{user_id}/follow',
+    response_model=FollowInDB,
+    status_code=HTTPStatus.CREATED,
+    tags=['users'],
+    dependencies=[Depends(limit_follow_writes)]
+)
+async def follow_user(
+        user_id: int,
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+) -> FollowInDB:
+    """
+    Подписаться на пользователя.
+    :param user_id: Идентификатор автора.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Объект FollowInDB - информация о подписке.
+    """
+    follow_status, follow = await follow_crud.follow(user_id, user, session)
+    check_follow_status(follow_status)
+    return follow
+
+
+@router.delete(
+    '/users/{user_id}/follow',
+    status_code=HTTPStatus.NO_CONTENT,
+    tags=['users'],
+    dependencies=[Depends(limit_follow_writes)]
+)
+async def unfollow_user(
+        user_id: int,
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+) -> None:
+    """
+    Отписаться от пользователя.
+    :param user_id: Идентификатор автора.
+    :param user: Текущий авторизованный пользователь.
+    :param session: Асинхронная сессия SQLAlchemy.
+    """
+    follow_status = await follow_crud.unfollow(user_id, user, session)
+    check_follow_status(follow_status)
+
+
+@router.get(
+    '/users/{user_id}/posts',
+    response_model=PostPage,
+    response_model_exclude_none=True,
+    tags=['users'],
+    dependencies=[Depends(current_reader)]
+)
+async def get_user_posts(
+        user_id: int,
+        request: Request,
+        limit: int = Query(POSTS_PAGE_DEFAULT_LIMIT, ge=1, le=POSTS_PAGE_MAX_LIMIT),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_read_session)
+) -> Union[PostPage, Response]:
+    """
+    Получение постов указанного пользователя от новых к старым.
+    :param user_id: Идентификатор автора.
+    :param request: Текущий запрос.
+    :param limit: Количество постов на странице.
+    :param cursor: Курсор next_cursor из предыдущего ответа.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Страница постов в формате PostPage.
+    """
+    return await user_posts_response(
+        request, user_id, limit, cursor, session, check_user=True
+    )
+
+
+async def user_posts_response(
+        request: Request,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str],
+        session: AsyncSession,
+        check_user: bool = False
+) -> Response:
+    """
+    Страница постов автора с keyset-пагинацией.
+    Ответ кэшируется вместе с лентой: любое изменение постов меняет ETag.
+    :param request: Текущий запрос.
+    :param user_id: Идентификатор автора.
+    :param limit: Количество постов на странице.
+    :param cursor: Курсор next_cursor из предыдущего ответа.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :param check_user: Вернуть 404, если автора не существует.
+    """
+    after = check_cursor(cursor)
+
+    async def build() -> bytes:
+        if check_user:
+            await check_user_exists(user_id, session)
+        if FAST_JSON:
+            rows = await post_crud.get_posts_page_rows(session, limit, after, user_id)
+            return make_post_page_json(rows, limit)
+        posts = await post_crud.get_user_posts_page(session, user_id, limit, after)
+        return serialize(make_post_page(posts, limit))
+
+    etag = await post_response_cache.feed_etag('user', user_id, limit, cursor)
+    return await post_response_cache.respond(request, etag, build)
+
+
 @router.delete(
     '/users/{id}',
     tags=['users'],
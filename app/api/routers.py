@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from app.api.endpoints import user_router, post_router
+from app.api.endpoints import (debug_router, metrics_router, post_router,
+                               user_router)
+from app.core.config import settings
 
 main_router = APIRouter()
 
@@ -13,3 +15,11 @@ main_router.include_router(
     prefix='/Post',
     tags=['Posts']
 )
+
+# Метрики в формате Prometheus
+if settings.metrics_enabled:
+    main_router.include_router(metrics_router, tags=['metrics'])
+
+# Профили SQL-запросов (только при включенном профилировщике)
+if settings.debug_profiler_enabled:
+    main_router.include_router(debug_router, tags=['debug'])
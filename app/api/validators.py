@@ -1,11 +1,18 @@
+from datetime import datetime
 from http import HTTPStatus
-from typing import Optional
-from app.api.constants import (CANNOT_LIKE_OWN_POST, EMAIL_ALREADY_EXISTS,
-                               LIKE_ALREADY_EXISTS, NOT_FOUND_LIKE,
-                               NOT_FOUND_POST, NOT_OWNER)
-from app.crud.post import post_crud
+from typing import Optional, Tuple
+from app.api.constants import (CANNOT_FOLLOW_SELF, CANNOT_LIKE_OWN_POST,
+                               EMAIL_ALREADY_EXISTS, FOLLOW_ALREADY_EXISTS,
+                               INVALID_CURSOR, INVALID_SEARCH_QUERY,
+                               LIKE_ALREADY_EXISTS, LIKE_CONFLICT,
+                               NOT_FOUND_FOLLOW, NOT_FOUND_LIKE,
+                               NOT_FOUND_POST, NOT_FOUND_USER, NOT_OWNER)
+from app.crud.follow import FollowStatus
+from app.crud.post import LikeStatus, post_crud
 from app.crud.user import user_crud
 from app.models import User
+from app.utils.pagination import decode_cursor
+from app.utils.search import build_match_query
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -37,13 +44,16 @@ async def check_post_owner(
 ) -> dict:
     """
     Проверяет, является ли пользователь владельцем поста.
+    Пост берется из загрузчика сессии: после check_post_exists
+    в том же запросе повторного SELECT нет.
     :param post_id: Идентификатор поста для проверки.
     :param session: Асинхронная сессия SQLAlchemy.
     :param user: Объект пользователя.
-    :raises HTTPException: Если пользователь не является владельцем поста.
+    :raises HTTPException: Если пост не найден или пользователь
+        не является владельцем поста.
     :return: Объект поста (dict).
     """
-    post = await post_crud.get_object(post_id, session)
+    post = await check_post_exists(post_id, session)
     if post.user_id != user.id:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
@@ -52,70 +62,75 @@ async def check_post_owner(
     return post
 
 
-async def check_like_exists(
-        post_id: int,
-        user_id: int,
-        session: AsyncSession
-) -> dict:
+_LIKE_ERRORS = {
+    LikeStatus.POST_NOT_FOUND: (HTTPStatus.NOT_FOUND, NOT_FOUND_POST),
+    LikeStatus.OWN_POST: (HTTPStatus.FORBIDDEN, CANNOT_LIKE_OWN_POST),
+    LikeStatus.ALREADY_EXISTS: (HTTPStatus.CONFLICT, LIKE_ALREADY_EXISTS),
+    LikeStatus.NOT_FOUND: (HTTPStatus.NOT_FOUND, NOT_FOUND_LIKE),
+    LikeStatus.CONFLICT: (HTTPStatus.CONFLICT, LIKE_CONFLICT),
+}
+
+
+def describe_like_status(like_status: LikeStatus) -> Tuple[int, Optional[str]]:
     """
-    Проверяет существование лайка от указанного пользователя на указанном посте.
-    :param post_id: Идентификатор поста для проверки лайка.
-    :param user_id: Идентификатор пользователя для проверки лайка.
-    :param session: Асинхронная сессия SQLAlchemy.
-    :raises HTTPException: Если лайк не найден.
-    :return: Объект лайка (dict).
+    HTTP-статус и сообщение для результата операции с лайком.
+    Используется в bulk-запросах, где ошибка не прерывает обработку остальных элементов.
+    :param like_status: Статус операции из CRUDPost.
+    :return: Кортеж (код HTTP-статуса, сообщение об ошибке или None).
     """
-    like = await post_crud.get_like_by_user_and_post_id(post_id, user_id, session)
-    if not like:
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND,
-            detail=NOT_FOUND_LIKE
-        )
-    return like
+    if like_status in _LIKE_ERRORS:
+        status_code, detail = _LIKE_ERRORS[like_status]
+        return status_code, detail
+    return HTTPStatus.CREATED, None
 
 
-async def check_not_liking_own_post(
-        post_id: int,
-        user: User,
-        session: AsyncSession
-) -> dict:
+def check_like_status(like_status: LikeStatus) -> None:
     """
-    Проверяет, что пользователь не может лайкать свои собственные посты.
-    :param post_id: Идентификатор поста для проверки.
-    :param user: Объект пользователя.
-    :param session: Асинхронная сессия SQLAlchemy.
-    :raises HTTPException: Если пользователь пытается лайкнуть свой собственный пост.
-    :return: Объект поста (dict).
+    Преобразует результат постановки/удаления лайка в HTTP-ошибку.
+    :param like_status: Статус операции из CRUDPost.put_a_like/remove_like.
+    :raises HTTPException: Если пост не найден, это собственный пост,
+        лайк уже поставлен, лайк не найден или изменен параллельным запросом.
     """
-    post = await post_crud.get_object(post_id, session)
-    if post.user_id == user.id:
-        raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN,
-            detail=CANNOT_LIKE_OWN_POST
-        )
-    return post
+    if like_status in _LIKE_ERRORS:
+        status_code, detail = _LIKE_ERRORS[like_status]
+        raise HTTPException(status_code=status_code, detail=detail)
 
 
-async def check_on_duplicate_like(
-        post_id: int,
-        user: User,
+async def check_user_exists(
+        user_id: int,
         session: AsyncSession
-) -> Optional[dict]:
+) -> None:
     """
-    Проверяет наличие дубликата лайка от указанного пользователя на указанном посте.
-    :param post_id: Идентификатор поста для проверки лайка.
-    :param user: Объект пользователя.
+    Проверяет существование пользователя с указанным идентификатором.
+    :param user_id: Идентификатор пользователя.
     :param session: Асинхронная сессия SQLAlchemy.
-    :raises HTTPException: Если лайк от указанного пользователя на указанном посте уже существует.
-    :return: Объект лайка (dict) или None, если лайк не найден.
+    :raises HTTPException: Если пользователь не найден.
     """
-    get_like = await post_crud.get_like_by_user_and_post_id(post_id, user.id, session)
-    if get_like is not None:
+    if not await user_crud.user_exists(user_id, session):
         raise HTTPException(
-            status_code=HTTPStatus.CONFLICT,
-            detail=LIKE_ALREADY_EXISTS
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=NOT_FOUND_USER
         )
-    return get_like
+
+
+_FOLLOW_ERRORS = {
+    FollowStatus.USER_NOT_FOUND: (HTTPStatus.NOT_FOUND, NOT_FOUND_USER),
+    FollowStatus.SELF: (HTTPStatus.FORBIDDEN, CANNOT_FOLLOW_SELF),
+    FollowStatus.ALREADY_EXISTS: (HTTPStatus.CONFLICT, FOLLOW_ALREADY_EXISTS),
+    FollowStatus.NOT_FOUND: (HTTPStatus.NOT_FOUND, NOT_FOUND_FOLLOW),
+}
+
+
+def check_follow_status(follow_status: FollowStatus) -> None:
+    """
+    Преобразует результат подписки/отписки в HTTP-ошибку.
+    :param follow_status: Статус операции из CRUDFollow.follow/unfollow.
+    :raises HTTPException: Если автор не найден, это сам пользователь,
+        подписка уже есть или подписка не найдена.
+    """
+    if follow_status in _FOLLOW_ERRORS:
+        status_code, detail = _FOLLOW_ERRORS[follow_status]
+        raise HTTPException(status_code=status_code, detail=detail)
 
 
 async def check_on_duplicate_email_in_db(
@@ -137,3 +152,36 @@ async def check_on_duplicate_email_in_db(
         )
     return check_email
 
+
+def check_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    Проверяет и декодирует курсор пагинации.
+    :param cursor: Непрозрачный курсор из ответа предыдущей страницы.
+    :raises HTTPException: Если курсор поврежден.
+    :return: Позиция (create_date, id) или None, если курсор не передан.
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=INVALID_CURSOR
+        )
+
+
+def check_search_query(q: str) -> str:
+    """
+    Проверяет поисковый запрос и строит по нему выражение MATCH.
+    :param q: Строка поиска от пользователя.
+    :raises HTTPException: Если в запросе нет ни одного слова.
+    :return: Выражение для полнотекстового индекса.
+    """
+    try:
+        return build_match_query(q)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=INVALID_SEARCH_QUERY
+        )
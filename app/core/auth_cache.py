@@ -0,0 +1,178 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.models.user import User
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class UserSnapshotCache:
+    """
+    LRU-кэш с TTL: проверенный JWT -> снимок пользователя.
+    Позволяет не выполнять SELECT пользователя на каждый аутентифицированный запрос.
+    Кэш живет в памяти процесса; при изменении пользователя его записи удаляются
+    через invalidate_user, в остальных воркерах устаревание ограничено TTL.
+    :param max_size: Максимальное количество токенов в кэше.
+    :param ttl_seconds: Время жизни записи; 0 отключает кэш.
+    """
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._tokens_by_user: Dict[Any, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Получить снимок пользователя по токену.
+        :param token: JWT из заголовка Authorization.
+        :return: Отсоединенный от сессии объект User или None при промахе.
+        """
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            self._discard(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return self._restore(data)
+
+    def set(
+            self,
+            token: str,
+            user: User,
+            token_expires_at: Optional[float] = None
+    ) -> None:
+        """
+        Сохранить снимок пользователя для токена.
+        :param token: JWT из заголовка Authorization.
+        :param user: Загруженный из базы пользователь.
+        :param token_expires_at: Unix-время истечения токена (claim exp).
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        data = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        }
+        self._discard(token)
+        self._entries[token] = (time.monotonic() + ttl, data)
+        self._tokens_by_user.setdefault(data['id'], set()).add(token)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """
+        Удалить из кэша все токены пользователя.
+        :param user_id: Идентификатор пользователя.
+        """
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Метрики кэша: попадания, промахи, вытеснения и текущий размер.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+        }
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]['id']
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    @staticmethod
+    def _restore(data: Dict[str, Any]) -> User:
+        # Каждому запросу отдается свой экземпляр: его можно добавить в сессию
+        # (например, при PATCH /users/me) как уже существующую запись.
+        user = User(**data)
+        make_transient_to_detached(user)
+        return user
+
+
+class TokenClaimsCache:
+    """
+    LRU-кэш проверенных JWT: токен -> claims до истечения токена (claim exp).
+    Повторные запросы с тем же токеном не проверяют подпись заново.
+    :param max_size: Максимальное количество токенов в кэше; 0 отключает кэш.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Получить claims токена.
+        :param token: JWT из заголовка Authorization.
+        :return: Словарь claims или None при промахе или истекшем токене.
+        """
+        entry = self._entries.get(token)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, token: str, claims: Dict[str, Any]) -> None:
+        """
+        Сохранить claims проверенного токена. Токены без exp не кэшируются.
+        :param token: JWT из заголовка Authorization.
+        :param claims: Claims токена.
+        """
+        expires_at = claims.get('exp')
+        if self.max_size <= 0 or expires_at is None or expires_at <= time.time():
+            return
+        self._entries[token] = (expires_at, claims)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Метрики кэша: попадания, промахи и текущий размер.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+        }
@@ -1,4 +1,6 @@
 """Импорты класса Base и всех моделей для Alembic."""
 from app.core.db import Base  # noqa
 from app.models.user import  User # noqa
-from app.models.post import Post, PostLike # noqa
\ No newline at end of file
+from app.models.post import Post, PostLike # noqa
+from app.models.follow import Follow, FeedItem # noqa
+from app.models.token import RevokedToken # noqa
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseSettings, EmailStr
 
 
@@ -9,12 +9,122 @@ class Settings(BaseSettings):
     app_title = 'Webtronics social network'
     secret: str = 'SECRET'
     database_url: str
+    # Отдельная база (реплика) для чтения; по умолчанию для SQLite -
+    # то же файл, открытый только на чтение.
+    read_database_url: Optional[str] = None
+    # Пул соединений и PRAGMA SQLite, применяемые к каждому новому соединению.
+    # SQLite допускает одного писателя: единственное соединение выстраивает
+    # запросы в очередь пула вместо ожидания блокировки в busy_timeout.
+    # Чтение (в том числе пользователя по токену и потоковые ответы) идет
+    # через движок чтения и это соединение не занимает.
+    # None отключает соответствующую PRAGMA.
+    db_pool_size: int = 1
+    db_max_overflow: int = 0
+    db_pool_timeout: int = 30
+    # Читатели в режиме WAL не блокируют друг друга и писателя.
+    db_read_pool_size: int = 5
+    db_read_max_overflow: int = 10
+    sqlite_journal_mode: Optional[str] = 'WAL'
+    sqlite_synchronous: Optional[str] = 'NORMAL'
+    sqlite_busy_timeout: Optional[int] = 5000
+    sqlite_cache_size: Optional[int] = -64000
+    sqlite_mmap_size: Optional[int] = 268435456
+    sqlite_temp_store: Optional[str] = 'MEMORY'
+    # Максимальное количество элементов в одном bulk-запросе.
+    bulk_max_items: int = 500
+    # Лента подписок: посты авторов, у которых подписчиков не больше порога,
+    # рассылаются в ленты подписчиков при создании; посты более популярных
+    # авторов подмешиваются при чтении. При подписке в ленту добавляются
+    # последние feed_backfill_size постов автора.
+    feed_fanout_max_followers: int = 10000
+    feed_backfill_size: int = 50
+    # Запись лайков: sync - каждый лайк в своей транзакции, write_behind -
+    # через очередь, которая сбрасывается одной транзакцией каждые
+    # like_flush_interval_ms или по накоплении like_flush_max_ops операций.
+    # like_durability: commit - ответ после фиксации пачки, в которую
+    # попала операция; enqueue - ответ сразу после постановки в очередь
+    # (статус предварительный, при аварийной остановке очередь теряется).
+    like_write_mode: str = 'sync'
+    like_durability: str = 'commit'
+    like_flush_interval_ms: int = 20
+    like_flush_max_ops: int = 500
+    like_queue_size: int = 10000
+    # Попытки записи пачки; после последней неудачной операции пачки
+    # отбрасываются (метрика dropped_ops очереди like_writer).
+    like_flush_attempts: int = 3
+    # Метрики в формате Prometheus на GET /metrics. Доступ - по заголовку
+    # Authorization: Bearer <metrics_token> (для сборщика метрик), а если
+    # токен не задан - только для суперпользователя.
+    metrics_enabled: bool = True
+    metrics_token: Optional[str] = None
+    # Профилировщик SQL: заголовки X-Query-* в ответах и последние
+    # debug_profiler_history профилей на GET /debug/requests (для суперпользователя).
+    debug_profiler_enabled: bool = False
+    debug_profiler_history: int = 200
+    # Хэширование паролей (bcrypt) в пуле потоков или процессов (thread, process).
+    # При входе хэши, вычисленные с другим password_hash_rounds, пересчитываются.
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_executor: str = 'thread'
     first_superuser_email: Optional[EmailStr] = None
     first_superuser_password: Optional[str] = None
+    # JWT: ключи подписи {kid: секрет} (JSON в JWT_KEYS) и kid ключа для новых
+    # токенов. Проверяются токены, подписанные любым ключом из jwt_keys;
+    # токены без kid - ключом secret. Для ротации новый ключ добавляется
+    # в jwt_keys и становится jwt_signing_kid, старый удаляется через
+    # jwt_lifetime_seconds. jwt_trust_claims: эндпоинты чтения берут
+    # пользователя из claims токена без запроса к базе.
+    jwt_keys: Dict[str, str] = {}
+    jwt_signing_kid: Optional[str] = None
+    jwt_lifetime_seconds: int = 3600
+    jwt_trust_claims: bool = False
+    jwt_claims_cache_size: int = 10000
+    # Refresh-токены и отзыв токенов: время жизни refresh-токена, период
+    # подгрузки отозванных другими процессами токенов и период очистки
+    # истекших записей таблицы отозванных токенов.
+    jwt_refresh_lifetime_seconds: int = 2592000
+    token_revocation_sync_seconds: int = 2
+    token_revocation_cleanup_seconds: int = 300
+    # Кэш пользователей по JWT для current_user (0 отключает кэш).
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_size: int = 10000
+    # Ограничение частоты запросов на запись (token bucket): лимиты
+    # "количество/период" (second, minute, hour, day) на пользователя,
+    # для входа и регистрации - на IP-адрес; хранилище memory или redis.
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = 'memory'
+    rate_limit_redis_url: str = 'redis://localhost:6379/0'
+    rate_limit_max_keys: int = 100000
+    rate_limit_trust_forwarded_for: bool = False
+    rate_limit_posts: str = '30/minute'
+    rate_limit_likes: str = '120/minute'
+    rate_limit_follows: str = '60/minute'
+    rate_limit_auth: str = '20/minute'
+    # Сериализация ответов через orjson (нужен пакет orjson): класс ответа
+    # по умолчанию и страницы постов, собираемые из строк запроса
+    # без ORM-объектов и схем pydantic.
+    fast_json_enabled: bool = False
+    # Кэш ответов чтения постов с ETag: memory (только при одном воркере:
+    # версии не видны другим процессам) или redis. Изменения, не сбросившие
+    # кэш, видны не позже чем через response_cache_ttl секунд.
+    response_cache_enabled: bool = False
+    response_cache_backend: str = 'memory'
+    response_cache_redis_url: str = 'redis://localhost:6379/0'
+    response_cache_ttl: int = 30
+    response_cache_max_size: int = 1000
+    # Проверка email через Kickbox: sync - при регистрации,
+    # background - в фоновой очереди после регистрации, off - не проверять.
+    kickbox_api_key: Optional[str] = None
+    kickbox_url: str = 'https://api.kickbox.com/v2/verify'
+    email_verification_mode: str = 'sync'
+    email_verification_timeout: float = 3.0
+    email_verification_cache_ttl: int = 86400
+    email_verification_cache_size: int = 10000
+    email_verification_failure_threshold: int = 5
+    email_verification_reset_timeout: int = 30
 
     class Config:
         env_file = '.env'
 
 
 settings = Settings()
-
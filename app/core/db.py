@@ -1,7 +1,14 @@
+import time
+
 from app.core.config import settings
-from sqlalchemy import Column, Integer
+from app.core import profiler
+from app.core.metrics import DB_POOL_WAIT, instrument_engine
+from app.crud.loader import close_loader
+from sqlalchemy import Column, Integer, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 
 class PreBase:
@@ -14,9 +21,153 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
 
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+def is_sqlite_file_url(database_url: str) -> bool:
+    """
+    Проверяет, указывает ли URL на файловую (не in-memory) базу SQLite.
+    :param database_url: URL подключения к базе данных.
+    """
+    url = make_url(database_url)
+    return (
+        url.get_backend_name() == 'sqlite'
+        and url.database not in (None, '', ':memory:')
+    )
+
+
+def get_read_database_url() -> str:
+    """
+    URL базы данных для чтения.
+    Если read_database_url не задан, для файловой SQLite используется тот же
+    файл, открытый в режиме только для чтения; для остальных баз - database_url.
+    :return: URL подключения для движка чтения.
+    """
+    if settings.read_database_url is not None:
+        return settings.read_database_url
+    if not is_sqlite_file_url(settings.database_url):
+        return settings.database_url
+    url = make_url(settings.database_url)
+    url = url.set(
+        database=f'file:{url.database}',
+        query={**url.query, 'mode': 'ro', 'uri': 'true'}
+    )
+    return str(url)
+
+
+def get_sqlite_pragmas(read_only: bool = False) -> dict:
+    """
+    PRAGMA SQLite из настроек приложения.
+    :param read_only: PRAGMA для соединений только на чтение: без journal_mode,
+        который меняет файл базы, и с query_only.
+    :return: Словарь {имя PRAGMA: значение} без отключенных (None) PRAGMA.
+    """
+    pragmas = {
+        'journal_mode': settings.sqlite_journal_mode,
+        'synchronous': settings.sqlite_synchronous,
+        'busy_timeout': settings.sqlite_busy_timeout,
+        'cache_size': settings.sqlite_cache_size,
+        'mmap_size': settings.sqlite_mmap_size,
+        'temp_store': settings.sqlite_temp_store,
+    }
+    if read_only:
+        del pragmas['journal_mode']
+        pragmas['query_only'] = 'ON'
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий ожидание свободного соединения.
+    Метка engine в метрике db_pool_checkout_wait_seconds - logging_name пула.
+    """
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, self.logging_name)
+
+
+def get_engine_options(
+        database_url: str,
+        pool_size: int,
+        max_overflow: int,
+        name: str
+) -> dict:
+    """
+    Параметры create_async_engine для указанной базы данных.
+    Для файловой SQLite вместо NullPool по умолчанию используется пул
+    соединений, чтобы PRAGMA и поток aiosqlite не создавались на каждую сессию.
+    :param database_url: URL подключения к базе данных.
+    :param pool_size: Размер пула соединений.
+    :param max_overflow: Количество соединений сверх размера пула.
+    :param name: Имя пула в логах и метриках (write, read).
+    :return: Словарь параметров движка.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and not is_sqlite_file_url(database_url):
+        return {}
+    return {
+        'poolclass': TimedAsyncAdaptedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': settings.db_pool_timeout,
+        'pool_logging_name': name,
+    }
+
+
+def set_sqlite_pragmas(pragmas: dict):
+    """
+    Создает обработчик события connect, применяющий PRAGMA к новому соединению SQLite.
+    :param pragmas: Словарь {имя PRAGMA: значение}.
+    """
+    def on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return on_connect
+
+
+engine = create_async_engine(
+    settings.database_url,
+    **get_engine_options(
+        settings.database_url, settings.db_pool_size, settings.db_max_overflow, 'write'
+    )
+)
+instrument_engine(engine, 'write')
+profiler.instrument_engine(engine)
+
+if engine.dialect.name == 'sqlite':
+    event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas(get_sqlite_pragmas()))
+
+read_database_url = get_read_database_url()
+
+if read_database_url == settings.database_url:
+    read_engine = engine
+else:
+    read_engine = create_async_engine(
+        read_database_url,
+        **get_engine_options(
+            read_database_url,
+            settings.db_read_pool_size,
+            settings.db_read_max_overflow,
+            'read'
+        )
+    )
+    instrument_engine(read_engine, 'read')
+    profiler.instrument_engine(read_engine)
+    if read_engine.dialect.name == 'sqlite':
+        event.listen(
+            read_engine.sync_engine,
+            'connect',
+            set_sqlite_pragmas(get_sqlite_pragmas(read_only=True))
+        )
+
+# expire_on_commit=False: после commit объекты не перечитываются из базы,
+# поэтому записи обходятся без refresh и без ленивой загрузки атрибутов.
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+AsyncReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_async_session():
@@ -25,4 +176,20 @@ async def get_async_session():
     Используется для выполнения асинхронных запросов к базе данных с помощью SQLAlchemy.
     """
     async with AsyncSessionLocal() as async_session:
-        yield async_session
+        try:
+            yield async_session
+        finally:
+            await close_loader(async_session)
+
+
+async def get_read_session():
+    """
+    Функция, создающая асинхронную сессию чтения (движок read_engine).
+    Используется в эндпоинтах и валидаторах, которые только читают данные,
+    чтобы они не занимали соединения пишущего движка.
+    """
+    async with AsyncReadSessionLocal() as async_session:
+        try:
+            yield async_session
+        finally:
+            await close_loader(async_session)
@@ -0,0 +1,39 @@
+from typing import Any
+
+from app.core.config import settings
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def check_fast_json() -> bool:
+    """
+    Включена ли сериализация ответов через orjson.
+    Для fast_json_enabled=true требуется установленный пакет orjson.
+    """
+    if not settings.fast_json_enabled:
+        return False
+    if orjson is None:
+        raise RuntimeError('Для FAST_JSON_ENABLED=true установите пакет orjson')
+    return True
+
+
+FAST_JSON = check_fast_json()
+
+# Класс ответа по умолчанию: для эндпоинтов с response_model FastAPI
+# по-прежнему вызывает jsonable_encoder, но кодирует результат orjson.
+default_response_class = ORJSONResponse if FAST_JSON else JSONResponse
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Сериализация словарей и списков через orjson.
+    Результат совпадает с BaseModel.json(ensure_ascii=False) без пробелов:
+    datetime без часового пояса выводится в isoformat, текст - в UTF-8.
+    :param obj: Данные ответа.
+    :return: JSON в UTF-8.
+    """
+    return orjson.dumps(obj)
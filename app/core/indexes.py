@@ -0,0 +1,322 @@
+"""
+Аудит индексов: сверка индексов моделей с живой схемой и проверка
+планов запросов горячих путей через EXPLAIN QUERY PLAN.
+Запросы не копируются вручную: функции CRUD горячих путей вызываются
+на примерных данных в транзакции, которая затем откатывается, а их
+SQL перехватывается событием соединения и проверяется с теми же
+параметрами.
+Запуск проверки планов: python -m app.core.indexes
+(код возврата 1, если в плане горячего запроса есть полный просмотр таблицы).
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Tuple
+
+from app.core.base import Base
+from app.core.config import settings
+from app.core.db import engine
+from app.crud.follow import follow_crud
+from app.crud.post import LikeAction, post_crud
+from app.crud.user import user_crud
+from app.models import FeedItem, Follow, Post, PostLike, User
+from app.models.post import utc_now
+from app.schemas.post import PostCreate
+from sqlalchemy import event, func, inspect, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, полный просмотр которых на горячем пути недопустим.
+HOT_TABLES = ('post', 'postlike', 'user', 'follow', 'feeditem')
+# Позиция курсора для запросов следующей страницы.
+SAMPLE_AFTER = (datetime(2023, 1, 1), 1)
+
+
+class AuditSample(NamedTuple):
+    """
+    Примерные данные аудита: автор (популярный, его посты подмешиваются
+    в ленты при чтении), читатель, подписанный на автора и лайкнувший его
+    второй пост, пользователь без подписок и посты автора.
+    """
+    author: User
+    reader: User
+    stranger: User
+    post_ids: List[int]
+
+
+HotPath = Callable[[AsyncSession, AuditSample], Awaitable[Any]]
+
+# Горячие пути: вызовы CRUD в том виде, в каком их выполняют эндпоинты.
+HOT_PATHS: Dict[str, HotPath] = {
+    'post_feed_first_page': lambda session, sample: post_crud.get_posts_page(session, 50),
+    'post_feed_next_page': lambda session, sample: (
+        post_crud.get_posts_page(session, 50, SAMPLE_AFTER)
+    ),
+    'post_feed_rows': lambda session, sample: (
+        post_crud.get_posts_page_rows(session, 50, SAMPLE_AFTER)
+    ),
+    'posts_by_author': lambda session, sample: (
+        post_crud.get_user_posts_page(session, sample.author.id, 50, SAMPLE_AFTER)
+    ),
+    'posts_by_author_rows': lambda session, sample: (
+        post_crud.get_posts_page_rows(session, 50, SAMPLE_AFTER, sample.author.id)
+    ),
+    'post_by_id': lambda session, sample: post_crud.get_object(sample.post_ids[0], session),
+    'post_owner_by_id': lambda session, sample: (
+        post_crud.get_post_owner_id(sample.post_ids[0], session)
+    ),
+    'search_posts': lambda session, sample: post_crud.search_posts(session, '"python"', 20),
+    'create_posts': lambda session, sample: post_crud.create_objects(
+        [PostCreate(text='python audit')], session, sample.author
+    ),
+    'delete_post': lambda session, sample: post_crud.delete_object(
+        Post(id=sample.post_ids[2]), session
+    ),
+    'put_a_like': lambda session, sample: (
+        post_crud.put_a_like(sample.post_ids[0], sample.reader, session)
+    ),
+    'remove_like': lambda session, sample: (
+        post_crud.remove_like(sample.post_ids[1], sample.reader, session)
+    ),
+    'like_state': lambda session, sample: (
+        post_crud.get_like_state(sample.post_ids[1], sample.reader.id, session)
+    ),
+    'like_by_post_and_user': lambda session, sample: post_crud.get_like_by_user_and_post_id(
+        sample.post_ids[1], sample.reader.id, session
+    ),
+    'put_likes_bulk': lambda session, sample: (
+        post_crud.put_likes_bulk(sample.post_ids, sample.reader, session)
+    ),
+    'apply_like_actions': lambda session, sample: post_crud.apply_like_actions([
+        (LikeAction.LIKE, sample.post_ids[0], sample.reader.id),
+        (LikeAction.UNLIKE, sample.post_ids[1], sample.reader.id),
+    ], session),
+    'user_likes_given': lambda session, sample: (
+        user_crud.get_my_likes_count(sample.reader, session)
+    ),
+    'user_by_email': lambda session, sample: (
+        user_crud.email_exists_in_db(sample.reader.email, session)
+    ),
+    'user_by_id': lambda session, sample: user_crud.user_exists(sample.reader.id, session),
+    'home_feed_page': lambda session, sample: (
+        post_crud.get_feed_page(session, sample.reader.id, 50, SAMPLE_AFTER)
+    ),
+    'follow': lambda session, sample: (
+        follow_crud.follow(sample.author.id, sample.stranger, session)
+    ),
+    'unfollow': lambda session, sample: (
+        follow_crud.unfollow(sample.author.id, sample.reader, session)
+    ),
+}
+
+
+def find_index_mismatches(connection: Connection) -> List[str]:
+    """
+    Сравнивает индексы Base.metadata с индексами в базе данных.
+    :param connection: Синхронное соединение SQLAlchemy.
+    :return: Список описаний расхождений (пустой, если схема совпадает).
+    """
+    inspector = inspect(connection)
+    live_tables = set(inspector.get_table_names())
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in live_tables:
+            problems.append(f'таблица {table.name} отсутствует')
+            continue
+        live = {
+            index['name']: (tuple(index['column_names']), bool(index['unique']))
+            for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            expected = (tuple(column.name for column in index.columns), bool(index.unique))
+            if index.name not in live:
+                problems.append(f'индекс {index.name} на {table.name} отсутствует')
+            elif live[index.name] != expected:
+                problems.append(
+                    f'индекс {index.name} на {table.name}: в базе {live[index.name]}, '
+                    f'в модели {expected}'
+                )
+        for name in live.keys() - {index.name for index in table.indexes}:
+            problems.append(f'индекс {name} на {table.name} не описан в моделях')
+    return problems
+
+
+async def check_indexes() -> List[str]:
+    """
+    Проверка индексов при старте приложения: пишет найденные расхождения
+    в журнал.
+    :return: Список расхождений.
+    """
+    async with engine.connect() as connection:
+        problems = await connection.run_sync(find_index_mismatches)
+    for problem in problems:
+        logger.warning('Схема базы данных: %s (выполните alembic upgrade head)', problem)
+    return problems
+
+
+class AuditSession(AsyncSession):
+    """
+    Сессия аудита: commit только отправляет изменения в базу, поэтому
+    все, что сделали функции CRUD, откатывается вместе с примерными данными.
+    """
+    async def commit(self) -> None:
+        await self.flush()
+
+
+async def insert_sample(session: AsyncSession) -> AuditSample:
+    """
+    Добавляет примерные данные аудита с идентификаторами после существующих.
+    """
+    first_user_id = (await session.scalar(select(func.max(User.id))) or 0) + 1
+    first_post_id = (await session.scalar(select(func.max(Post.id))) or 0) + 1
+    users = []
+    for offset, followers in enumerate((settings.feed_fanout_max_followers + 1, 0, 0)):
+        user_id = first_user_id + offset
+        users.append(User(
+            id=user_id, email=f'audit{user_id}@audit.example', hashed_password='',
+            is_active=True, is_superuser=False, is_verified=True,
+            username=f'audit{user_id}', likes_given=0, followers_count=followers,
+        ))
+    author, reader, stranger = users
+    now = utc_now()
+    post_ids = [first_post_id + offset for offset in range(3)]
+    await session.execute(insert(User), [
+        {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        for user in users
+    ])
+    await session.execute(insert(Post), [
+        {'id': post_id, 'user_id': author.id, 'username': author.username,
+         'text': 'python audit', 'create_date': now, 'like_count': 0}
+        for post_id in post_ids
+    ])
+    await session.execute(insert(Follow).values(
+        follower_id=reader.id, followee_id=author.id, created_at=now
+    ))
+    await session.execute(insert(FeedItem).values(
+        user_id=reader.id, post_id=post_ids[0], author_id=author.id, create_date=now
+    ))
+    await session.execute(insert(PostLike).values(
+        post_id=post_ids[1], user_id=reader.id, created_at=now
+    ))
+    return AuditSample(author, reader, stranger, post_ids)
+
+
+async def capture_statements(
+        connection: AsyncConnection,
+        hot_path: HotPath
+) -> List[Tuple[str, Any]]:
+    """
+    Выполняет горячий путь на примерных данных и откатывает транзакцию.
+    :param connection: Асинхронное соединение SQLAlchemy с SQLite.
+    :param hot_path: Функция из HOT_PATHS.
+    :return: Выполненные SQL-запросы с параметрами (для executemany -
+        параметры первой строки), без повторов.
+    """
+    statements: Dict[str, Any] = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        statements.setdefault(statement, parameters)
+
+    sync_connection = connection.sync_connection
+    session = AuditSession(bind=connection)
+    try:
+        sample = await insert_sample(session)
+        event.listen(sync_connection, 'before_cursor_execute', record)
+        try:
+            await hot_path(session, sample)
+        finally:
+            event.remove(sync_connection, 'before_cursor_execute', record)
+    finally:
+        await session.rollback()
+        await session.close()
+        await connection.rollback()
+    return list(statements.items())
+
+
+def explain_query_plan(connection: Connection, statement: str, parameters) -> List[str]:
+    """
+    Выполняет EXPLAIN QUERY PLAN для SQL-запроса.
+    :param connection: Синхронное соединение SQLAlchemy с SQLite.
+    :param statement: Текст запроса в том виде, в каком его получил драйвер.
+    :param parameters: Параметры запроса.
+    :return: Строки плана (поле detail).
+    """
+    result = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)
+    return [row[-1] for row in result]
+
+
+def is_table_scan(detail: str, statement: str) -> bool:
+    """
+    Полный просмотр горячей таблицы или сортировка без индекса.
+    Просмотр индекса (SCAN ... USING INDEX) допустим только в запросе
+    с LIMIT: тогда читается не больше limit записей индекса.
+    :param detail: Строка плана.
+    :param statement: Текст запроса.
+    """
+    words = detail.split()
+    if len(words) > 1 and words[0] == 'SCAN' and words[1] in HOT_TABLES:
+        return 'USING' not in words or ' LIMIT ' not in f' {statement} '
+    return 'USE TEMP B-TREE' in detail
+
+
+async def explain_hot_paths(connection: AsyncConnection) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """
+    Планы всех запросов горячих путей.
+    :param connection: Асинхронное соединение SQLAlchemy с SQLite.
+    :return: Словарь {имя пути: [(запрос, строки плана), ...]}.
+    """
+    plans = {}
+    for name, hot_path in HOT_PATHS.items():
+        plans[name] = [
+            (statement, await connection.run_sync(explain_query_plan, statement, parameters))
+            for statement, parameters in await capture_statements(connection, hot_path)
+        ]
+    return plans
+
+
+async def find_table_scans(connection: AsyncConnection) -> Dict[str, List[str]]:
+    """
+    Проверяет планы всех запросов горячих путей.
+    :param connection: Асинхронное соединение SQLAlchemy с SQLite.
+    :return: Словарь {имя пути: строки плана с полным просмотром}.
+    """
+    scans = {}
+    for name, plans in (await explain_hot_paths(connection)).items():
+        bad = [
+            f'{detail} ({" ".join(statement.split())[:80]})'
+            for statement, details in plans
+            for detail in details
+            if is_table_scan(detail, statement)
+        ]
+        if bad:
+            scans[name] = bad
+    return scans
+
+
+async def audit_query_plans() -> Dict[str, List[str]]:
+    """
+    Планы горячих запросов с полным просмотром таблиц.
+    :return: Словарь: имя горячего пути - строки плана с просмотром.
+    """
+    async with engine.connect() as connection:
+        return await find_table_scans(connection)
+
+
+def main() -> int:
+    """
+    Выводит планы горячих запросов с полным просмотром таблиц.
+    :return: Код возврата: 0 - просмотров нет, 1 - найдены.
+    """
+    scans = asyncio.run(audit_query_plans())
+    for name, details in scans.items():
+        print(f'{name}: {"; ".join(details)}')
+    return 1 if scans else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
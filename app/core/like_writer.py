@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.post import LikeAction, LikeStatus, post_crud, resolve_like_action
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class _QueuedAction(NamedTuple):
+    seq: int
+    action: LikeAction
+    post_id: int
+    user_id: int
+    future: Optional[asyncio.Future]
+
+
+class LikeWriter:
+    """
+    Отложенная запись лайков (write-behind).
+    Операции складываются в очередь, фоновый обработчик собирает их в пачки
+    и применяет каждую пачку одной транзакцией (CRUDPost.apply_like_actions):
+    один commit и один fsync на пачку вместо одного на каждый лайк.
+    Пачка, которую не удалось записать, применяется заново к актуальному
+    состоянию базы (до flush_attempts раз, с паузой retry_delay_ms,
+    растущей с каждой попыткой); операции пачки, не записанной и после
+    этого, отбрасываются и учитываются в dropped_ops.
+    :param session_factory: Фабрика сессий записи.
+    :param durability: commit - submit возвращает статус после фиксации пачки;
+        enqueue - сразу после постановки в очередь, статус вычисляется по базе
+        и еще не записанным операциям.
+    :param flush_interval_ms: Максимальное время накопления пачки.
+    :param flush_max_ops: Максимальный размер пачки.
+    :param queue_size: Максимальная длина очереди; при заполнении submit ждет.
+    :param flush_attempts: Количество попыток записи пачки.
+    :param retry_delay_ms: Пауза перед второй попыткой.
+    """
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            durability: str,
+            flush_interval_ms: int,
+            flush_max_ops: int,
+            queue_size: int,
+            flush_attempts: int = 3,
+            retry_delay_ms: int = 100
+    ):
+        self.session_factory = session_factory
+        self.durability = durability
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_ops = flush_max_ops
+        self.queue_size = queue_size
+        self.flush_attempts = max(flush_attempts, 1)
+        self.retry_delay = retry_delay_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._seq = 0
+        # Последняя еще не записанная операция по паре (пост, пользователь):
+        # номер операции и состояние лайка после нее.
+        self._pending: Dict[Tuple[int, int], Tuple[int, bool]] = {}
+        self.batches = 0
+        self.flushed_ops = 0
+        self.errors = 0
+        self.dropped_ops = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self) -> None:
+        """
+        Запускает обработчик очереди. Вызывается при старте приложения.
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = asyncio.create_task(self._run_worker())
+
+    async def close(self) -> None:
+        """
+        Дожидается записи всех операций из очереди и останавливает обработчик.
+        Вызывается при остановке приложения.
+        """
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    async def submit(
+            self,
+            action: LikeAction,
+            post_id: int,
+            user_id: int,
+            session: AsyncSession
+    ) -> LikeStatus:
+        """
+        Поставить операцию с лайком в очередь.
+        :param action: Операция (LikeAction).
+        :param post_id: Идентификатор поста.
+        :param user_id: Идентификатор пользователя.
+        :param session: Сессия для проверки операции в режиме enqueue.
+        :return: Статус операции (LikeStatus).
+        """
+        self._seq += 1
+        seq = self._seq
+        if self.durability == 'commit':
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put(_QueuedAction(seq, action, post_id, user_id, future))
+            return await future
+        owner_id, liked = await post_crud.get_like_state(post_id, user_id, session)
+        key = (post_id, user_id)
+        if key in self._pending:
+            liked = self._pending[key][1]
+        like_status, liked = resolve_like_action(action, user_id, owner_id, liked)
+        if like_status in (LikeStatus.CREATED, LikeStatus.REMOVED):
+            self._pending[key] = (seq, liked)
+            await self._queue.put(_QueuedAction(seq, action, post_id, user_id, None))
+        return like_status
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Состояние очереди: глубина, незаписанные пары, пачки, ошибки записи
+        (неудачные попытки) и отброшенные после всех попыток операции.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'pending_pairs': len(self._pending),
+            'batches': self.batches,
+            'flushed_ops': self.flushed_ops,
+            'errors': self.errors,
+            'dropped_ops': self.dropped_ops,
+            'last_batch_size': self.last_batch_size,
+            'last_flush_ms': self.last_flush_ms,
+        }
+
+    async def _run_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.flush_max_ops:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[_QueuedAction]) -> None:
+        started = time.perf_counter()
+        actions = [(item.action, item.post_id, item.user_id) for item in batch]
+        try:
+            statuses = await self._apply_with_retries(actions)
+        except Exception as error:
+            self.dropped_ops += len(batch)
+            logger.exception(
+                'Пачка лайков (%d операций) не записана за %d попыток и отброшена',
+                len(batch), self.flush_attempts
+            )
+            for item in batch:
+                if item.future is not None and not item.future.done():
+                    item.future.set_exception(error)
+        else:
+            for item, like_status in zip(batch, statuses):
+                if item.future is not None and not item.future.done():
+                    item.future.set_result(like_status)
+        finally:
+            for item in batch:
+                key = (item.post_id, item.user_id)
+                pending = self._pending.get(key)
+                if pending is not None and pending[0] <= item.seq:
+                    del self._pending[key]
+        self.batches += 1
+        self.flushed_ops += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    async def _apply_with_retries(
+            self,
+            actions: List[Tuple[LikeAction, int, int]]
+    ) -> List[LikeStatus]:
+        # Повтор безопасен: apply_like_actions записывает итоговое состояние
+        # пар относительно текущего состояния базы.
+        for attempt in range(1, self.flush_attempts + 1):
+            try:
+                async with self.session_factory() as session:
+                    return await post_crud.apply_like_actions(actions, session)
+            except Exception:
+                self.errors += 1
+                if attempt == self.flush_attempts:
+                    raise
+                logger.warning(
+                    'Ошибка записи пачки лайков (%d операций), попытка %d из %d',
+                    len(actions), attempt, self.flush_attempts, exc_info=True
+                )
+                await asyncio.sleep(self.retry_delay * attempt)
+
+
+like_writer = LikeWriter(
+    session_factory=AsyncSessionLocal,
+    durability=settings.like_durability,
+    flush_interval_ms=settings.like_flush_interval_ms,
+    flush_max_ops=settings.like_flush_max_ops,
+    queue_size=settings.like_queue_size,
+    flush_attempts=settings.like_flush_attempts
+)
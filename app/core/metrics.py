@@ -0,0 +1,298 @@
+"""
+Метрики приложения в текстовом формате Prometheus (GET /metrics).
+Счетчики хранятся в словарях {значения меток: число}, гистограммы - в
+списках фиксированной длины; запись значения не создает новых объектов,
+кроме первой записи для нового набора меток.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Границы корзин гистограмм длительности в секундах.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+DB_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """
+    Базовый класс метрики с метками.
+    :param name: Имя метрики.
+    :param documentation: Описание для строки # HELP.
+    :param labelnames: Имена меток.
+    """
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик.
+    """
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(
+                f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}'
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """
+    Значение, которое может как расти, так и уменьшаться.
+    """
+    type_name = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин.
+    Для каждого набора меток хранится список: количества по корзинам
+    (последняя - +Inf), сумма и общее количество наблюдений.
+    """
+    type_name = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_number(bound)
+                label_str = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{label_str} {_format_number(cumulative)}')
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_str} {_format_number(series[-2])}')
+            lines.append(f'{self.name}_count{label_str} {_format_number(series[-1])}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик и функций, снимающих значения в момент запроса /metrics.
+    """
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(
+            self,
+            prefix: str,
+            documentation: str,
+            collect: Callable[[], Dict[str, float]]
+    ) -> None:
+        """
+        Добавить функцию, значения которой экспортируются как gauge
+        с именами {prefix}_{ключ}.
+        :param prefix: Префикс имен метрик.
+        :param documentation: Описание для строк # HELP.
+        :param collect: Функция без аргументов, возвращающая словарь значений.
+        """
+        self._collectors.append((prefix, documentation, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, documentation, collect in self._collectors:
+            for key, value in collect().items():
+                name = f'{prefix}_{key}'
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    'http_requests_total', 'Количество HTTP-запросов.', ('method', 'route', 'status')
+))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    'http_request_duration_seconds', 'Время обработки HTTP-запроса.', ('method', 'route')
+))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    'http_requests_in_flight', 'Количество обрабатываемых HTTP-запросов.'
+))
+DB_STATEMENTS_PER_REQUEST = registry.register(Histogram(
+    'db_statements_per_request', 'Количество SQL-запросов на HTTP-запрос.',
+    ('route',), COUNT_BUCKETS
+))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    'db_request_duration_seconds', 'Суммарное время SQL-запросов на HTTP-запрос.',
+    ('route',), DB_LATENCY_BUCKETS
+))
+DB_STATEMENT_DURATION = registry.register(Histogram(
+    'db_statement_duration_seconds', 'Время выполнения SQL-запроса.',
+    ('engine',), DB_LATENCY_BUCKETS
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    'db_pool_checkout_wait_seconds', 'Ожидание соединения из пула.',
+    ('engine',), DB_LATENCY_BUCKETS
+))
+EMAIL_VERIFICATION_DURATION = registry.register(Histogram(
+    'email_verification_duration_seconds', 'Время запроса к сервису проверки email.',
+    ('outcome',)
+))
+EMAIL_VERIFICATION_RESULTS = registry.register(Counter(
+    'email_verification_results_total', 'Результаты проверки email.', ('result',)
+))
+USERS_REGISTERED = registry.register(Counter(
+    'users_registered_total', 'Количество зарегистрированных пользователей.'
+))
+
+# Счетчики SQL текущего HTTP-запроса: [количество, суммарное время].
+_request_db_stats: ContextVar[Optional[List[float]]] = ContextVar(
+    'request_db_stats', default=None
+)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """
+    Подписывается на события движка: время каждого SQL-запроса и
+    счетчики SQL текущего HTTP-запроса.
+    :param engine: Асинхронный движок SQLAlchemy.
+    :param name: Значение метки engine (write, read).
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_start'] = time.perf_counter()
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop('query_start', time.perf_counter())
+        DB_STATEMENT_DURATION.observe(elapsed, name)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: длительность, статус и количество одновременных
+    HTTP-запросов, а также число и время SQL-запросов на каждый запрос.
+    Маршрут берется из шаблона пути (/Post{post_id}), а не из фактического
+    URL, чтобы количество наборов меток было ограничено.
+    :param app: ASGI-приложение.
+    """
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status = ['500']
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_db_stats.reset(token)
+            route = self._route_path(scope)
+            method = scope['method']
+            HTTP_REQUESTS.inc(method, route, status[0])
+            HTTP_REQUEST_DURATION.observe(elapsed, method, route)
+            DB_STATEMENTS_PER_REQUEST.observe(db_stats[0], route)
+            DB_TIME_PER_REQUEST.observe(db_stats[1], route)
+
+    def _route_path(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            path = 'unmatched'
+            for route in scope['app'].routes:
+                if getattr(route, 'endpoint', None) is endpoint:
+                    path = route.path
+                    break
+            self._route_paths[endpoint] = path
+        return path
@@ -0,0 +1,137 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from fastapi_users.password import PasswordHelper
+from passlib.context import CryptContext
+
+# Контекст passlib в процессе пула (режим process).
+_worker_context: Optional[CryptContext] = None
+
+
+def make_crypt_context(rounds: int) -> CryptContext:
+    """
+    Контекст bcrypt с заданной стоимостью. Хэши с другим числом раундов
+    считаются устаревшими: verify_and_update возвращает для них новый хэш.
+    :param rounds: Стоимость bcrypt (логарифм числа раундов).
+    """
+    return CryptContext(schemes=['bcrypt'], deprecated='auto', bcrypt__rounds=rounds)
+
+
+def _init_worker(rounds: int) -> None:
+    global _worker_context
+    _worker_context = make_crypt_context(rounds)
+
+
+def _hash_in_worker(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_and_update_in_worker(
+        plain_password: str,
+        hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return _worker_context.verify_and_update(plain_password, hashed_password)
+
+
+class PooledPasswordHelper(PasswordHelper):
+    """
+    Хэширование и проверка паролей в ограниченном пуле потоков или процессов.
+    bcrypt занимает процессор на сотни миллисекунд; в цикле событий это
+    останавливает обработку всех остальных запросов. Синхронные методы
+    PasswordHelper сохранены для кода вне цикла событий (например, сидера).
+    :param rounds: Стоимость bcrypt (логарифм числа раундов).
+    :param workers: Размер пула.
+    :param executor: thread - пул потоков (bcrypt отпускает GIL),
+        process - пул процессов.
+    """
+    def __init__(self, rounds: int, workers: int, executor: str = 'thread'):
+        super().__init__(make_crypt_context(rounds))
+        self.rounds = rounds
+        self.workers = workers
+        self.executor_type = executor
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.completed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.rounds,)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hash'
+                )
+        return self._executor
+
+    async def _run(self, thread_func, process_func, *args):
+        if self.executor_type == 'process':
+            func = process_func
+        else:
+            func = thread_func
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash_async(self, password: str) -> str:
+        """
+        Хэш пароля, вычисленный в пуле.
+        :param password: Пароль.
+        :return: Хэш bcrypt.
+        """
+        return await self._run(self.context.hash, _hash_in_worker, password)
+
+    async def verify_and_update_async(
+            self,
+            plain_password: str,
+            hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Проверка пароля в пуле.
+        :param plain_password: Введенный пароль.
+        :param hashed_password: Сохраненный хэш.
+        :return: Совпадает ли пароль и новый хэш, если сохраненный
+            вычислен с другими параметрами (иначе None).
+        """
+        return await self._run(
+            self.context.verify_and_update,
+            _verify_and_update_in_worker,
+            plain_password,
+            hashed_password
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Состояние пула: размер, операции в работе и выполненные.
+        """
+        return {
+            'workers': self.workers,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+        }
+
+    def close(self) -> None:
+        """
+        Останавливает пул. Вызывается при остановке приложения.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_helper = PooledPasswordHelper(
+    rounds=settings.password_hash_rounds,
+    workers=settings.password_hash_workers,
+    executor=settings.password_hash_executor
+)
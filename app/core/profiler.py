@@ -0,0 +1,258 @@
+"""
+Профилировщик SQL-запросов HTTP-запроса.
+ProfilerMiddleware (DEBUG_PROFILER_ENABLED=true) записывает каждый SQL-запрос:
+текст, время и типы параметров (сами значения не сохраняются), находит
+повторы одного и того же запроса (признак N+1), добавляет сводку в заголовки
+ответа и хранит последние профили для GET /debug/requests/{id}.
+В тестах профиль снимается контекстным менеджером query_budget.
+"""
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Запрос выполнил больше SQL-запросов, чем разрешено бюджетом.
+    """
+
+
+class StatementRecord:
+    """
+    Один выполненный SQL-запрос.
+    """
+    __slots__ = ('statement', 'param_types', 'params_key', 'duration', 'executemany')
+
+    def __init__(self, statement, param_types, params_key, duration, executemany):
+        self.statement = statement
+        self.param_types = param_types
+        self.params_key = params_key
+        self.duration = duration
+        self.executemany = executemany
+
+    def to_dict(self) -> dict:
+        return {
+            'statement': self.statement,
+            'params': self.param_types,
+            'duration_ms': round(self.duration * 1000, 3),
+            'executemany': self.executemany,
+        }
+
+
+class RequestProfile:
+    """
+    SQL-запросы одного HTTP-запроса (или блока кода в тесте).
+    :param request_id: Идентификатор профиля.
+    :param method: HTTP-метод.
+    :param path: Путь запроса.
+    :param parent: Объемлющий профиль, которому передаются запросы
+        после завершения этого (например, профиль теста).
+    """
+    def __init__(
+            self,
+            request_id: str,
+            method: str = '',
+            path: str = '',
+            parent: Optional['RequestProfile'] = None
+    ):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.parent = parent
+        self.statements: List[StatementRecord] = []
+        self.status: Optional[int] = None
+        self.duration = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def db_duration(self) -> float:
+        return sum(record.duration for record in self.statements)
+
+    def duplicates(self) -> List[dict]:
+        """
+        Повторяющиеся запросы: одинаковый текст SQL выполнен больше одного раза.
+        same_params - сколько из повторов выполнены еще и с теми же параметрами.
+        """
+        groups: Dict[str, List[StatementRecord]] = OrderedDict()
+        for record in self.statements:
+            groups.setdefault(record.statement, []).append(record)
+        result = []
+        for statement, records in groups.items():
+            if len(records) < 2:
+                continue
+            distinct_params = {record.params_key for record in records}
+            result.append({
+                'statement': statement,
+                'count': len(records),
+                'same_params': len(records) - len(distinct_params),
+            })
+        return result
+
+    def summary(self) -> dict:
+        return {
+            'id': self.request_id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 3),
+            'query_count': self.count,
+            'query_duration_ms': round(self.db_duration * 1000, 3),
+            'duplicates': len(self.duplicates()),
+        }
+
+    def to_dict(self) -> dict:
+        data = self.summary()
+        data['statements'] = [record.to_dict() for record in self.statements]
+        data['duplicate_statements'] = self.duplicates()
+        return data
+
+    def finish(self) -> None:
+        if self.parent is not None:
+            self.parent.statements.extend(self.statements)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    'current_profile', default=None
+)
+
+
+def _param_types(parameters, executemany: bool) -> list:
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    if isinstance(parameters, dict):
+        return [type(value).__name__ for value in parameters.values()]
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def instrument_engine(engine) -> None:
+    """
+    Подписывается на события движка; запросы записываются, только
+    если в текущем контексте открыт профиль.
+    :param engine: Асинхронный движок SQLAlchemy.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info['profile_start'] = time.perf_counter()
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        started = conn.info.pop('profile_start', None)
+        if profile is None or started is None:
+            return
+        profile.statements.append(StatementRecord(
+            statement=statement,
+            param_types=_param_types(parameters, executemany),
+            params_key=hash(repr(parameters)),
+            duration=time.perf_counter() - started,
+            executemany=executemany
+        ))
+
+
+class ProfileStore:
+    """
+    Последние профили запросов (LRU по времени записи).
+    :param max_size: Сколько профилей хранить.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._profiles: 'OrderedDict[str, RequestProfile]' = OrderedDict()
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles[profile.request_id] = profile
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(request_id)
+
+    def recent(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles.values()))
+
+
+class ProfilerMiddleware:
+    """
+    ASGI-middleware профилировщика: открывает профиль на каждый HTTP-запрос,
+    добавляет в ответ заголовки X-Request-Id, X-Query-Count,
+    X-Query-Duration-Ms и X-Query-Duplicates и сохраняет профиль в store.
+    :param app: ASGI-приложение.
+    :param store: Хранилище профилей.
+    """
+    def __init__(self, app, store: ProfileStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(
+            uuid.uuid4().hex[:16],
+            scope['method'],
+            scope['path'],
+            parent=_current_profile.get()
+        )
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                profile.status = message['status']
+                headers = list(message.get('headers', []))
+                headers.extend([
+                    (b'x-request-id', profile.request_id.encode()),
+                    (b'x-query-count', str(profile.count).encode()),
+                    (b'x-query-duration-ms', f'{profile.db_duration * 1000:.3f}'.encode()),
+                    (b'x-query-duplicates', str(len(profile.duplicates())).encode()),
+                ])
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.duration = time.perf_counter() - started
+            _current_profile.reset(token)
+            profile.finish()
+            self.store.add(profile)
+
+
+profile_store = ProfileStore(settings.debug_profiler_history)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[RequestProfile]:
+    """
+    Проверка бюджета SQL-запросов блока кода, например вызова эндпоинта
+    в тесте через ASGI-клиент (бюджеты эндпоинтов - в tests/conftest.py):
+
+        with query_budget(4):
+            await client.request('POST', '/Post1/like', headers=auth)
+
+    :param max_queries: Максимально допустимое количество SQL-запросов.
+    :raises QueryBudgetExceeded: Если бюджет превышен.
+    :return: Профиль выполненных запросов.
+    """
+    profile = RequestProfile(uuid.uuid4().hex[:16])
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+    if profile.count > max_queries:
+        statements = '\n'.join(record.statement for record in profile.statements)
+        raise QueryBudgetExceeded(
+            f'Выполнено {profile.count} SQL-запросов при бюджете {max_queries}:\n{statements}'
+        )
@@ -0,0 +1,300 @@
+import math
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Callable, Dict, NamedTuple, Optional
+
+from app.api.constants import RATE_LIMIT_EXCEEDED
+from app.core.config import settings
+from app.core.user import current_user
+from app.models import User
+from app.schemas.post import PostBulkCreate, PostLikeBulkCreate
+from fastapi import Depends, HTTPException, Request, Response
+
+RATE_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class Rate(NamedTuple):
+    """
+    Лимит: не больше limit запросов за period секунд.
+    """
+    limit: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.limit
+
+
+class RateLimitResult(NamedTuple):
+    """
+    Результат проверки лимита.
+    :param allowed: Запрос пропущен.
+    :param limit: Размер лимита.
+    :param remaining: Сколько запросов еще можно выполнить сразу.
+    :param reset_after: Через сколько секунд лимит восстановится полностью.
+    :param retry_after: Через сколько секунд можно повторить отклоненный запрос.
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+def parse_rate(value: str) -> Rate:
+    """
+    Разбор лимита из настроек в формате "количество/период".
+    :param value: Например, 30/minute; период - second, minute, hour или day.
+    :return: Объект Rate.
+    """
+    try:
+        limit, period = value.split('/')
+        rate = Rate(int(limit), RATE_PERIODS[period.strip()])
+    except (ValueError, KeyError):
+        raise ValueError(f'Некорректный лимит {value!r}, ожидается, например, 30/minute')
+    if rate.limit <= 0:
+        raise ValueError(f'Некорректный лимит {value!r}')
+    return rate
+
+
+def gcra_result(allowed: bool, tat: float, now: float, rate: Rate, cost: int) -> RateLimitResult:
+    """
+    Значения заголовков по теоретическому времени прихода (TAT) ключа.
+    :param allowed: Запрос пропущен.
+    :param tat: TAT после проверки.
+    :param now: Текущее время.
+    :param rate: Лимит.
+    :param cost: Стоимость запроса.
+    """
+    # Допуск на погрешность float: иначе 3.9999... округлится вниз до 3.
+    remaining = max(0, math.floor((now + rate.period - tat) / rate.interval + 1e-9))
+    retry_after = 0.0
+    if not allowed:
+        retry_after = tat + rate.interval * cost - rate.period - now
+    return RateLimitResult(allowed, rate.limit, remaining, max(0.0, tat - now), retry_after)
+
+
+class MemoryRateLimitBackend:
+    """
+    Хранилище лимитов в памяти процесса.
+    Token bucket в форме GCRA: на ключ хранится одно число - теоретическое
+    время прихода следующего запроса (TAT), без списка меток запросов.
+    Ключи вытесняются по LRU; вытесненный ключ начинает с полного лимита,
+    поэтому max_keys должен покрывать все активные ключи.
+    :param max_keys: Максимальное количество ключей.
+    """
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: 'OrderedDict[str, float]' = OrderedDict()
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        tat = max(self._tats.get(key, now), now)
+        new_tat = tat + rate.interval * cost
+        if new_tat - rate.period > now:
+            return gcra_result(False, tat, now, rate, cost)
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return gcra_result(True, new_tat, now, rate, cost)
+
+    def size(self) -> int:
+        return len(self._tats)
+
+
+# Тот же алгоритм GCRA атомарно на стороне Redis. Числа возвращаются
+# строками: Redis обрезает дробные числа Lua до целых.
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval * cost
+if new_tat - period > now then
+    return {0, tostring(tat)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat)}
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Хранилище лимитов в Redis: лимит общий для всех воркеров.
+    Ключ живет до восстановления лимита (PX), отдельная очистка не нужна.
+    :param client: Асинхронный клиент Redis с методом eval,
+        например redis.asyncio.Redis.
+    :param prefix: Префикс ключей.
+    """
+    def __init__(self, client, prefix: str = 'rate_limit:'):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, rate: Rate, cost: int = 1) -> RateLimitResult:
+        now = time.time()
+        allowed, tat = await self.client.eval(
+            GCRA_SCRIPT, 1, self.prefix + key, now, rate.interval, rate.period, cost
+        )
+        return gcra_result(bool(allowed), float(tat), now, rate, cost)
+
+    def size(self) -> int:
+        return 0
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов по ключам (пользователь, IP-адрес).
+    Хранилище подключаемое: любой объект с методами hit(key, rate, cost)
+    и size() (MemoryRateLimitBackend, RedisRateLimitBackend).
+    :param backend: Хранилище или None, если ограничение отключено.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def check(self, key: str, rate: Rate, response: Response, cost: int = 1) -> None:
+        """
+        Учесть запрос и добавить заголовки RateLimit-* к ответу.
+        :param key: Ключ лимита.
+        :param rate: Лимит.
+        :param response: Ответ эндпоинта.
+        :param cost: Стоимость запроса.
+        :raise HTTPException: 429, если лимит исчерпан.
+        """
+        result = await self.backend.hit(key, rate, cost)
+        headers = {
+            'RateLimit-Limit': str(result.limit),
+            'RateLimit-Remaining': str(result.remaining),
+            'RateLimit-Reset': str(math.ceil(result.reset_after)),
+        }
+        if not result.allowed:
+            self.limited += 1
+            headers['Retry-After'] = str(math.ceil(result.retry_after))
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail=RATE_LIMIT_EXCEEDED,
+                headers=headers
+            )
+        self.allowed += 1
+        response.headers.update(headers)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Метрики: пропущенные и отклоненные запросы, ключи в памяти.
+        """
+        return {
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'keys': self.backend.size() if self.enabled else 0,
+        }
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP-адрес клиента. Первый адрес X-Forwarded-For используется, только
+    если включен rate_limit_trust_forwarded_for (приложение за прокси).
+    :param request: Текущий запрос.
+    """
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get('x-forwarded-for')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.client.host if request.client else 'unknown'
+
+
+def single_request_cost() -> int:
+    """
+    Стоимость обычного запроса.
+    """
+    return 1
+
+
+def bulk_posts_cost(posts: PostBulkCreate) -> int:
+    """
+    Стоимость массового создания постов - количество постов.
+    Имя параметра совпадает с телом эндпоинта: FastAPI разбирает тело один раз.
+    """
+    return len(posts.items)
+
+
+def bulk_likes_cost(likes: PostLikeBulkCreate) -> int:
+    """
+    Стоимость массовой постановки лайков - количество постов.
+    """
+    return len(likes.post_ids)
+
+
+def user_rate_limit(scope: str, value: str, cost: Optional[Callable] = None) -> Callable:
+    """
+    Зависимость, ограничивающая запросы текущего пользователя.
+    Bulk-запрос расходует лимит как cost одиночных запросов; запрос
+    дороже всего лимита отклоняется всегда и должен быть разбит на части.
+    :param scope: Имя группы эндпоинтов с общим лимитом.
+    :param value: Лимит в формате "количество/период".
+    :param cost: Зависимость, возвращающая стоимость запроса (по умолчанию 1).
+    """
+    rate = parse_rate(value)
+
+    async def limit_user(
+            response: Response,
+            user: User = Depends(current_user),
+            request_cost: int = Depends(cost or single_request_cost)
+    ) -> None:
+        if rate_limiter.enabled:
+            await rate_limiter.check(f'{scope}:user:{user.id}', rate, response, request_cost)
+
+    return limit_user
+
+
+def ip_rate_limit(scope: str, value: str) -> Callable:
+    """
+    Зависимость, ограничивающая запросы с одного IP-адреса
+    (для эндпоинтов без аутентификации).
+    :param scope: Имя группы эндпоинтов с общим лимитом.
+    :param value: Лимит в формате "количество/период".
+    """
+    rate = parse_rate(value)
+
+    async def limit_ip(request: Request, response: Response) -> None:
+        if rate_limiter.enabled:
+            await rate_limiter.check(f'{scope}:ip:{client_ip(request)}', rate, response)
+
+    return limit_ip
+
+
+def build_rate_limiter() -> RateLimiter:
+    """
+    Создает ограничитель по настройкам приложения.
+    Для backend=redis требуется установленный пакет redis.
+    """
+    if not settings.rate_limit_enabled:
+        return RateLimiter(None)
+    if settings.rate_limit_backend == 'redis':
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError('Для RATE_LIMIT_BACKEND=redis установите пакет redis')
+        client = aioredis.from_url(settings.rate_limit_redis_url)
+        return RateLimiter(RedisRateLimitBackend(client))
+    return RateLimiter(MemoryRateLimitBackend(settings.rate_limit_max_keys))
+
+
+rate_limiter = build_rate_limiter()
+
+limit_post_writes = user_rate_limit('posts', settings.rate_limit_posts)
+limit_bulk_post_writes = user_rate_limit('posts', settings.rate_limit_posts, bulk_posts_cost)
+limit_like_writes = user_rate_limit('likes', settings.rate_limit_likes)
+limit_bulk_like_writes = user_rate_limit('likes', settings.rate_limit_likes, bulk_likes_cost)
+limit_follow_writes = user_rate_limit('follows', settings.rate_limit_follows)
+limit_auth = ip_rate_limit('auth', settings.rate_limit_auth)
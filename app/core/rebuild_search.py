@@ -0,0 +1,25 @@
+"""
+Перестроение полнотекстового индекса постов post_fts.
+Нужно после массовой загрузки постов в обход триггеров
+или при подозрении на рассинхронизацию индекса.
+Запуск: python -m app.core.rebuild_search
+"""
+import asyncio
+import contextlib
+
+from app.core.db import get_async_session
+from app.crud.post import post_crud
+
+get_async_session_context = contextlib.asynccontextmanager(get_async_session)
+
+
+async def rebuild_search() -> None:
+    """
+    Перестраивает индекс post_fts по всем постам.
+    """
+    async with get_async_session_context() as session:
+        await post_crud.rebuild_search_index(session)
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_search())
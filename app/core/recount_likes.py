@@ -0,0 +1,26 @@
+"""
+Пересчет денормализованных счетчиков лайков по таблице postlike.
+Запуск: python -m app.core.recount_likes
+"""
+import asyncio
+import contextlib
+
+from app.core.db import get_async_session
+from app.core.response_cache import post_response_cache
+from app.crud.post import post_crud
+
+get_async_session_context = contextlib.asynccontextmanager(get_async_session)
+
+
+async def recount_likes() -> None:
+    """
+    Пересчитывает Post.like_count и User.likes_given для всех записей
+    и сбрасывает кэш ответов (общий только с хранилищем redis).
+    """
+    async with get_async_session_context() as session:
+        await post_crud.recount_like_counters(session)
+    await post_response_cache.invalidate_all()
+
+
+if __name__ == '__main__':
+    asyncio.run(recount_likes())
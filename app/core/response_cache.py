@@ -0,0 +1,211 @@
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from fastapi import Request, Response
+
+
+class MemoryCacheBackend:
+    """
+    Хранилище кэша ответов в памяти процесса: LRU с TTL.
+    Версии (счетчики) хранятся отдельно и не вытесняются, иначе после
+    вытеснения версия совпала бы с уже выданным клиенту ETag.
+    Версии видны только своему процессу: изменения, сделанные другими
+    воркерами или CLI, не сбрасывают кэш до истечения TTL. Подходит
+    только для запуска в один воркер.
+    :param max_size: Максимальное количество закэшированных ответов.
+    :param ttl_seconds: Время жизни ответа в кэше.
+    """
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_counters(self, *keys: str) -> List[int]:
+        return [self._counters.get(key, 0) for key in keys]
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+
+class RedisCacheBackend:
+    """
+    Хранилище кэша ответов в Redis (или совместимой заглушке).
+    Подходит любой асинхронный клиент с методами get/mget/set(ex=)/incr,
+    например redis.asyncio.Redis; версии общие для всех воркеров и CLI.
+    :param client: Асинхронный клиент Redis.
+    :param ttl_seconds: Время жизни ответа в кэше.
+    :param prefix: Префикс ключей.
+    """
+    def __init__(self, client, ttl_seconds: int, prefix: str = 'response_cache:'):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.prefix + key, value, ex=self.ttl_seconds)
+
+    async def get_counters(self, *keys: str) -> List[int]:
+        values = await self.client.mget([self.prefix + key for key in keys])
+        return [int(value or 0) for value in values]
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(self.prefix + key)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match на совпадение с ETag.
+    :param if_none_match: Значение заголовка If-None-Match.
+    :param etag: Текущий ETag ресурса или '*' (любой существующий ресурс).
+    """
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(',')]
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов с ETag на основе версий ресурсов.
+    Версия поста и версия ленты увеличиваются при каждом изменении,
+    поэтому ETag можно вычислить без обращения к базе данных. Общая
+    версия сбрасывает все ответы (после массовых изменений из CLI).
+    ETag включает номер окна длиной в TTL хранилища: изменение, не
+    увеличившее версию, перестает отдаваться из кэша и через 304
+    не позже чем через TTL.
+    :param backend: Хранилище (MemoryCacheBackend, RedisCacheBackend) или None,
+        если кэш отключен.
+    :param epoch: Метка, отличающая ETag разных экземпляров хранилища.
+    """
+    def __init__(self, backend, epoch: str = ''):
+        self.backend = backend
+        self.epoch = epoch
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def post_etag(self, post_id: int) -> Optional[str]:
+        """
+        Сильный ETag поста: идентификатор и версия обновления.
+        """
+        if not self.enabled:
+            return None
+        generation, version = await self.backend.get_counters('all', f'post:{post_id}')
+        return f'"{self.epoch}post-{post_id}-{generation}.{version}.{self._window()}"'
+
+    async def feed_etag(self, *variant) -> Optional[str]:
+        """
+        Сильный ETag страницы ленты: версия ленты и параметры запроса.
+        """
+        if not self.enabled:
+            return None
+        generation, version = await self.backend.get_counters('all', 'feed')
+        digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:16]
+        return f'"{self.epoch}feed-{generation}.{version}.{self._window()}-{digest}"'
+
+    def _window(self) -> int:
+        return int(time.time() // max(self.backend.ttl_seconds, 1))
+
+    async def invalidate_post(self, post_id: int) -> None:
+        """
+        Сбрасывает закэшированные ответы поста и ленты.
+        """
+        if self.enabled:
+            await self.backend.incr(f'post:{post_id}')
+            await self.backend.incr('feed')
+
+    async def invalidate_feed(self) -> None:
+        """
+        Сбрасывает закэшированные страницы ленты.
+        """
+        if self.enabled:
+            await self.backend.incr('feed')
+
+    async def invalidate_all(self) -> None:
+        """
+        Сбрасывает все закэшированные ответы.
+        """
+        if self.enabled:
+            await self.backend.incr('all')
+
+    async def respond(
+            self,
+            request: Request,
+            etag: Optional[str],
+            build: Callable[[], Awaitable[bytes]]
+    ) -> Response:
+        """
+        Ответ с учетом кэша: 304 при совпадении If-None-Match,
+        закэшированное тело или новое тело, построенное build.
+        If-None-Match: * совпадает только с существующим ресурсом, поэтому
+        проверяется после получения тела: если ресурса нет, build
+        выбрасывает исключение (например, 404).
+        ETag нужно вычислять до чтения данных: тогда данные, прочитанные
+        одновременно с изменением, попадут под уже устаревший ETag.
+        :param request: Текущий запрос.
+        :param etag: ETag ресурса или None, если кэш отключен.
+        :param build: Корутина, возвращающая сериализованное тело ответа.
+        """
+        if etag is None:
+            return Response(await build(), media_type='application/json')
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.headers.get('if-none-match')
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        body = await self.backend.get(etag)
+        if body is None:
+            body = await build()
+            await self.backend.set(etag, body)
+        if etag_matches(if_none_match, '*'):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type='application/json', headers=headers)
+
+
+def build_response_cache() -> ResponseCache:
+    """
+    Создает кэш ответов по настройкам приложения.
+    Для backend=redis требуется установленный пакет redis.
+    """
+    if not settings.response_cache_enabled:
+        return ResponseCache(None)
+    if settings.response_cache_backend == 'redis':
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:
+            raise RuntimeError('Для RESPONSE_CACHE_BACKEND=redis установите пакет redis')
+        client = aioredis.from_url(settings.response_cache_redis_url)
+        return ResponseCache(RedisCacheBackend(client, settings.response_cache_ttl))
+    backend = MemoryCacheBackend(
+        max_size=settings.response_cache_max_size,
+        ttl_seconds=settings.response_cache_ttl
+    )
+    return ResponseCache(backend, epoch=secrets.token_hex(4) + '-')
+
+
+post_response_cache = build_response_cache()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models import RevokedToken
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationStore:
+    """
+    Хранилище отозванных токенов: таблица revokedtoken и ее копия в памяти.
+    Проверка is_revoked - поиск в словаре, без запросов к базе. Копия
+    загружается при старте и каждые sync_interval_seconds дополняется
+    записями, которые добавили другие процессы (id > последнего
+    прочитанного; id не переиспользуются благодаря AUTOINCREMENT). Раз
+    в cleanup_interval_seconds та же задача удаляет истекшие записи.
+    Уникальный индекс по jti делает отзыв атомарным между процессами:
+    повторно отозвать (например, дважды обменять refresh-токен) нельзя.
+    :param session_factory: Фабрика сессий записи.
+    :param sync_interval_seconds: Период подгрузки новых записей.
+    :param cleanup_interval_seconds: Период очистки истекших записей.
+    """
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            sync_interval_seconds: float,
+            cleanup_interval_seconds: float
+    ):
+        self.session_factory = session_factory
+        self.sync_interval = sync_interval_seconds
+        self.cleanup_interval = cleanup_interval_seconds
+        # jti -> время истечения токена (unix time).
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._worker: Optional[asyncio.Task] = None
+        self.revoked = 0
+        self.purged = 0
+        self.errors = 0
+
+    async def start(self) -> None:
+        """
+        Загружает отозванные токены и запускает фоновую очистку.
+        Вызывается при старте приложения.
+        """
+        if self._worker is None:
+            await self.sync()
+            self._worker = asyncio.create_task(self._run_worker())
+
+    async def close(self) -> None:
+        """
+        Останавливает фоновую очистку. Вызывается при остановке приложения.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Отозван ли токен. Токены без jti отозвать нельзя.
+        :param jti: Идентификатор токена (claim jti).
+        """
+        return jti is not None and jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Отозвать токен до его истечения.
+        :param jti: Идентификатор токена (claim jti).
+        :param expires_at: Время истечения токена (claim exp).
+        :return: False, если токен уже был отозван.
+        """
+        if jti in self._revoked:
+            return False
+        self._revoked[jti] = expires_at
+        try:
+            async with self.session_factory() as session:
+                session.add(RevokedToken(jti=jti, expires_at=_to_datetime(expires_at)))
+                await session.commit()
+        except IntegrityError:
+            return False
+        except Exception:
+            del self._revoked[jti]
+            raise
+        self.revoked += 1
+        return True
+
+    async def sync(self) -> None:
+        """
+        Добавляет в память записи, созданные после предыдущей синхронизации.
+        """
+        now = time.time()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                .where(RevokedToken.id > self._last_id)
+                .order_by(RevokedToken.id)
+            )
+            for row_id, jti, expires_at in result:
+                self._last_id = row_id
+                expires_at = _to_timestamp(expires_at)
+                if expires_at > now:
+                    self._revoked[jti] = expires_at
+
+    async def purge_expired(self) -> int:
+        """
+        Удаляет истекшие записи из базы и из памяти.
+        :return: Количество удаленных из базы записей.
+        """
+        now = time.time()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= _to_datetime(now))
+            )
+            await session.commit()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+        self.purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Состояние хранилища: токены в памяти, отозванные и удаленные.
+        """
+        return {
+            'size': len(self._revoked),
+            'revoked': self.revoked,
+            'purged': self.purged,
+            'errors': self.errors,
+        }
+
+    async def _run_worker(self) -> None:
+        next_purge = time.monotonic() + self.cleanup_interval
+        while True:
+            await asyncio.sleep(min(self.sync_interval, self.cleanup_interval))
+            try:
+                await self.sync()
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + self.cleanup_interval
+                    await self.purge_expired()
+            except Exception:
+                self.errors += 1
+                logger.exception('Ошибка синхронизации и очистки отозванных токенов')
+
+
+revocation_store = RevocationStore(
+    session_factory=AsyncSessionLocal,
+    sync_interval_seconds=settings.token_revocation_sync_seconds,
+    cleanup_interval_seconds=settings.token_revocation_cleanup_seconds
+)
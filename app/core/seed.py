@@ -0,0 +1,344 @@
+"""
+Массовое наполнение базы синтетическими пользователями, постами и лайками.
+В отличие от app/core/init_db.py строки вставляются напрямую через
+Core insert() пачками (executemany) в больших транзакциях: пароль
+хэшируется один раз на всех пользователей (с текущим
+password_hash_rounds), email не проверяется.
+Запрос insert() компилируется один раз, а строки передаются драйверу
+кортежами в уже готовом для SQLite виде, без обработки параметров
+SQLAlchemy на каждую строку.
+Счетчики лайков постов вычисляются при генерации, счетчики пользователей -
+одним UPDATE по вставленному диапазону. Триггер полнотекстового индекса
+на время вставки постов снимается, новые посты индексируются одним
+INSERT ... SELECT в той же транзакции. После наполнения сбрасывается
+кэш ответов (общий с приложением только с хранилищем redis).
+Запуск: python -m app.core.seed --users 100000 --posts 1000000 --likes 5000000 --seed 42
+"""
+import argparse
+import asyncio
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from math import gcd
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from app.core.db import engine
+from app.core.password import password_helper
+from app.core.response_cache import post_response_cache
+from app.models import Post, PostLike, User
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+SEED_PASSWORD = 'seed-password'
+SEARCH_INSERT_TRIGGER = 'post_fts_after_insert'
+USER_COLUMNS = (
+    'id', 'email', 'hashed_password', 'is_active', 'is_superuser',
+    'is_verified', 'username', 'likes_given', 'followers_count',
+)
+POST_COLUMNS = ('id', 'user_id', 'text', 'username', 'create_date', 'like_count')
+LIKE_COLUMNS = ('post_id', 'user_id', 'created_at')
+# Формат, в котором sqlalchemy.DateTime хранит значения в SQLite.
+SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+WORDS = (
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'theta', 'kappa',
+    'lambda', 'sigma', 'omega', 'python', 'sqlite', 'fastapi', 'feed', 'like',
+)
+
+
+def _chunks(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Seeder:
+    """
+    Генератор синтетических данных.
+    :param rng: Генератор случайных чисел (random.Random(seed) для
+        воспроизводимого набора).
+    :param batch_size: Строк в одном executemany.
+    :param commit_rows: Строк в одной транзакции.
+    :param password: Пароль всех создаваемых пользователей.
+    """
+    def __init__(
+            self,
+            rng: random.Random,
+            batch_size: int = 10000,
+            commit_rows: int = 500000,
+            password: str = SEED_PASSWORD
+    ):
+        self.rng = rng
+        self.batch_size = batch_size
+        self.commit_rows = commit_rows
+        self.password = password
+        self.first_user_id = 1
+        self.first_post_id = 1
+        self.users = 0
+        self.posts = 0
+        # Автор и количество лайков каждого созданного поста.
+        self._authors = array('l')
+        self._like_counts = array('l')
+        self.likes = 0
+        self.seconds: Dict[str, float] = {}
+
+    async def seed(
+            self,
+            conn: AsyncConnection,
+            users: int,
+            posts: int,
+            likes: int
+    ) -> Dict[str, float]:
+        """
+        Создать пользователей, посты и лайки.
+        Идентификаторы продолжают уже существующие в базе.
+        :param conn: Асинхронное соединение SQLAlchemy (вне транзакции).
+        :param users: Количество пользователей.
+        :param posts: Количество постов (авторы - новые пользователи).
+        :param likes: Примерное общее количество лайков на новые посты.
+        :return: Количество строк и время по таблицам.
+        """
+        self.first_user_id = await self._next_id(conn, User)
+        self.first_post_id = await self._next_id(conn, Post)
+        self.users = users
+        self.posts = posts if users else 0
+        await self._insert(conn, 'user', User, USER_COLUMNS, self._user_rows())
+        self._plan_posts(likes)
+        await self._insert_posts(conn)
+        await self._insert(conn, 'postlike', PostLike, LIKE_COLUMNS, self._like_rows())
+        await self._update_likes_given(conn)
+        return self.report()
+
+    def report(self) -> Dict[str, float]:
+        total_rows = self.users + self.posts + self.likes
+        total_seconds = sum(self.seconds.values())
+        return {
+            'users': self.users,
+            'posts': self.posts,
+            'likes': self.likes,
+            'seconds': round(total_seconds, 3),
+            'rows_per_second': round(total_rows / total_seconds) if total_seconds else 0,
+        }
+
+    async def _next_id(self, conn: AsyncConnection, model) -> int:
+        result = await conn.execute(select(func.max(model.id)))
+        await conn.commit()
+        return (result.scalar() or 0) + 1
+
+    @staticmethod
+    def _insert_sql(conn: AsyncConnection, model, columns) -> str:
+        return str(insert(model).compile(dialect=conn.dialect, column_keys=list(columns)))
+
+    async def _insert(
+            self,
+            conn: AsyncConnection,
+            name: str,
+            model,
+            columns,
+            rows: Iterator[tuple]
+    ) -> None:
+        started = time.perf_counter()
+        pending = 0
+        async for count in self._execute_chunks(conn, self._insert_sql(conn, model, columns), rows):
+            pending += count
+            if pending >= self.commit_rows:
+                await conn.commit()
+                pending = 0
+        await conn.commit()
+        self.seconds[name] = time.perf_counter() - started
+
+    async def _execute_chunks(
+            self,
+            conn: AsyncConnection,
+            sql: str,
+            rows: Iterator[tuple]
+    ) -> AsyncIterator[int]:
+        """
+        Вставка пачками: следующая пачка генерируется в отдельном потоке,
+        пока SQLite записывает предыдущую.
+        :return: Размеры вставленных пачек.
+        """
+        chunks = _chunks(rows, self.batch_size)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            _, next_chunk = await asyncio.gather(
+                conn.exec_driver_sql(sql, chunk),
+                asyncio.to_thread(next, chunks, None)
+            )
+            yield len(chunk)
+            chunk = next_chunk
+
+    async def _insert_posts(self, conn: AsyncConnection) -> None:
+        """
+        Вставка постов одной транзакцией. Построчный триггер FTS в несколько
+        раз медленнее самой вставки, поэтому он удаляется и создается заново
+        после вставки, а индекс дополняется новыми постами одним запросом.
+        pysqlite не начинает транзакцию перед DDL и фиксировал бы DROP TRIGGER
+        сразу, поэтому транзакция начинается явно: при ошибке вставки откат
+        возвращает и триггер.
+        """
+        result = await conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': SEARCH_INSERT_TRIGGER}
+        )
+        trigger_sql = result.scalar()
+        await conn.commit()
+        if trigger_sql is None:
+            await self._insert(conn, 'post', Post, POST_COLUMNS, self._post_rows())
+            return
+        started = time.perf_counter()
+        await conn.exec_driver_sql('BEGIN')
+        try:
+            await conn.execute(text(f'DROP TRIGGER {SEARCH_INSERT_TRIGGER}'))
+            sql = self._insert_sql(conn, Post, POST_COLUMNS)
+            async for _ in self._execute_chunks(conn, sql, self._post_rows()):
+                pass
+            await conn.execute(
+                text('INSERT INTO post_fts(rowid, text) SELECT id, text FROM post WHERE id >= :first_id'),
+                {'first_id': self.first_post_id}
+            )
+            await conn.execute(text(trigger_sql))
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+        self.seconds['post'] = time.perf_counter() - started
+
+    def _user_rows(self) -> Iterator[tuple]:
+        hashed_password = password_helper.hash(self.password)
+        for user_id in range(self.first_user_id, self.first_user_id + self.users):
+            yield (
+                user_id, f'seed{user_id}@seed.example', hashed_password,
+                True, False, True, f'seed_user{user_id}', 0, 0,
+            )
+
+    def _plan_posts(self, likes: int) -> None:
+        """
+        Авторы и количество лайков постов. Лайки распределены
+        экспоненциально: большинство постов с несколькими лайками,
+        немногие - с сотнями.
+        """
+        rng = self.rng
+        mean_likes = likes / self.posts if self.posts else 0
+        max_likes = max(self.users - 1, 0)
+        for _ in range(self.posts):
+            self._authors.append(rng.randrange(self.users))
+            count = round(rng.expovariate(1 / mean_likes)) if mean_likes else 0
+            self._like_counts.append(min(count, max_likes))
+
+    def _post_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        started = datetime.utcnow() - timedelta(seconds=self.posts)
+        for index in range(self.posts):
+            author_id = self.first_user_id + self._authors[index]
+            create_date = started + timedelta(seconds=index)
+            # 12 случайных слов из 16: по 4 бита на слово.
+            bits = rng.getrandbits(48)
+            yield (
+                self.first_post_id + index,
+                author_id,
+                ' '.join([WORDS[(bits >> shift) & 15] for shift in range(0, 48, 4)]),
+                f'seed_user{author_id}',
+                create_date.strftime(SQLITE_DATETIME_FORMAT),
+                self._like_counts[index],
+            )
+
+    def _like_rows(self) -> Iterator[tuple]:
+        """
+        Лайки поста ставят пользователи start, start + step, start + 2 * step, ...
+        (по модулю числа пользователей) со случайными start и step, взаимно
+        простым с числом пользователей: такие номера не повторяются, поэтому
+        пары (пост, пользователь) уникальны без общего множества в памяти,
+        а на пост нужно два случайных числа вместо одного на лайк.
+        Автор поста пропускается.
+        """
+        rng = self.rng
+        created_at = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+        users = self.users
+        steps = [step for step in range(1, min(users, 1000)) if gcd(step, users) == 1] or [1]
+        for index in range(self.posts):
+            count = self._like_counts[index]
+            if not count:
+                continue
+            start = rng.randrange(users)
+            step = rng.choice(steps)
+            # Позиция автора в последовательности; если он в нее попадает,
+            # берется на одного пользователя больше.
+            author_position = (self._authors[index] - start) * pow(step, -1, users) % users
+            total = count + 1 if author_position < count else count
+            post_id = self.first_post_id + index
+            first_user_id = self.first_user_id
+            yield from [
+                (post_id, first_user_id + (start + position * step) % users, created_at)
+                for position in range(total)
+                if position != author_position
+            ]
+            self.likes += count
+
+    async def _update_likes_given(self, conn: AsyncConnection) -> None:
+        started = time.perf_counter()
+        likes_given = (
+            select(func.count(PostLike.id))
+            .where(PostLike.user_id == User.id)
+            .scalar_subquery()
+        )
+        await conn.execute(
+            update(User)
+            .where(User.id.between(self.first_user_id, self.first_user_id + self.users - 1))
+            .values(likes_given=likes_given)
+        )
+        await conn.commit()
+        self.seconds['likes_given'] = time.perf_counter() - started
+
+
+async def seed(
+        users: int,
+        posts: int,
+        likes: int,
+        rng_seed: Optional[int] = None,
+        batch_size: int = 10000,
+        password: str = SEED_PASSWORD
+) -> Dict[str, float]:
+    """
+    Наполнить базу из настроек приложения синтетическими данными.
+    :param users: Количество пользователей.
+    :param posts: Количество постов.
+    :param likes: Примерное количество лайков.
+    :param rng_seed: Зерно генератора; None - случайный набор.
+    :param batch_size: Строк в одном executemany.
+    :param password: Пароль всех создаваемых пользователей.
+    :return: Количество строк и скорость загрузки.
+    """
+    seeder = Seeder(random.Random(rng_seed), batch_size=batch_size, password=password)
+    async with engine.connect() as conn:
+        result = await seeder.seed(conn, users, posts, likes)
+    await post_response_cache.invalidate_all()
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Массовое наполнение базы синтетическими данными.')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--likes', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=None, help='Зерно генератора случайных чисел.')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--password', default=SEED_PASSWORD, help='Пароль всех пользователей.')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    result = asyncio.run(seed(
+        args.users, args.posts, args.likes, args.seed, args.batch_size, args.password
+    ))
+    print(
+        f'Создано: пользователей {result["users"]}, постов {result["posts"]}, '
+        f'лайков {result["likes"]} за {result["seconds"]} с '
+        f'({result["rows_per_second"]} строк/с)'
+    )
@@ -1,17 +1,32 @@
-from typing import Generator, Optional, Union
+import logging
+import secrets
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Any, Dict, Generator, List, Optional, Union
+
+import jwt
+from app.core.auth_cache import TokenClaimsCache, UserSnapshotCache
 from app.core.config import settings
-from app.core.db import get_async_session
+from app.core.db import get_async_session, get_read_session
+from app.core.metrics import EMAIL_VERIFICATION_RESULTS, USERS_REGISTERED
+from app.core.password import PooledPasswordHelper, password_helper
+from app.core.revocation import RevocationStore, revocation_store
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.utils.utils import check_email_async
-from fastapi import Depends, Request
+from app.schemas.user import TokenPair, UserCreate
+from app.utils.utils import email_verifier
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (BaseUserManager, FastAPIUsers, IntegerIDMixin,
-                           InvalidPasswordException)
+                           InvalidPasswordException, exceptions)
 from fastapi_users.authentication import (AuthenticationBackend,
-                                          BearerTransport, JWTStrategy)
+                                          Authenticator, BearerTransport,
+                                          JWTStrategy)
+from fastapi_users.jwt import decode_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
 
+logger = logging.getLogger(__name__)
+
 
 async def get_user_db(session: AsyncSession = Depends(get_async_session)) -> Generator:
     """
@@ -22,18 +37,281 @@ async def get_user_db(session: AsyncSession = Depends(get_async_session)) -> Gen
     yield SQLAlchemyUserDatabase(session, User)
 
 
+async def get_read_user_db(session: AsyncSession = Depends(get_read_session)) -> Generator:
+    """
+    База данных пользователей на движке чтения: для загрузки пользователя
+    по токену, чтобы она не занимала пишущее соединение.
+    :param session: Асинхронная сессия чтения SQLAlchemy.
+    :return: Генератор SQLAlchemyUserDatabase.
+    """
+    yield SQLAlchemyUserDatabase(session, User)
+
+
 bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
+# Аудитория refresh-токенов: access-токены проверяются с аудиторией
+# fastapi-users:auth, поэтому refresh-токен не принимается вместо access.
+REFRESH_TOKEN_AUDIENCE = 'fastapi-users:refresh'
+
+auth_cache = UserSnapshotCache(
+    max_size=settings.auth_cache_max_size,
+    ttl_seconds=settings.auth_cache_ttl_seconds
+)
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """
+    JWT-стратегия с ротацией ключей, кэшами и отзывом токенов.
+    Новые токены подписываются ключом signing_kid, идентификатор ключа
+    передается в заголовке kid; проверяются токены, подписанные любым ключом
+    из keys. Токены без kid (выпущенные до ротации) проверяются ключом secret.
+    Claims проверенного токена кэшируются до его истечения, пользователь -
+    на время auth_cache_ttl_seconds: при попадании в кэш не выполняются ни
+    проверка подписи, ни запрос к базе.
+    В токен также записываются is_active, is_superuser и is_verified:
+    по ним user_from_claims восстанавливает пользователя без базы.
+    Каждый токен получает jti; отозванные jti хранятся в revocation
+    и проверяются при каждом запросе (поиск в памяти).
+    Refresh-токен - JWT с отдельной аудиторией, поэтому вместо access-токена
+    его использовать нельзя; при обмене на новую пару он отзывается.
+    :param cache: Кэш снимков пользователей.
+    :param claims_cache: Кэш claims проверенных токенов.
+    :param revocation: Хранилище отозванных токенов.
+    :param keys: Ключи подписи {kid: секрет}.
+    :param signing_kid: Ключ для новых токенов; None - secret без kid.
+    :param refresh_lifetime_seconds: Время жизни refresh-токена.
+    """
+    def __init__(
+            self,
+            cache: UserSnapshotCache,
+            claims_cache: TokenClaimsCache,
+            revocation: RevocationStore,
+            keys: Dict[str, str],
+            signing_kid: Optional[str] = None,
+            refresh_lifetime_seconds: int = 2592000,
+            **kwargs
+    ):
+        super().__init__(**kwargs)
+        if signing_kid is not None and signing_kid not in keys:
+            raise ValueError(f'Ключ JWT {signing_kid!r} не найден в jwt_keys')
+        self.cache = cache
+        self.claims_cache = claims_cache
+        self.revocation = revocation
+        self.keys = keys
+        self.signing_kid = signing_kid
+        self.refresh_lifetime_seconds = refresh_lifetime_seconds
+
+    def _encode(self, payload: Dict[str, Any], lifetime_seconds: Optional[int]) -> str:
+        payload['jti'] = secrets.token_hex(16)
+        if lifetime_seconds:
+            payload['exp'] = datetime.utcnow() + timedelta(seconds=lifetime_seconds)
+        if self.signing_kid is None:
+            return jwt.encode(payload, self.encode_key, algorithm=self.algorithm)
+        return jwt.encode(
+            payload,
+            self.keys[self.signing_kid],
+            algorithm=self.algorithm,
+            headers={'kid': self.signing_kid}
+        )
+
+    def _verify(self, token: str, audience: List[str]) -> Optional[Dict[str, Any]]:
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+            key = self.decode_key if kid is None else self.keys.get(kid)
+            if key is None:
+                return None
+            claims = decode_jwt(token, key, audience, algorithms=[self.algorithm])
+        except jwt.PyJWTError:
+            return None
+        if claims.get('user_id') is None:
+            return None
+        return claims
+
+    async def write_token(self, user: User) -> str:
+        """
+        Выпуск access-токена, подписанного текущим ключом.
+        :param user: Объект User.
+        :return: JWT.
+        """
+        payload = {
+            'user_id': str(user.id),
+            'aud': self.token_audience,
+            'is_active': user.is_active,
+            'is_superuser': user.is_superuser,
+            'is_verified': user.is_verified,
+        }
+        return self._encode(payload, self.lifetime_seconds)
+
+    async def write_refresh_token(self, user: User) -> str:
+        """
+        Выпуск refresh-токена, подписанного текущим ключом.
+        :param user: Объект User.
+        :return: JWT с аудиторией REFRESH_TOKEN_AUDIENCE.
+        """
+        payload = {'user_id': str(user.id), 'aud': [REFRESH_TOKEN_AUDIENCE]}
+        return self._encode(payload, self.refresh_lifetime_seconds)
+
+    def decode_claims(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Проверенные claims access-токена (из кэша или после проверки подписи).
+        :param token: JWT из заголовка Authorization.
+        :return: Словарь claims или None, если токен недействителен
+            или отозван.
+        """
+        if token is None:
+            return None
+        claims = self.claims_cache.get(token)
+        if claims is None:
+            claims = self._verify(token, self.token_audience)
+            if claims is None:
+                return None
+            self.claims_cache.set(token, claims)
+        if self.revocation.is_revoked(claims.get('jti')):
+            return None
+        return claims
+
+    def user_from_claims(self, token: Optional[str]) -> Optional[User]:
+        """
+        Пользователь, восстановленный из claims токена без запроса к базе.
+        В объекте заполнены только id, is_active, is_superuser и is_verified.
+        :param token: JWT из заголовка Authorization.
+        :return: Объект User или None, если токен недействителен
+            или выпущен без этих claims.
+        """
+        claims = self.decode_claims(token)
+        if claims is None or 'is_active' not in claims:
+            return None
+        try:
+            user_id = int(claims['user_id'])
+        except ValueError:
+            return None
+        return User(
+            id=user_id,
+            is_active=claims['is_active'],
+            is_superuser=claims['is_superuser'],
+            is_verified=claims['is_verified'],
+        )
+
+    async def read_token(
+            self,
+            token: Optional[str],
+            user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        """
+        Получение пользователя по токену: сначала из кэша, затем из базы.
+        :param token: JWT из заголовка Authorization.
+        :param user_manager: Менеджер пользователей.
+        :return: Объект User или None, если токен недействителен.
+        """
+        claims = self.decode_claims(token)
+        if claims is None:
+            return None
+        user = self.cache.get(token)
+        if user is not None:
+            return user
+        try:
+            user = await user_manager.get(user_manager.parse_id(claims['user_id']))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        self.cache.set(token, user, claims.get('exp'))
+        return user
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        """
+        Отзыв access-токена (выход из системы).
+        :param token: JWT из заголовка Authorization.
+        :param user: Владелец токена.
+        """
+        claims = self.decode_claims(token)
+        if claims is not None and 'jti' in claims and 'exp' in claims:
+            await self.revocation.revoke(claims['jti'], claims['exp'])
+
+    async def revoke_refresh_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Отзыв refresh-токена.
+        :param token: Refresh-токен.
+        :return: Claims токена или None, если токен недействителен
+            или уже отозван.
+        """
+        claims = self._verify(token, [REFRESH_TOKEN_AUDIENCE])
+        if claims is None or 'jti' not in claims or 'exp' not in claims:
+            return None
+        if not await self.revocation.revoke(claims['jti'], claims['exp']):
+            return None
+        return claims
+
+    async def rotate_refresh_token(
+            self,
+            token: str,
+            user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        """
+        Обмен refresh-токена: токен отзывается, возвращается его владелец,
+        для которого выпускается новая пара токенов. Повторный обмен того же
+        токена не проходит.
+        :param token: Refresh-токен.
+        :param user_manager: Менеджер пользователей.
+        :return: Активный пользователь или None.
+        """
+        claims = await self.revoke_refresh_token(token)
+        if claims is None:
+            return None
+        try:
+            user = await user_manager.get(user_manager.parse_id(claims['user_id']))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        if not user.is_active:
+            return None
+        return user
+
+
+jwt_strategy = CachedJWTStrategy(
+    cache=auth_cache,
+    claims_cache=TokenClaimsCache(settings.jwt_claims_cache_size),
+    revocation=revocation_store,
+    keys=settings.jwt_keys,
+    signing_kid=settings.jwt_signing_kid,
+    refresh_lifetime_seconds=settings.jwt_refresh_lifetime_seconds,
+    secret=settings.secret,
+    lifetime_seconds=settings.jwt_lifetime_seconds
+)
+
 
 def get_jwt_strategy() -> JWTStrategy:
     """
     Функция получения стратегии аутентификации JWT.
+    Стратегия создается один раз при импорте модуля.
     :return: JWTStrategy.
     """
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    return jwt_strategy
+
 
+class RefreshAuthenticationBackend(AuthenticationBackend):
+    """
+    Бэкенд аутентификации, который при входе выдает пару токенов:
+    access-токен и refresh-токен для его обновления без пароля.
+    """
+    async def login(
+            self,
+            strategy: CachedJWTStrategy,
+            user: User,
+            response: Response
+    ) -> TokenPair:
+        """
+        Выпуск пары токенов для пользователя.
+        :param strategy: Стратегия JWT.
+        :param user: Объект User.
+        :param response: Ответ (не используется транспортом Bearer).
+        :return: Объект TokenPair.
+        """
+        return TokenPair(
+            access_token=await strategy.write_token(user),
+            refresh_token=await strategy.write_refresh_token(user),
+            token_type='bearer'
+        )
 
-auth_backend = AuthenticationBackend(
+
+auth_backend = RefreshAuthenticationBackend(
     name='jwt',
     transport=bearer_transport,
     get_strategy=get_jwt_strategy,
@@ -41,6 +319,14 @@ auth_backend = AuthenticationBackend(
 
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
+    """
+    Менеджер пользователей. Хэширование и проверка паролей выполняются
+    в пуле PooledPasswordHelper, а не в цикле событий, поэтому create,
+    authenticate и _update повторяют логику BaseUserManager
+    с асинхронными вызовами пула.
+    """
+    password_helper: PooledPasswordHelper
+
     async def validate_password(
         self,
         password: str,
@@ -69,25 +355,135 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
         :param user: Объект User, представляющий пользователя.
         :param request: Запрос FastAPI, если применимо.
         """
-        print(f'Пользователь {user.email} зарегистрирован.')
+        USERS_REGISTERED.inc()
+        logger.info('Пользователь %s зарегистрирован.', user.email)
+
+    async def on_after_update(
+            self,
+            user: User,
+            update_dict: Dict[str, Any],
+            request: Optional[Request] = None
+    ) -> None:
+        """
+        Вызывается после обновления пользователя (в т.ч. деактивации).
+        Сбрасывает кэшированные снимки пользователя.
+        :param user: Обновленный объект User.
+        :param update_dict: Словарь измененных полей.
+        :param request: Запрос FastAPI, если применимо.
+        """
+        auth_cache.invalidate_user(user.id)
+
+    async def on_after_verify(
+            self, user: User, request: Optional[Request] = None
+    ) -> None:
+        """
+        Вызывается после подтверждения email; сбрасывает кэш пользователя.
+        """
+        auth_cache.invalidate_user(user.id)
+
+    async def on_after_reset_password(
+            self, user: User, request: Optional[Request] = None
+    ) -> None:
+        """
+        Вызывается после сброса пароля; сбрасывает кэш пользователя.
+        """
+        auth_cache.invalidate_user(user.id)
+
+    async def delete(self, user: User) -> None:
+        """
+        Удаление пользователя со сбросом его кэшированных снимков.
+        :param user: Объект User.
+        """
+        user_id = user.id
+        await super().delete(user)
+        auth_cache.invalidate_user(user_id)
 
-    async def create(self, user: UserCreate, **kwargs) -> User:
+    async def create(
+            self,
+            user_create: UserCreate,
+            safe: bool = False,
+            request: Optional[Request] = None
+    ) -> User:
         """
         Создание пользователя.
-        :param user: Объект UserCreate с данными пользователя.
-        :param kwargs: Дополнительные параметры (не используются в данном контексте).
+        :param user_create: Объект UserCreate с данными пользователя.
+        :param safe: Не принимать is_superuser и is_verified из данных.
+        :param request: Запрос FastAPI, если применимо.
+        :raises UserAlreadyExists: Если пользователь с таким email уже есть.
         :return: Созданный объект User.
         """
-        response = await check_email_async(user.email)
-        if response["result"] == "deliverable":
-            print("Email exists")
-        elif response["result"] == "undeliverable":
-            print("Email does not exist")
-        else:
-            print("Unable to verify email")
-        user_data = user.dict()
-        user_data.pop("password", None)
-        return await super().create(user, **kwargs)
+        if settings.email_verification_mode == 'sync':
+            await report_email_result(user_create.email, await email_verifier.verify(user_create.email))
+        await self.validate_password(user_create.password, user_create)
+        if await self.user_db.get_by_email(user_create.email) is not None:
+            raise exceptions.UserAlreadyExists()
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop('password')
+        user_dict['hashed_password'] = await self.password_helper.hash_async(password)
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        if settings.email_verification_mode == 'background':
+            email_verifier.verify_later(created_user.email, report_email_result)
+        return created_user
+
+    async def authenticate(
+            self,
+            credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        """
+        Аутентификация по email и паролю. Если хэш пароля вычислен
+        с другими параметрами (password_hash_rounds), он пересчитывается.
+        :param credentials: Email и пароль из формы входа.
+        :return: Объект User или None, если email или пароль неверны.
+        """
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Хэширование и для несуществующего email, чтобы время
+            # ответа не выдавало, зарегистрирован ли адрес.
+            await self.password_helper.hash_async(credentials.password)
+            return None
+        verified, updated_password_hash = await self.password_helper.verify_and_update_async(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {'hashed_password': updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        """
+        Обновление пользователя; новый пароль хэшируется в пуле.
+        :param user: Объект User.
+        :param update_dict: Словарь изменяемых полей.
+        :return: Обновленный объект User.
+        """
+        if 'password' in update_dict:
+            update_dict = dict(update_dict)
+            password = update_dict.pop('password')
+            await self.validate_password(password, user)
+            update_dict['hashed_password'] = await self.password_helper.hash_async(password)
+        return await super()._update(user, update_dict)
+
+
+async def report_email_result(email: str, response: dict) -> None:
+    """
+    Записывает в лог результат проверки email сервисом Kickbox.
+    :param email: Проверенный адрес.
+    :param response: Ответ сервиса проверки.
+    """
+    EMAIL_VERIFICATION_RESULTS.inc(response.get('result', 'unknown'))
+    if response.get("result") == "deliverable":
+        logger.info('Email %s exists', email)
+    elif response.get("result") == "undeliverable":
+        logger.info('Email %s does not exist', email)
+    else:
+        logger.warning('Unable to verify email %s', email)
 
 
 async def get_user_manager(user_db: SQLAlchemyUserDatabase[User, int] = Depends(get_user_db)) -> Generator:
@@ -96,7 +492,18 @@ async def get_user_manager(user_db: SQLAlchemyUserDatabase[User, int] = Depends(
     :param user_db: База данных пользователей.
     :return: Генератор UserManager.
     """
-    yield UserManager(user_db)
+    yield UserManager(user_db, password_helper)
+
+
+async def get_read_user_manager(
+        user_db: SQLAlchemyUserDatabase[User, int] = Depends(get_read_user_db)
+) -> Generator:
+    """
+    Менеджер пользователей только для чтения (проверка токенов).
+    :param user_db: База данных пользователей на движке чтения.
+    :return: Генератор UserManager.
+    """
+    yield UserManager(user_db, password_helper)
 
 
 fastapi_users = FastAPIUsers[User, int](
@@ -104,5 +511,39 @@ fastapi_users = FastAPIUsers[User, int](
     [auth_backend],
 )
 
-current_user: Union[User, None] = fastapi_users.current_user(active=True)
-current_superuser: Union[User, None] = fastapi_users.current_user(active=True, superuser=True)
+# Пользователь эндпоинтов приложения загружается через движок чтения:
+# при промахе кэша запрос не занимает единственное пишущее соединение,
+# в том числе на все время потокового ответа. Маршруты fastapi-users
+# (/users/me и др.) изменяют пользователя и используют fastapi_users.
+authenticator = Authenticator([auth_backend], get_read_user_manager)
+
+current_user: Union[User, None] = authenticator.current_user(active=True)
+current_superuser: Union[User, None] = authenticator.current_user(active=True, superuser=True)
+
+
+def get_current_reader():
+    """
+    Зависимость аутентификации для эндпоинтов чтения.
+    При JWT_TRUST_CLAIMS=true пользователь восстанавливается из claims
+    токена без запроса к базе: деактивация пользователя вступает в силу
+    только после истечения уже выпущенных токенов. Токены, выпущенные
+    без этих claims, проверяются как в current_user. Иначе - current_user.
+    """
+    if not settings.jwt_trust_claims:
+        return current_user
+
+    async def current_reader(
+            token: Optional[str] = Depends(bearer_transport.scheme),
+            user_manager: UserManager = Depends(get_read_user_manager)
+    ) -> User:
+        user = jwt_strategy.user_from_claims(token)
+        if user is None:
+            user = await jwt_strategy.read_token(token, user_manager)
+        if user is None or not user.is_active:
+            raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED)
+        return user
+
+    return current_reader
+
+
+current_reader: Union[User, None] = get_current_reader()
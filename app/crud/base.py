@@ -1,7 +1,8 @@
+from app.crud.loader import get_loader
 from app.models import User
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import delete, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 
 class CRUDBase:
@@ -25,14 +26,31 @@ class CRUDBase:
             obj_in,
             session: AsyncSession
     ):
-        obj_data = jsonable_encoder(db_obj)
+        """
+        Обновление объекта одним UPDATE по первичному ключу, без повторного SELECT.
+        Объект мог быть загружен другой сессией (например, сессией чтения):
+        новые значения записываются в него как уже сохраненные.
+        :param db_obj: Обновляемый объект модели.
+        :param obj_in: Схема с новыми значениями полей.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Обновленный объект модели.
+        """
         update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+        values = {
+            attr.key: update_data[attr.key]
+            for attr in inspect(self.model).column_attrs
+            if attr.key in update_data
+        }
+        if values:
+            await session.execute(
+                update(self.model)
+                .where(self.model.id == db_obj.id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        for field, value in values.items():
+            set_committed_value(db_obj, field, value)
         return db_obj
 
     async def get_object(
@@ -40,16 +58,33 @@ class CRUDBase:
             obj_id,
             session: AsyncSession
     ):
-        db_obj = await session.execute(select(self.model).where(self.model.id == obj_id))
-        return db_obj.scalars().first()
+        """
+        Получение объекта по первичному ключу через загрузчик сессии:
+        повторные запросы того же объекта в пределах запроса не идут в базу.
+        :param obj_id: Идентификатор объекта.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Объект модели или None, если объекта нет.
+        """
+        return await get_loader(session).load(self.model, obj_id)
 
     async def delete_object(
             self,
             db_obj,
             session: AsyncSession
     ):
-        await session.delete(db_obj)
+        """
+        Удаление объекта одним DELETE по первичному ключу.
+        :param db_obj: Удаляемый объект модели.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Удаленный объект модели.
+        """
+        await session.execute(
+            delete(self.model)
+            .where(self.model.id == db_obj.id)
+            .execution_options(synchronize_session=False)
+        )
         await session.commit()
+        get_loader(session).clear(self.model, db_obj.id)
         return db_obj
 
     async def create_object(
@@ -58,13 +93,90 @@ class CRUDBase:
             session: AsyncSession,
             user: User
     ):
+        """
+        Создание объекта одним INSERT без последующего refresh.
+        :param obj_in: Схема создаваемого объекта.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param user: Пользователь, от имени которого создается объект.
+        :return: Созданный объект модели.
+        """
+        created = await self.create_objects([obj_in], session, user)
+        return created[0]
+
+    async def create_objects(
+            self,
+            objs_in,
+            session: AsyncSession,
+            user: User
+    ):
+        """
+        Массовое создание объектов одним многострочным INSERT в одной транзакции.
+        Идентификаторы вычисляются по lastrowid без повторного SELECT.
+        Это верно только для SQLite: один INSERT выполняется под блокировкой
+        записи, и его строки получают rowid подряд (max(rowid) + 1, ...);
+        исключение - таблица, где rowid уже достиг 2**63 - 1 (тогда SQLite
+        выбирает rowid случайно), на практике недостижимо. На других базах
+        объекты вставляются через ORM, которая получает идентификаторы
+        от базы (RETURNING или отдельным INSERT на строку).
+        :param objs_in: Список схем создаваемых объектов.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param user: Пользователь, от имени которого создаются объекты.
+        :return: Список созданных объектов модели (не привязанных к сессии).
+        """
         username = user.username
-        obj_in_data = obj_in.dict()
-        obj_in_data['username'] = username
-        obj_in_data['user_id'] = user.id
-        db_obj = self.model(**obj_in_data)
-        session.add(db_obj)
+        user_id = user.id
+        rows = []
+        for obj_in in objs_in:
+            obj_in_data = obj_in.dict()
+            obj_in_data['username'] = username
+            obj_in_data['user_id'] = user_id
+            rows.append(self._apply_column_defaults(obj_in_data))
+        if self._has_consecutive_rowids(session):
+            result = await session.execute(insert(self.model).values(rows))
+            first_id = result.lastrowid - len(rows) + 1
+            db_objs = [self.model(id=first_id + i, **row) for i, row in enumerate(rows)]
+        else:
+            db_objs = await self._insert_returning_ids(rows, session)
+        await self.on_after_create(db_objs, session)
         await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        return db_objs
+
+    def _has_consecutive_rowids(self, session: AsyncSession) -> bool:
+        """
+        Получают ли строки одного многострочного INSERT идентификаторы подряд.
+        """
+        return session.bind.dialect.name == 'sqlite'
+
+    async def _insert_returning_ids(self, rows, session: AsyncSession):
+        """
+        Вставка через ORM: идентификаторы получает сама ORM.
+        Объекты отвязываются от сессии, как и при вставке одним INSERT.
+        """
+        db_objs = [self.model(**row) for row in rows]
+        session.add_all(db_objs)
+        await session.flush()
+        for db_obj in db_objs:
+            session.expunge(db_obj)
+        return db_objs
+
+    async def on_after_create(self, db_objs, session: AsyncSession) -> None:
+        """
+        Вызывается после INSERT в той же транзакции, до commit.
+        Наследники дописывают здесь связанные с новыми объектами данные.
+        :param db_objs: Созданные объекты модели.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
 
+    def _apply_column_defaults(self, data: dict) -> dict:
+        """
+        Заполняет незаданные поля значениями default колонок модели,
+        чтобы вставленные значения были известны без повторного SELECT.
+        """
+        for column in self.model.__table__.columns:
+            if column.key in data or column.primary_key or column.default is None:
+                continue
+            if column.default.is_callable:
+                data[column.key] = column.default.arg(None)
+            elif column.default.is_scalar:
+                data[column.key] = column.default.arg
+        return data
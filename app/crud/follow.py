@@ -0,0 +1,204 @@
+import enum
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.response_cache import post_response_cache
+from app.crud.base import CRUDBase
+from app.models import User
+from app.models.follow import FeedItem, Follow
+from app.models.post import Post, utc_now
+from sqlalchemy import DateTime, Integer, delete, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class FollowStatus(enum.Enum):
+    """
+    Результат подписки на автора или отписки от него.
+    """
+    CREATED = 'created'
+    REMOVED = 'removed'
+    USER_NOT_FOUND = 'user_not_found'
+    SELF = 'self'
+    ALREADY_EXISTS = 'already_exists'
+    NOT_FOUND = 'not_found'
+
+
+def fans_out(author_id) -> bool:
+    """
+    Условие SQL: посты автора рассылаются подписчикам при записи.
+    """
+    followers_count = (
+        select(User.followers_count)
+        .where(User.id == author_id)
+        .scalar_subquery()
+    )
+    return followers_count <= settings.feed_fanout_max_followers
+
+
+class CRUDFollow(CRUDBase):
+    """
+    CRUD подписок и материализованной ленты подписок (таблица feeditem).
+    Посты авторов с числом подписчиков больше feed_fanout_max_followers
+    не рассылаются: их подмешивает при чтении CRUDPost.get_feed_page.
+    """
+    @classmethod
+    async def follow(
+        cls,
+        followee_id: int,
+        user: User,
+        session: AsyncSession
+    ) -> Tuple[FollowStatus, Optional[Follow]]:
+        """
+        Подписаться на автора.
+        Существование автора и дубликаты проверяются одним запросом
+        INSERT ... SELECT с уникальным индексом по (follower_id, followee_id).
+        В ленту подписчика добавляются последние посты автора.
+        :param followee_id: Идентификатор автора.
+        :param user: Объект пользователя, который подписывается.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Статус операции (FollowStatus) и объект подписки (Follow), если она создана.
+        """
+        user_id = user.id
+        if followee_id == user_id:
+            return FollowStatus.SELF, None
+        created_at = utc_now()
+        stmt = insert(Follow).from_select(
+            ['follower_id', 'followee_id', 'created_at'],
+            select(
+                literal(user_id, Integer),
+                User.id,
+                literal(created_at, DateTime)
+            ).where(User.id == followee_id)
+        )
+        try:
+            result = await session.execute(stmt)
+        except IntegrityError:
+            await session.rollback()
+            return FollowStatus.ALREADY_EXISTS, None
+        if result.rowcount == 0:
+            await session.rollback()
+            return FollowStatus.USER_NOT_FOUND, None
+        follow_id = result.lastrowid
+        await cls._shift_followers_count(followee_id, 1, session)
+        await session.execute(
+            insert(FeedItem).from_select(
+                ['user_id', 'post_id', 'author_id', 'create_date'],
+                select(
+                    literal(user_id, Integer),
+                    Post.id,
+                    Post.user_id,
+                    Post.create_date
+                )
+                .where(Post.user_id == followee_id, fans_out(followee_id))
+                .order_by(Post.create_date.desc(), Post.id.desc())
+                .limit(settings.feed_backfill_size)
+            )
+        )
+        await session.commit()
+        await post_response_cache.invalidate_feed()
+        follow = Follow(
+            id=follow_id,
+            follower_id=user_id,
+            followee_id=followee_id,
+            created_at=created_at
+        )
+        return FollowStatus.CREATED, follow
+
+    @classmethod
+    async def unfollow(
+        cls,
+        followee_id: int,
+        user: User,
+        session: AsyncSession
+    ) -> FollowStatus:
+        """
+        Отписаться от автора и убрать его посты из ленты подписчика.
+        :param followee_id: Идентификатор автора.
+        :param user: Объект пользователя, который отписывается.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Статус операции (FollowStatus).
+        """
+        user_id = user.id
+        result = await session.execute(
+            delete(Follow).where(
+                Follow.follower_id == user_id,
+                Follow.followee_id == followee_id
+            )
+        )
+        if result.rowcount == 0:
+            await session.rollback()
+            return FollowStatus.NOT_FOUND
+        await cls._shift_followers_count(followee_id, -1, session)
+        await session.execute(
+            delete(FeedItem).where(
+                FeedItem.user_id == user_id,
+                FeedItem.author_id == followee_id
+            )
+        )
+        await session.commit()
+        await post_response_cache.invalidate_feed()
+        return FollowStatus.REMOVED
+
+    @classmethod
+    async def fan_out_posts(
+        cls,
+        posts: List[Post],
+        session: AsyncSession
+    ) -> None:
+        """
+        Разослать новые посты в ленты подписчиков их авторов.
+        Один запрос INSERT ... SELECT по индексу подписчиков автора;
+        посты популярных авторов не рассылаются. Вызывается в транзакции
+        создания постов, до commit.
+        :param posts: Только что созданные посты.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        await session.execute(
+            insert(FeedItem).from_select(
+                ['user_id', 'post_id', 'author_id', 'create_date'],
+                select(
+                    Follow.follower_id,
+                    Post.id,
+                    Post.user_id,
+                    Post.create_date
+                )
+                .join(Follow, Follow.followee_id == Post.user_id)
+                .where(
+                    Post.id.in_([post.id for post in posts]),
+                    fans_out(Post.user_id)
+                )
+            )
+        )
+
+    @classmethod
+    async def remove_post_from_feeds(
+        cls,
+        post_id: int,
+        session: AsyncSession
+    ) -> None:
+        """
+        Удалить пост из всех лент подписок (без commit).
+        :param post_id: Идентификатор поста.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        await session.execute(delete(FeedItem).where(FeedItem.post_id == post_id))
+
+    @classmethod
+    async def _shift_followers_count(
+        cls,
+        user_id: int,
+        delta: int,
+        session: AsyncSession
+    ) -> None:
+        """
+        Атомарно изменить счетчик User.followers_count в текущей транзакции.
+        """
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(followers_count=User.followers_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+follow_crud = CRUDFollow(Follow)
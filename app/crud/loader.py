@@ -0,0 +1,119 @@
+import asyncio
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_SESSION_INFO_KEY = 'request_loader'
+
+
+class RequestLoader:
+    """
+    Загрузчик объектов по первичному ключу в пределах одной сессии
+    (то есть одного HTTP-запроса), по образцу DataLoader.
+    Повторная загрузка того же объекта берется из памяти, в том числе
+    отрицательный результат (объекта нет). Идентификаторы, запрошенные
+    одновременно (asyncio.gather), собираются в один
+    SELECT ... WHERE id IN (...). Запросы пачек выполняются по одному,
+    так как сессия не допускает параллельных запросов. Задачи запросов
+    пачек хранятся в загрузчике; close дожидается их в конце запроса.
+    :param session: Асинхронная сессия SQLAlchemy.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._cache: Dict[Tuple[type, Hashable], asyncio.Future] = {}
+        self._queue: Dict[type, Dict[Hashable, asyncio.Future]] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.batches = 0
+
+    async def load(self, model, obj_id: Hashable) -> Optional[Any]:
+        """
+        Получить объект модели по первичному ключу.
+        :param model: Модель SQLAlchemy с колонкой id.
+        :param obj_id: Идентификатор объекта.
+        :return: Объект модели или None, если объекта нет.
+        """
+        key = (model, obj_id)
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            self._queue.setdefault(model, {})[obj_id] = future
+            if not self._scheduled:
+                self._scheduled = True
+                task = loop.create_task(self._dispatch())
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return await future
+
+    def clear(self, model, obj_id: Hashable) -> None:
+        """
+        Убрать объект из кэша (например, после удаления).
+        :param model: Модель SQLAlchemy.
+        :param obj_id: Идентификатор объекта.
+        """
+        self._cache.pop((model, obj_id), None)
+
+    async def close(self) -> None:
+        """
+        Завершение работы в конце запроса: отменяет ожидающие загрузки,
+        которые еще не ушли в базу, и дожидается уже начатого запроса
+        пачки, чтобы сессия не закрылась под ним.
+        """
+        queue, self._queue = self._queue, {}
+        for futures in queue.values():
+            for future in futures.values():
+                future.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _dispatch(self) -> None:
+        async with self._lock:
+            queue, self._queue = self._queue, {}
+            self._scheduled = False
+            for model, futures in queue.items():
+                obj_ids = list(futures)
+                if len(obj_ids) == 1:
+                    condition = model.id == obj_ids[0]
+                else:
+                    condition = model.id.in_(obj_ids)
+                try:
+                    result = await self.session.execute(select(model).where(condition))
+                    found = {obj.id: obj for obj in result.scalars()}
+                except Exception as error:
+                    for obj_id, future in futures.items():
+                        self._cache.pop((model, obj_id), None)
+                        if not future.done():
+                            future.set_exception(error)
+                    continue
+                self.batches += 1
+                for obj_id, future in futures.items():
+                    if not future.done():
+                        future.set_result(found.get(obj_id))
+
+
+def get_loader(session: AsyncSession) -> RequestLoader:
+    """
+    Загрузчик, привязанный к сессии. Сессии создаются на каждый запрос
+    (get_async_session, get_read_session), поэтому валидаторы и CRUD,
+    получившие одну сессию, делят один кэш.
+    :param session: Асинхронная сессия SQLAlchemy.
+    :return: Загрузчик этой сессии.
+    """
+    loader = session.info.get(_SESSION_INFO_KEY)
+    if loader is None:
+        loader = session.info[_SESSION_INFO_KEY] = RequestLoader(session)
+    return loader
+
+
+async def close_loader(session: AsyncSession) -> None:
+    """
+    Закрыть загрузчик сессии, если он создавался. Вызывается при
+    закрытии сессии запроса (get_async_session, get_read_session).
+    :param session: Асинхронная сессия SQLAlchemy.
+    """
+    loader = session.info.pop(_SESSION_INFO_KEY, None)
+    if loader is not None:
+        await loader.close()
@@ -1,34 +1,351 @@
-from typing import Optional
+import enum
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.response_cache import post_response_cache
 from app.crud.base import CRUDBase
+from app.crud.follow import follow_crud
 from app.models import User
-from app.models.post import Post, PostLike
-from sqlalchemy import bindparam, select
+from app.models.follow import FeedItem, Follow
+from app.models.post import Post, PostLike, post_fts, utc_now
+from app.utils.search import SNIPPET_END, SNIPPET_START, render_snippet
+from sqlalchemy import (DateTime, Integer, bindparam, delete, func, insert,
+                        literal, literal_column, select, text, tuple_,
+                        update)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Маркер отсутствующего поста: user_id самого поста может быть NULL.
+_POST_MISSING = object()
+
+# Сколько раз пачка лайков перепроверяется после IntegrityError (лайк
+# поставлен параллельным запросом), прежде чем вернуть статус CONFLICT.
+LIKE_WRITE_ATTEMPTS = 3
+
+# Колонки страницы постов в порядке полей схемы PostInDB.
+POST_PAGE_COLUMNS = (Post.text, Post.id, Post.username, Post.create_date, Post.like_count)
+
+
+class LikeStatus(enum.Enum):
+    """
+    Результат постановки или удаления лайка.
+    """
+    CREATED = 'created'
+    REMOVED = 'removed'
+    POST_NOT_FOUND = 'post_not_found'
+    OWN_POST = 'own_post'
+    ALREADY_EXISTS = 'already_exists'
+    NOT_FOUND = 'not_found'
+    CONFLICT = 'conflict'
+
+
+class LikeAction(enum.Enum):
+    """
+    Операция с лайком в очереди отложенной записи.
+    """
+    LIKE = 'like'
+    UNLIKE = 'unlike'
+
+
+def resolve_like_action(
+        action: LikeAction,
+        user_id: int,
+        owner_id: Any,
+        liked: bool
+) -> Tuple[LikeStatus, bool]:
+    """
+    Результат операции с лайком при известном состоянии поста и лайка.
+    :param action: Операция (LikeAction).
+    :param user_id: Идентификатор пользователя, выполняющего операцию.
+    :param owner_id: Идентификатор автора поста или _POST_MISSING.
+    :param liked: Стоит ли лайк до операции.
+    :return: Статус операции и состояние лайка после нее.
+    """
+    if owner_id is _POST_MISSING:
+        return LikeStatus.POST_NOT_FOUND, liked
+    if action is LikeAction.UNLIKE:
+        if not liked:
+            return LikeStatus.NOT_FOUND, liked
+        return LikeStatus.REMOVED, False
+    if owner_id == user_id:
+        return LikeStatus.OWN_POST, liked
+    if liked:
+        return LikeStatus.ALREADY_EXISTS, liked
+    return LikeStatus.CREATED, True
+
 
 class CRUDPost(CRUDBase):
+    """
+    CRUD постов и лайков. Каждое изменение сбрасывает кэш ответов
+    чтения постов (post_response_cache); новые посты в той же транзакции
+    рассылаются в ленты подписчиков (CRUDFollow.fan_out_posts).
+    """
+    async def create_objects(
+            self,
+            objs_in,
+            session: AsyncSession,
+            user: User
+    ) -> List[Post]:
+        posts = await super().create_objects(objs_in, session, user)
+        await post_response_cache.invalidate_feed()
+        return posts
+
+    async def on_after_create(
+            self,
+            db_objs: List[Post],
+            session: AsyncSession
+    ) -> None:
+        await follow_crud.fan_out_posts(db_objs, session)
+
+    async def update_object(
+            self,
+            db_obj: Post,
+            obj_in,
+            session: AsyncSession
+    ) -> Post:
+        post = await super().update_object(db_obj, obj_in, session)
+        await post_response_cache.invalidate_post(post.id)
+        return post
+
+    async def delete_object(
+            self,
+            db_obj: Post,
+            session: AsyncSession
+    ) -> Post:
+        await follow_crud.remove_post_from_feeds(db_obj.id, session)
+        post = await super().delete_object(db_obj, session)
+        await post_response_cache.invalidate_post(post.id)
+        return post
+
+    @classmethod
+    async def get_posts_page(
+        cls,
+        session: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Post]:
+        """
+        Получить страницу ленты постов (keyset-пагинация по (create_date, id)).
+        Посты отдаются от новых к старым, запрос обслуживается индексом
+        ix_post_create_date_id и не зависит от номера страницы.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param limit: Максимальное количество постов на странице.
+        :param after: Позиция (create_date, id) последнего поста предыдущей страницы.
+        :return: Список постов (List[Post]).
+        """
+        stmt = select(Post).order_by(Post.create_date.desc(), Post.id.desc())
+        if after is not None:
+            stmt = stmt.where(tuple_(Post.create_date, Post.id) < tuple_(*after))
+        result = await session.execute(stmt.limit(limit))
+        return result.scalars().all()
+
+    @classmethod
+    async def get_user_posts_page(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Post]:
+        """
+        Получить страницу постов одного автора (keyset-пагинация по (create_date, id)).
+        Запрос обслуживается индексом ix_post_user_id_create_date и читает
+        не больше limit записей, сколько бы постов ни было у автора.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param user_id: Идентификатор автора.
+        :param limit: Максимальное количество постов на странице.
+        :param after: Позиция (create_date, id) последнего поста предыдущей страницы.
+        :return: Список постов (List[Post]).
+        """
+        stmt = (
+            select(Post)
+            .where(Post.user_id == user_id)
+            .order_by(Post.create_date.desc(), Post.id.desc())
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Post.create_date, Post.id) < tuple_(*after))
+        result = await session.execute(stmt.limit(limit))
+        return result.scalars().all()
+
+    @classmethod
+    async def get_posts_page_rows(
+        cls,
+        session: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Страница ленты постов (или постов одного автора) в виде словарей
+        с полями PostInDB. Запросы те же, что в get_posts_page
+        и get_user_posts_page, но выбираются только колонки ответа,
+        без создания ORM-объектов и схем pydantic.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param limit: Максимальное количество постов на странице.
+        :param after: Позиция (create_date, id) последнего поста предыдущей страницы.
+        :param user_id: Идентификатор автора или None для общей ленты.
+        :return: Список словарей от новых постов к старым.
+        """
+        stmt = select(*POST_PAGE_COLUMNS).order_by(Post.create_date.desc(), Post.id.desc())
+        if user_id is not None:
+            stmt = stmt.where(Post.user_id == user_id)
+        if after is not None:
+            stmt = stmt.where(tuple_(Post.create_date, Post.id) < tuple_(*after))
+        result = await session.execute(stmt.limit(limit))
+        return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def get_feed_page(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Post]:
+        """
+        Получить страницу ленты подписок (keyset-пагинация по (create_date, id)).
+        Материализованная часть читается по индексу ix_feeditem_user_id_create_date,
+        посты популярных авторов - страницей по ix_post_user_id_create_date
+        на каждого такого автора. Стоимость не зависит от числа подписок
+        на обычных авторов и количества их постов.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param user_id: Идентификатор владельца ленты.
+        :param limit: Максимальное количество постов на странице.
+        :param after: Позиция (create_date, id) последнего поста предыдущей страницы.
+        :return: Список постов (List[Post]) от новых к старым.
+        """
+        stmt = (
+            select(Post)
+            .join(FeedItem, FeedItem.post_id == Post.id)
+            .where(FeedItem.user_id == user_id)
+            .order_by(FeedItem.create_date.desc(), FeedItem.post_id.desc())
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(FeedItem.create_date, FeedItem.post_id) < tuple_(*after)
+            )
+        posts = (await session.execute(stmt.limit(limit))).scalars().all()
+        pulled_authors = (await session.execute(
+            select(Follow.followee_id)
+            .join(User, User.id == Follow.followee_id)
+            .where(
+                Follow.follower_id == user_id,
+                User.followers_count > settings.feed_fanout_max_followers
+            )
+        )).scalars().all()
+        if not pulled_authors:
+            return posts
+        # Автор мог превысить порог уже после рассылки части постов:
+        # такие посты есть в обеих частях ленты.
+        merged = {post.id: post for post in posts}
+        for author_id in pulled_authors:
+            author_posts = await cls.get_user_posts_page(
+                session, author_id, limit, after
+            )
+            for post in author_posts:
+                merged.setdefault(post.id, post)
+        ordered = sorted(
+            merged.values(),
+            key=lambda post: (post.create_date, post.id),
+            reverse=True
+        )
+        return ordered[:limit]
+
+    @classmethod
+    async def search_posts(
+        cls,
+        session: AsyncSession,
+        match: str,
+        limit: int,
+        offset: int = 0
+    ) -> List[Tuple[Post, str]]:
+        """
+        Полнотекстовый поиск постов по индексу FTS5 post_fts.
+        Результаты упорядочены по релевантности (bm25), к каждому посту
+        прилагается HTML-фрагмент текста: текст экранирован, найденные
+        слова выделены тегами <mark>.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :param match: Выражение MATCH (см. app.utils.search.build_match_query).
+        :param limit: Максимальное количество постов на странице.
+        :param offset: Количество пропускаемых результатов.
+        :return: Список пар (пост, фрагмент текста).
+        """
+        fts = literal_column('post_fts')
+        stmt = (
+            select(
+                Post,
+                func.snippet(fts, 0, SNIPPET_START, SNIPPET_END, '…', 16).label('snippet')
+            )
+            .select_from(post_fts)
+            .join(Post, Post.id == post_fts.c.rowid)
+            .where(fts.op('MATCH')(match))
+            .order_by(post_fts.c.rank)
+            .limit(limit)
+            .offset(offset)
+        )
+        result = await session.execute(stmt)
+        return [(post, render_snippet(snippet)) for post, snippet in result.all()]
+
+    @classmethod
+    async def rebuild_search_index(cls, session: AsyncSession) -> None:
+        """
+        Перестроить полнотекстовый индекс post_fts по таблице post
+        и объединить его сегменты.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        await session.execute(text("INSERT INTO post_fts(post_fts) VALUES ('rebuild')"))
+        await session.execute(text("INSERT INTO post_fts(post_fts) VALUES ('optimize')"))
+        await session.commit()
+
     @classmethod
     async def put_a_like(
         cls,
         post_id: int,
         user: User,
         session: AsyncSession
-    ) -> PostLike:
+    ) -> Tuple[LikeStatus, Optional[PostLike]]:
         """
         Поставить лайк на пост.
+        Существование поста, запрет лайка своего поста и дубликаты проверяются
+        одним запросом INSERT ... SELECT с уникальным индексом по (post_id, user_id).
+        Причина отказа выясняется дополнительным запросом только при неудаче.
         :param post_id: Идентификатор поста, на который нужно поставить лайк.
         :param user: Объект пользователя, который ставит лайк.
         :param session: Асинхронная сессия SQLAlchemy.
-        :return: Объект лайка (PostLike) - информация о лайке.
+        :return: Статус операции (LikeStatus) и объект лайка (PostLike), если лайк поставлен.
         """
+        user_id = user.id
+        created_at = utc_now()
+        stmt = insert(PostLike).from_select(
+            ['post_id', 'user_id', 'created_at'],
+            select(
+                Post.id,
+                literal(user_id, Integer),
+                literal(created_at, DateTime)
+            ).where(Post.id == post_id, Post.user_id.is_not(user_id))
+        )
+        try:
+            result = await session.execute(stmt)
+        except IntegrityError:
+            await session.rollback()
+            return LikeStatus.ALREADY_EXISTS, None
+        if result.rowcount == 0:
+            await session.rollback()
+            owner_id = await cls.get_post_owner_id(post_id, session)
+            if owner_id is _POST_MISSING:
+                return LikeStatus.POST_NOT_FOUND, None
+            return LikeStatus.OWN_POST, None
+        await cls._shift_like_counters(post_id, user_id, 1, session)
+        await session.commit()
+        await post_response_cache.invalidate_post(post_id)
         like = PostLike(
+            id=result.lastrowid,
             post_id=post_id,
-            user_id=user.id
+            user_id=user_id,
+            created_at=created_at
         )
-        session.add(like)
-        await session.commit()
-        await session.refresh(like)
-        return like
+        return LikeStatus.CREATED, like
 
     @classmethod
     async def remove_like(
@@ -36,24 +353,360 @@ class CRUDPost(CRUDBase):
         post_id: int,
         user: User,
         session: AsyncSession
-    ) -> Optional[PostLike]:
+    ) -> LikeStatus:
         """
-        Удалить лайк с поста.
+        Удалить лайк с поста одним запросом DELETE.
         :param post_id: Идентификатор поста, с которого нужно удалить лайк.
         :param user: Объект пользователя, который удаляет лайк.
         :param session: Асинхронная сессия SQLAlchemy.
-        :return: Объект лайка (PostLike), если он был найден и удален, или None, если лайк не найден.
+        :return: Статус операции (LikeStatus).
         """
+        user_id = user.id
         result = await session.execute(
-            select(PostLike).where(
+            delete(PostLike).where(
                 PostLike.post_id == bindparam('post_id', post_id),
-                PostLike.user_id == user.id
+                PostLike.user_id == user_id
             )
         )
-        like = result.scalars().first()
-        await session.delete(like)
+        if result.rowcount == 0:
+            await session.rollback()
+            owner_id = await cls.get_post_owner_id(post_id, session)
+            if owner_id is _POST_MISSING:
+                return LikeStatus.POST_NOT_FOUND
+            return LikeStatus.NOT_FOUND
+        await cls._shift_like_counters(post_id, user_id, -1, session)
         await session.commit()
-        return like
+        await post_response_cache.invalidate_post(post_id)
+        return LikeStatus.REMOVED
+
+    @classmethod
+    async def put_likes_bulk(
+        cls,
+        post_ids: List[int],
+        user: User,
+        session: AsyncSession
+    ) -> List[LikeStatus]:
+        """
+        Поставить лайки на несколько постов в одной транзакции.
+        Проверки выполняются двумя запросами на весь набор (посты и уже
+        поставленные лайки), вставка - одним многострочным INSERT.
+        Если лайк на один из постов поставлен параллельным запросом,
+        проверка повторяется с учетом его записи, но не больше
+        LIKE_WRITE_ATTEMPTS раз; затем непоставленные лайки получают
+        статус CONFLICT.
+        :param post_ids: Идентификаторы постов.
+        :param user: Объект пользователя, который ставит лайки.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Статус (LikeStatus) для каждого элемента post_ids.
+        """
+        user_id = user.id
+        for _ in range(LIKE_WRITE_ATTEMPTS):
+            statuses, written = await cls._try_put_likes_bulk(post_ids, user_id, session)
+            if written:
+                return statuses
+        return [
+            LikeStatus.CONFLICT if like_status is LikeStatus.CREATED else like_status
+            for like_status in statuses
+        ]
+
+    @classmethod
+    async def _try_put_likes_bulk(
+        cls,
+        post_ids: List[int],
+        user_id: int,
+        session: AsyncSession
+    ) -> Tuple[List[LikeStatus], bool]:
+        """
+        Одна попытка put_likes_bulk.
+        :return: Статусы и False, если вставка нарушила уникальный индекс
+            и транзакция откатена.
+        """
+        unique_ids = set(post_ids)
+        owners = dict((await session.execute(
+            select(Post.id, Post.user_id).where(Post.id.in_(unique_ids))
+        )).all())
+        liked = set((await session.execute(
+            select(PostLike.post_id).where(
+                PostLike.user_id == user_id,
+                PostLike.post_id.in_(unique_ids)
+            )
+        )).scalars().all())
+        statuses = []
+        to_insert = []
+        for post_id in post_ids:
+            if post_id not in owners:
+                statuses.append(LikeStatus.POST_NOT_FOUND)
+            elif owners[post_id] == user_id:
+                statuses.append(LikeStatus.OWN_POST)
+            elif post_id in liked:
+                statuses.append(LikeStatus.ALREADY_EXISTS)
+            else:
+                liked.add(post_id)
+                to_insert.append(post_id)
+                statuses.append(LikeStatus.CREATED)
+        if not to_insert:
+            await session.rollback()
+            return statuses, True
+        created_at = utc_now()
+        try:
+            await session.execute(insert(PostLike).values([
+                {'post_id': post_id, 'user_id': user_id, 'created_at': created_at}
+                for post_id in to_insert
+            ]))
+        except IntegrityError:
+            await session.rollback()
+            return statuses, False
+        await session.execute(
+            update(Post)
+            .where(Post.id.in_(to_insert))
+            .values(like_count=Post.like_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(likes_given=User.likes_given + len(to_insert))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        for post_id in to_insert:
+            await post_response_cache.invalidate_post(post_id)
+        return statuses, True
+
+    @classmethod
+    async def apply_like_actions(
+        cls,
+        actions: Sequence[Tuple[LikeAction, int, int]],
+        session: AsyncSession
+    ) -> List[LikeStatus]:
+        """
+        Применить пачку операций с лайками в одной транзакции.
+        Операции выполняются по порядку над состоянием, прочитанным двумя
+        запросами на всю пачку; в базу записывается только итог по каждой паре
+        (пост, пользователь), так что лайк и его снятие внутри пачки
+        взаимно уничтожаются. Счетчики меняются одним executemany на таблицу.
+        Если лайк поставлен в обход очереди, пачка применяется заново
+        к актуальному состоянию, но не больше LIKE_WRITE_ATTEMPTS раз;
+        затем незаписанные операции получают статус CONFLICT.
+        :param actions: Операции (LikeAction, post_id, user_id).
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Статус (LikeStatus) для каждой операции.
+        """
+        for _ in range(LIKE_WRITE_ATTEMPTS):
+            statuses, written = await cls._try_apply_like_actions(actions, session)
+            if written:
+                return statuses
+        return [
+            LikeStatus.CONFLICT
+            if like_status in (LikeStatus.CREATED, LikeStatus.REMOVED) else like_status
+            for like_status in statuses
+        ]
+
+    @classmethod
+    async def _try_apply_like_actions(
+        cls,
+        actions: Sequence[Tuple[LikeAction, int, int]],
+        session: AsyncSession
+    ) -> Tuple[List[LikeStatus], bool]:
+        """
+        Одна попытка apply_like_actions.
+        :return: Статусы и False, если вставка нарушила уникальный индекс
+            и транзакция откатена.
+        """
+        post_ids = {post_id for _, post_id, _ in actions}
+        user_ids = {user_id for _, _, user_id in actions}
+        pairs = {(post_id, user_id) for _, post_id, user_id in actions}
+        owners = dict((await session.execute(
+            select(Post.id, Post.user_id).where(Post.id.in_(post_ids))
+        )).all())
+        # Для SELECT с (post_id, user_id) IN (VALUES ...) SQLite просматривает
+        # весь индекс postlike; два IN обслуживаются поиском по
+        # post_like_user_index, лишние пары отбрасываются здесь.
+        candidates = (await session.execute(
+            select(PostLike.post_id, PostLike.user_id).where(
+                PostLike.post_id.in_(post_ids),
+                PostLike.user_id.in_(user_ids)
+            )
+        )).all()
+        initial = {tuple(row) for row in candidates} & pairs
+        liked = set(initial)
+        statuses = []
+        for action, post_id, user_id in actions:
+            key = (post_id, user_id)
+            like_status, is_liked = resolve_like_action(
+                action, user_id, owners.get(post_id, _POST_MISSING), key in liked
+            )
+            statuses.append(like_status)
+            if is_liked:
+                liked.add(key)
+            else:
+                liked.discard(key)
+        to_insert = liked - initial
+        to_delete = initial - liked
+        if not to_insert and not to_delete:
+            await session.rollback()
+            return statuses, True
+        created_at = utc_now()
+        try:
+            if to_insert:
+                await session.execute(insert(PostLike).values([
+                    {'post_id': post_id, 'user_id': user_id, 'created_at': created_at}
+                    for post_id, user_id in to_insert
+                ]))
+            if to_delete:
+                await session.execute(
+                    delete(PostLike)
+                    .where(tuple_(PostLike.post_id, PostLike.user_id).in_(to_delete))
+                    .execution_options(synchronize_session=False)
+                )
+        except IntegrityError:
+            await session.rollback()
+            return statuses, False
+        post_deltas = Counter()
+        user_deltas = Counter()
+        for changed, delta in ((to_insert, 1), (to_delete, -1)):
+            for post_id, user_id in changed:
+                post_deltas[post_id] += delta
+                user_deltas[user_id] += delta
+        await cls._apply_counter_deltas(Post.__table__, 'like_count', post_deltas, session)
+        await cls._apply_counter_deltas(User.__table__, 'likes_given', user_deltas, session)
+        await session.commit()
+        for post_id in {post_id for post_id, _ in to_insert | to_delete}:
+            await post_response_cache.invalidate_post(post_id)
+        return statuses, True
+
+    @classmethod
+    async def _apply_counter_deltas(
+        cls,
+        table,
+        column_name: str,
+        deltas: Counter,
+        session: AsyncSession
+    ) -> None:
+        """
+        Изменить счетчик в нескольких строках одним executemany.
+        :param table: Таблица (Table) со счетчиком.
+        :param column_name: Имя колонки счетчика.
+        :param deltas: Изменение счетчика по идентификатору строки.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        params = [
+            {'row_id': row_id, 'delta': delta}
+            for row_id, delta in deltas.items() if delta
+        ]
+        if not params:
+            return
+        column = table.c[column_name]
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam('row_id'))
+            .values({column_name: column + bindparam('delta')}),
+            params
+        )
+
+    @classmethod
+    async def get_like_state(
+        cls,
+        post_id: int,
+        user_id: int,
+        session: AsyncSession
+    ) -> Tuple[Any, bool]:
+        """
+        Автор поста и наличие лайка пользователя одним запросом.
+        :param post_id: Идентификатор поста.
+        :param user_id: Идентификатор пользователя.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Идентификатор автора (или _POST_MISSING) и признак наличия лайка.
+        """
+        liked = (
+            select(PostLike.id)
+            .where(PostLike.post_id == Post.id, PostLike.user_id == user_id)
+            .exists()
+        )
+        row = (await session.execute(
+            select(Post.user_id, liked).where(Post.id == post_id)
+        )).first()
+        if row is None:
+            return _POST_MISSING, False
+        return row[0], bool(row[1])
+
+    @classmethod
+    async def _shift_like_counters(
+        cls,
+        post_id: int,
+        user_id: int,
+        delta: int,
+        session: AsyncSession
+    ) -> None:
+        """
+        Атомарно изменить счетчики Post.like_count и User.likes_given.
+        Выполняется в той же транзакции, что и изменение postlike.
+        :param post_id: Идентификатор поста.
+        :param user_id: Идентификатор пользователя, поставившего лайк.
+        :param delta: Величина изменения (+1 или -1).
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        await session.execute(
+            update(Post)
+            .where(Post.id == post_id)
+            .values(like_count=Post.like_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(likes_given=User.likes_given + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def recount_like_counters(cls, session: AsyncSession) -> None:
+        """
+        Пересчитать счетчики лайков всех постов и пользователей по таблице postlike.
+        Два массовых UPDATE с агрегирующими подзапросами в одной транзакции.
+        :param session: Асинхронная сессия SQLAlchemy.
+        """
+        post_likes = (
+            select(func.count(PostLike.id))
+            .where(PostLike.post_id == Post.id)
+            .scalar_subquery()
+        )
+        user_likes = (
+            select(func.count(PostLike.id))
+            .where(PostLike.user_id == User.id)
+            .scalar_subquery()
+        )
+        await session.execute(
+            update(Post)
+            .values(like_count=post_likes)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(User)
+            .values(likes_given=user_likes)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    @classmethod
+    async def get_post_owner_id(
+        cls,
+        post_id: int,
+        session: AsyncSession
+    ):
+        """
+        Получить идентификатор автора поста без загрузки ORM-объекта.
+        :param post_id: Идентификатор поста.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: Идентификатор автора или _POST_MISSING, если поста нет.
+        """
+        result = await session.execute(
+            select(Post.user_id).where(Post.id == post_id)
+        )
+        row = result.first()
+        if row is None:
+            return _POST_MISSING
+        return row.user_id
 
     @classmethod
     async def get_like_by_user_and_post_id(
@@ -80,4 +733,3 @@ class CRUDPost(CRUDBase):
 
 
 post_crud = CRUDPost(Post)
-
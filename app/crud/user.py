@@ -1,7 +1,8 @@
 from typing import Optional
 from app.crud.base import CRUDBase
-from app.models import PostLike, User
-from sqlalchemy import bindparam, func, select
+from app.crud.loader import get_loader
+from app.models import User
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -14,15 +15,31 @@ class CRUDUser(CRUDBase):
     ) -> int:
         """
         Получить количество лайков для указанного пользователя.
+        Читает денормализованный счетчик User.likes_given вместо COUNT(*) по postlike.
         :param user: Объект пользователя, для которого нужно получить количество лайков.
         :param session: Асинхронная сессия SQLAlchemy.
         :return: Количество лайков (int) для пользователя.
         """
-        stmt = select(func.count()).where(PostLike.user_id == bindparam('user_id', user.id))
+        stmt = select(User.likes_given).where(User.id == bindparam('user_id', user.id))
         result = await session.execute(stmt)
         likes_count = result.scalar()
         return likes_count
 
+    @classmethod
+    async def user_exists(
+        cls,
+        user_id: int,
+        session: AsyncSession
+    ) -> bool:
+        """
+        Проверяет существование пользователя по первичному ключу
+        (через загрузчик сессии, без повторных запросов в пределах запроса).
+        :param user_id: Идентификатор пользователя.
+        :param session: Асинхронная сессия SQLAlchemy.
+        :return: True, если пользователь существует.
+        """
+        return await get_loader(session).load(User, user_id) is not None
+
     @classmethod
     async def email_exists_in_db(
         cls,
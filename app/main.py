@@ -1,18 +1,66 @@
 from app.core.config import settings
 from app.api.routers import main_router
+from app.core.fast_json import default_response_class
+from app.core.indexes import check_indexes
 from app.core.init_db import create_first_superuser
+from app.core.like_writer import like_writer
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.password import password_helper
+from app.core.profiler import ProfilerMiddleware, profile_store
+from app.core.rate_limit import rate_limiter
+from app.core.revocation import revocation_store
+from app.core.user import auth_cache, jwt_strategy
+from app.utils.utils import email_verifier
 from fastapi import FastAPI
 
 
-app = FastAPI(title=settings.app_title)
+app = FastAPI(
+    title=settings.app_title,
+    default_response_class=default_response_class
+)
 
 app.include_router(main_router)
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    registry.add_collector('auth_cache', 'Кэш пользователей по JWT.', auth_cache.stats)
+    registry.add_collector('jwt_claims_cache', 'Кэш проверенных JWT.', jwt_strategy.claims_cache.stats)
+    registry.add_collector('email_verifier', 'Клиент проверки email.', email_verifier.stats)
+    registry.add_collector('like_writer', 'Очередь отложенной записи лайков.', like_writer.stats)
+    registry.add_collector('password_hasher', 'Пул хэширования паролей.', password_helper.stats)
+    registry.add_collector('rate_limit', 'Ограничение частоты запросов.', rate_limiter.stats)
+    registry.add_collector('revoked_tokens', 'Хранилище отозванных токенов.', revocation_store.stats)
+
+if settings.debug_profiler_enabled:
+    app.add_middleware(ProfilerMiddleware, store=profile_store)
+
 
 @app.on_event('startup')
 async def startup():
     """
     Функция, выполняющаяся при запуске приложения.
-    Вызывает создание первого суперпользователя, если указаны его email и пароль в настройках приложения.
+    Сверяет индексы моделей со схемой базы, запускает клиент проверки email
+    и очередь отложенной записи лайков (в режиме write_behind), загружает
+    отозванные токены и вызывает создание первого суперпользователя, если указаны его email
+    и пароль в настройках приложения.
     """
+    await check_indexes()
+    await email_verifier.start()
+    await revocation_store.start()
+    if settings.like_write_mode == 'write_behind':
+        await like_writer.start()
     await create_first_superuser()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    """
+    Функция, выполняющаяся при остановке приложения.
+    Записывает накопленные в очереди лайки, дожидается фоновой проверки
+    email, закрывает пул HTTP-соединений и пул хэширования паролей
+    и останавливает очистку отозванных токенов.
+    """
+    await like_writer.close()
+    await revocation_store.close()
+    await email_verifier.close()
+    password_helper.close()
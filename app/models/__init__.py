@@ -1,2 +1,4 @@
 from .user import User
 from .post import Post, PostLike
+from .follow import Follow, FeedItem
+from .token import RevokedToken
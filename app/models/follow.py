@@ -0,0 +1,37 @@
+from app.core.db import Base
+from app.models.post import utc_now
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+
+
+class Follow(Base):
+    """
+    Модель подписки пользователя (follower) на автора (followee).
+    """
+    follower_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    followee_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    created_at = Column(DateTime, default=utc_now)
+
+    # Одна подписка на пару (подписчик, автор); индекс по (followee_id, follower_id)
+    # обслуживает рассылку нового поста подписчикам автора.
+    __table_args__ = (
+        Index('ix_follow_follower_id_followee_id', 'follower_id', 'followee_id', unique=True),
+        Index('ix_follow_followee_id_follower_id', 'followee_id', 'follower_id'),
+    )
+
+
+class FeedItem(Base):
+    """
+    Модель записи материализованной ленты подписок: пост автора,
+    разосланный подписчику при создании (fan-out on write).
+    create_date копирует дату поста, чтобы страница ленты
+    выбиралась по одному индексу без сортировки.
+    """
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    post_id = Column(Integer, ForeignKey('post.id'), nullable=False)
+    author_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    create_date = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_feeditem_user_id_create_date', 'user_id', 'create_date', 'post_id'),
+        Index('ix_feeditem_post_id', 'post_id'),
+    )
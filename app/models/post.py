@@ -9,6 +9,16 @@ from sqlalchemy import (
     String,
     Text
 )
+from sqlalchemy.sql import column, table
+
+
+def utc_now() -> datetime:
+    """
+    Текущее время в UTC, вычисляется при каждой вставке.
+    Возвращается без tzinfo - в том виде, в каком SQLite хранит и отдает DateTime,
+    чтобы созданные без повторного SELECT объекты совпадали с прочитанными из базы.
+    """
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
 
 
 class Post(Base):
@@ -17,8 +27,17 @@ class Post(Base):
     """
     user_id = Column(Integer, ForeignKey('user.id'))
     text = Column(Text, nullable=False)
-    username = Column(String, nullable=False)
-    create_date = Column(DateTime, nullable=False, default=datetime.now(tz=timezone.utc))
+    username = Column(String, nullable=False, index=True)
+    create_date = Column(DateTime, nullable=False, default=utc_now)
+    # Денормализованный счетчик лайков, обновляется вместе с postlike.
+    like_count = Column(Integer, nullable=False, default=0, server_default='0')
+
+    # Индексы для keyset-пагинации общей ленты по (create_date, id)
+    # и ленты автора по (user_id, create_date, id).
+    __table_args__ = (
+        Index('ix_post_create_date_id', 'create_date', 'id'),
+        Index('ix_post_user_id_create_date', 'user_id', 'create_date', 'id'),
+    )
 
 
 class PostLike(Base):
@@ -27,6 +46,23 @@ class PostLike(Base):
     """
     post_id = Column(Integer, ForeignKey('post.id'))
     user_id = Column(Integer, ForeignKey('user.id'))
-    created_at = Column(DateTime, default=datetime.now(tz=timezone.utc))
-    index = Index('post_like_user_index', 'post_id', 'user_id')
+    created_at = Column(DateTime, default=utc_now)
+
+    # Один лайк на пару (пост, пользователь): на этом ограничении
+    # держится однозапросная постановка лайка в CRUDPost.put_a_like.
+    # Индекс по (user_id, post_id) обслуживает выборки лайков пользователя.
+    __table_args__ = (
+        Index('post_like_user_index', 'post_id', 'user_id', unique=True),
+        Index('ix_postlike_user_id_post_id', 'user_id', 'post_id'),
+    )
 
+
+# Полнотекстовый индекс FTS5 по тексту постов (rowid = post.id).
+# Создается и синхронизируется триггерами в миграции, поэтому описан
+# легковесной таблицей вне Base.metadata.
+post_fts = table(
+    'post_fts',
+    column('rowid', Integer),
+    column('text', Text),
+    column('rank'),
+)
@@ -0,0 +1,21 @@
+from app.core.db import Base
+from sqlalchemy import Column, DateTime, Index, String
+
+
+class RevokedToken(Base):
+    """
+    Модель отозванного токена (access или refresh) по его идентификатору jti.
+    Запись нужна только до истечения токена: после expires_at токен
+    отклоняется по claim exp, и запись удаляется фоновой очисткой.
+    id создается с AUTOINCREMENT: SQLite не выдает повторно номера удаленных
+    записей, поэтому процессы подгружают новые записи по id > последнего
+    прочитанного.
+    """
+    jti = Column(String(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_revokedtoken_jti', 'jti', unique=True),
+        Index('ix_revokedtoken_expires_at', 'expires_at'),
+        {'sqlite_autoincrement': True},
+    )
@@ -1,6 +1,6 @@
 from app.core.db import Base
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
 
@@ -9,4 +9,9 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     Модель для хранения данных о пользователе.
     """
     username = Column(String, nullable=False, unique=True, index=True)
+    # Денормализованный счетчик поставленных пользователем лайков.
+    likes_given = Column(Integer, nullable=False, default=0, server_default='0')
+    # Денормализованный счетчик подписчиков: по нему лента выбирает
+    # между рассылкой постов при записи и чтением постов автора при запросе.
+    followers_count = Column(Integer, nullable=False, default=0, server_default='0')
     liked_posts = relationship("PostLike", backref="liked_by_user")
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import List, Optional
+from app.core.config import settings
 from pydantic import BaseModel, Field, Extra
 
 
@@ -18,6 +21,13 @@ class PostCreate(PostBase):
     pass
 
 
+class PostBulkCreate(BaseModel):
+    """
+    Схема данных для массового создания постов.
+    """
+    items: List[PostCreate] = Field(..., min_items=1, max_items=settings.bulk_max_items)
+
+
 class PostUpdate(PostBase):
     """
     Схема данных для обновления существующего поста.
@@ -29,12 +39,38 @@ class PostInDB(PostBase):
     """
     Схема данных для представления поста из базы данных.
     """
+    id: int
     username: str
+    create_date: datetime
+    like_count: int = 0
 
     class Config:
         orm_mode = True
 
 
+class PostPage(BaseModel):
+    """
+    Схема данных для страницы ленты постов с курсором на следующую страницу.
+    """
+    items: List[PostInDB]
+    next_cursor: Optional[str] = None
+
+
+class PostSearchHit(PostInDB):
+    """
+    Схема данных для найденного поста с фрагментом текста.
+    """
+    snippet: str
+
+
+class PostSearchPage(BaseModel):
+    """
+    Схема данных для страницы результатов поиска постов.
+    """
+    items: List[PostSearchHit]
+    next_offset: Optional[int] = None
+
+
 class PostLikeBase(BaseModel):
     """
     Базовая схема для данных лайка поста.
@@ -50,9 +86,25 @@ class PostLikeCreate(PostLikeBase):
     pass
 
 
+class PostLikeBulkCreate(BaseModel):
+    """
+    Схема данных для массовой постановки лайков.
+    """
+    post_ids: List[int] = Field(..., min_items=1, max_items=settings.bulk_max_items)
+
+
+class PostLikeBulkResult(BaseModel):
+    """
+    Схема данных для результата постановки одного лайка в bulk-запросе.
+    """
+    post_id: int
+    status: int
+    detail: Optional[str] = None
+
+
 class PostLikeInDB(PostLikeBase):
     """
     Схема данных для представления лайка поста из базы данных.
     """
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
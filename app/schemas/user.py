@@ -23,8 +23,35 @@ class UserUpdate(schemas.BaseUserUpdate):
     pass
 
 
+class TokenPair(BaseModel):
+    """
+    Схема данных для ответа на вход и обновление токенов.
+    """
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+
+class RefreshTokenRequest(BaseModel):
+    """
+    Схема данных для обмена и отзыва refresh-токена.
+    """
+    refresh_token: str
+
+
 class UserLikesResponse(BaseModel):
     """
     Схема данных для представления количества лайков у пользователя.
     """
     my_likes_count: int
+
+
+class FollowInDB(BaseModel):
+    """
+    Схема данных для представления подписки на автора.
+    """
+    follower_id: int
+    followee_id: int
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import aiohttp
+from app.core.metrics import EMAIL_VERIFICATION_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Результаты Kickbox, которые не меняются от запроса к запросу и могут кэшироваться.
+CACHEABLE_RESULTS = ('deliverable', 'undeliverable', 'risky')
+# Причины отказа, относящиеся ко всему домену, а не к конкретному адресу.
+DOMAIN_REASONS = ('invalid_domain',)
+
+ResultCallback = Callable[[str, dict], Awaitable[None]]
+
+
+def unknown_result(reason: str) -> dict:
+    """
+    Ответ в формате Kickbox для случая, когда проверить адрес не удалось.
+    :param reason: Причина (timeout, circuit_open, http_error и т.п.).
+    """
+    return {'result': 'unknown', 'reason': reason}
+
+
+class EmailVerifier:
+    """
+    Клиент сервиса проверки email (Kickbox).
+    Держит один пул HTTP-соединений на все приложение, кэширует результаты
+    по адресу и домену, ограничивает время запроса и перестает обращаться
+    к сервису после серии ошибок (circuit breaker). По истечении
+    reset_timeout цепь полуоткрыта: к сервису уходит один пробный запрос,
+    успех замыкает цепь, ошибка снова размыкает ее. В фоновом режиме адреса
+    проверяются из очереди, не задерживая регистрацию.
+    :param url: URL метода verify сервиса проверки.
+    :param api_key: Ключ доступа к сервису.
+    :param timeout: Максимальное время запроса в секундах.
+    :param cache_ttl: Время жизни результата в кэше в секундах.
+    :param cache_size: Максимальное количество записей в кэше.
+    :param failure_threshold: Количество ошибок подряд, после которого цепь размыкается.
+    :param reset_timeout: Время в секундах, на которое размыкается цепь.
+    :param pool_size: Максимальное количество одновременных соединений.
+    :param queue_size: Максимальная длина очереди фоновой проверки.
+    :param batch_size: Сколько адресов из очереди проверяется одновременно.
+    """
+    def __init__(
+            self,
+            url: str,
+            api_key: Optional[str],
+            timeout: float,
+            cache_ttl: int,
+            cache_size: int,
+            failure_threshold: int,
+            reset_timeout: int,
+            pool_size: int = 20,
+            queue_size: int = 1000,
+            batch_size: int = 10
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.pool_size = pool_size
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: 'OrderedDict[str, Tuple[float, dict]]' = OrderedDict()
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial_running = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Создает пул соединений и запускает обработчик фоновой очереди.
+        Вызывается при старте приложения.
+        """
+        self._get_session()
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = asyncio.create_task(self._run_worker())
+
+    async def close(self) -> None:
+        """
+        Дожидается обработки очереди, останавливает обработчик и закрывает пул.
+        Вызывается при остановке приложения.
+        """
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def verify(self, email: str) -> dict:
+        """
+        Проверить email: из кэша или запросом к сервису.
+        :param email: Проверяемый адрес.
+        :return: Ответ сервиса (dict) с ключом result.
+        """
+        email = email.lower()
+        domain = email.rpartition('@')[2]
+        cached = self._cache_get(email) or self._cache_get('@' + domain)
+        if cached is not None:
+            return cached
+        state = self.circuit_state()
+        if state == 'open' or (state == 'half_open' and self._trial_running):
+            return unknown_result('circuit_open')
+        self._trial_running = state == 'half_open'
+        try:
+            result = await self._request(email)
+        finally:
+            self._trial_running = False
+        if result.get('result') in CACHEABLE_RESULTS:
+            key = email
+            if result.get('reason') in DOMAIN_REASONS:
+                key = '@' + domain
+            self._cache_set(key, result)
+        return result
+
+    def verify_later(self, email: str, callback: ResultCallback) -> bool:
+        """
+        Поставить email в очередь фоновой проверки.
+        :param email: Проверяемый адрес.
+        :param callback: Корутина, которой будет передан результат проверки.
+        :return: False, если очередь не запущена или переполнена.
+        """
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait((email, callback))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def circuit_state(self) -> str:
+        """
+        Состояние цепи: closed, open или half_open (можно выполнить пробный запрос).
+        """
+        if not self._open_until:
+            return 'closed'
+        if self._open_until > time.monotonic():
+            return 'open'
+        return 'half_open'
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Состояние клиента: размер кэша, длина очереди, ошибки подряд и состояние цепи.
+        """
+        return {
+            'cache_size': len(self._cache),
+            'queue_size': self._queue.qsize() if self._queue is not None else 0,
+            'failures': self._failures,
+            'circuit_open': int(self.circuit_state() == 'open'),
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            )
+        return self._session
+
+    async def _request(self, email: str) -> dict:
+        # Таймаут через wait_for: запрос выполняется в отдельной задаче,
+        # и отмена по таймауту не затрагивает задачу обработки HTTP-запроса.
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            status, result = await asyncio.wait_for(self._fetch(email), self.timeout)
+            if status >= 500:
+                outcome = 'http_error'
+                self._record_failure()
+                return unknown_result('http_error')
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            self._record_failure()
+            return unknown_result('timeout')
+        except (aiohttp.ClientError, ValueError):
+            outcome = 'http_error'
+            self._record_failure()
+            return unknown_result('http_error')
+        finally:
+            EMAIL_VERIFICATION_DURATION.observe(time.perf_counter() - started, outcome)
+        self._failures = 0
+        self._open_until = 0.0
+        return result
+
+    async def _fetch(self, email: str) -> Tuple[int, dict]:
+        params = {'email': email, 'apikey': self.api_key or ''}
+        async with self._get_session().get(self.url, params=params) as response:
+            if response.status >= 500:
+                return response.status, {}
+            return response.status, await response.json(content_type=None)
+
+    def _record_failure(self) -> None:
+        if self._open_until:
+            # Ошибка пробного запроса: цепь снова размыкается сразу.
+            self._open_until = time.monotonic() + self.reset_timeout
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._open_until = time.monotonic() + self.reset_timeout
+            self._failures = 0
+
+    def _cache_get(self, key: str) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return result
+
+    def _cache_set(self, key: str, result: dict) -> None:
+        if self.cache_ttl <= 0 or self.cache_size <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _run_worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.gather(
+                    *(self._verify_and_report(email, callback) for email, callback in batch)
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _verify_and_report(self, email: str, callback: ResultCallback) -> None:
+        try:
+            await callback(email, await self.verify(email))
+        except Exception:
+            logger.exception('Ошибка фоновой проверки email %s', email)
@@ -0,0 +1,30 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(create_date: datetime, obj_id: int) -> str:
+    """
+    Кодирует позицию в ленте в непрозрачный курсор.
+    :param create_date: Дата создания последнего объекта на странице.
+    :param obj_id: Идентификатор последнего объекта на странице.
+    :return: Курсор (str) в формате urlsafe base64.
+    """
+    raw = f'{create_date.isoformat()}|{obj_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Декодирует курсор, полученный от encode_cursor.
+    :param cursor: Непрозрачный курсор.
+    :raises ValueError: Если курсор поврежден.
+    :return: Кортеж (create_date, id).
+    """
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        create_date, obj_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(create_date), int(obj_id)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError('Invalid cursor') from error
@@ -0,0 +1,35 @@
+import html
+
+# Границы найденных слов во фрагменте snippet(): управляющие символы,
+# которых нет в обычном тексте, заменяются тегами после экранирования.
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def build_match_query(text: str) -> str:
+    """
+    Преобразует пользовательский запрос в выражение MATCH для FTS5.
+    Каждое слово берется в кавычки, поэтому операторы FTS5 (AND, OR, NEAR,
+    *, :, скобки) в тексте запроса не интерпретируются; слова объединяются по И.
+    :param text: Строка поиска от пользователя.
+    :raises ValueError: Если в запросе нет ни одного слова.
+    :return: Выражение для post_fts MATCH.
+    """
+    words = text.split()
+    if not words:
+        raise ValueError('Пустой поисковый запрос')
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def render_snippet(snippet: str) -> str:
+    """
+    HTML-фрагмент найденного поста: текст поста экранируется, найденные
+    слова выделяются тегами <mark>.
+    :param snippet: Результат snippet() с границами SNIPPET_START и SNIPPET_END.
+    :return: Фрагмент, безопасный для вставки в HTML.
+    """
+    return (
+        html.escape(snippet)
+        .replace(SNIPPET_START, '<mark>')
+        .replace(SNIPPET_END, '</mark>')
+    )
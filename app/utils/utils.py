@@ -1,16 +1,16 @@
-import aiohttp
-import os
-from dotenv import load_dotenv
+from app.core.config import settings
+from app.utils.email_verifier import EmailVerifier
 
-load_dotenv()
-
-kickbox_api_key = os.getenv("KICKBOX_API_KEY")
+email_verifier = EmailVerifier(
+    url=settings.kickbox_url,
+    api_key=settings.kickbox_api_key,
+    timeout=settings.email_verification_timeout,
+    cache_ttl=settings.email_verification_cache_ttl,
+    cache_size=settings.email_verification_cache_size,
+    failure_threshold=settings.email_verification_failure_threshold,
+    reset_timeout=settings.email_verification_reset_timeout,
+)
 
 
 async def check_email_async(email: str) -> dict:
-    url = "https://api.kickbox.com/v2/verify"
-    params = {"email": email, "apikey": kickbox_api_key}
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
-            return await response.json()
+    return await email_verifier.verify(email)
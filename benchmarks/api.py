@@ -0,0 +1,542 @@
+"""
+Нагрузочный бенчмарк API.
+Создает отдельную базу SQLite, наполняет ее пользователями, постами,
+лайками и подписками через модели app/models, поднимает локальную
+заглушку Kickbox и вызывает приложение app.main:app в том же процессе
+(ASGI, без сети). Для каждого сценария выводит p50/p95/p99 и пропускную
+способность и сохраняет результаты в JSON для сравнения между коммитами.
+
+Запуск:
+    python -m benchmarks.api --output bench.json
+    python -m benchmarks.api --scenarios feed,like_storm --compare bench.json
+
+Настройки приложения берутся из переменных окружения, как обычно
+(например, LIKE_WRITE_MODE=write_behind); DATABASE_URL и KICKBOX_URL
+задает бенчмарк.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+SCENARIOS = (
+    'feed', 'following_feed', 'read_post', 'like_storm', 'my_likes',
+    'register', 'login', 'login_storm',
+)
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга.
+    :param values: Отсортированный список значений.
+    :param percent: Перцентиль от 0 до 100.
+    """
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class ASGIClient:
+    """
+    Минимальный HTTP-клиент, вызывающий ASGI-приложение напрямую.
+    :param app: ASGI-приложение.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+            self,
+            method: str,
+            path: str,
+            headers: Optional[Dict[str, str]] = None,
+            json_body=None,
+            form: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        """
+        Выполнить запрос.
+        :return: Код ответа и тело ответа.
+        """
+        raw_headers = [(b'host', b'bench')]
+        body = b''
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            raw_headers.append((b'content-type', b'application/json'))
+        elif form is not None:
+            body = urlencode(form).encode()
+            raw_headers.append((b'content-type', b'application/x-www-form-urlencoded'))
+        if body:
+            raw_headers.append((b'content-length', str(len(body)).encode()))
+        for name, value in (headers or {}).items():
+            raw_headers.append((name.lower().encode(), value.encode()))
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': raw_headers,
+            'client': ('127.0.0.1', 50000),
+            'server': ('bench', 80),
+        }
+        request_sent = False
+        response_done = asyncio.Event()
+        status = [0]
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await response_done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    response_done.set()
+
+        await self.app(scope, receive, send)
+        response_done.set()
+        return status[0], b''.join(chunks)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def start_kickbox_stub(port: int, delay_ms: float):
+    """
+    Локальная заглушка Kickbox: всегда deliverable, с задержкой delay_ms.
+    :return: Runner aiohttp, который нужно остановить вызовом cleanup().
+    """
+    from aiohttp import web
+
+    async def verify(request):
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        return web.json_response({'result': 'deliverable', 'reason': 'accepted_email'})
+
+    stub = web.Application()
+    stub.router.add_get('/v2/verify', verify)
+    runner = web.AppRunner(stub)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+def prepare_database(path: str) -> None:
+    """
+    Удаляет старую базу бенчмарка и применяет миграции.
+    """
+    for suffix in ('', '-wal', '-shm'):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path + suffix)
+    from alembic import command
+    from alembic.config import Config
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(root, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(root, 'alembic'))
+    command.upgrade(config, 'head')
+
+
+async def seed_database(args, rng: random.Random) -> Dict[str, float]:
+    """
+    Наполняет базу: пользователи, посты и лайки - сидером app.core.seed,
+    затем подписки, счетчики подписчиков и материализованные ленты подписок.
+    :return: Количество созданных строк и время наполнения.
+    """
+    from app.core.db import AsyncSessionLocal, engine
+    from app.core.seed import Seeder
+    from app.models import Post, User
+    from app.models.follow import FeedItem, Follow
+    from sqlalchemy import func, insert, select, update
+
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        seeded = await Seeder(rng, password=BENCH_PASSWORD).seed(
+            conn, args.users, args.posts, args.likes
+        )
+    now = datetime.utcnow()
+    follows = []
+    follows_per_user = min(args.follows, args.users - 1)
+    for follower_id in range(1, args.users + 1):
+        followees = [
+            followee_id
+            for followee_id in rng.sample(range(1, args.users + 1), follows_per_user + 1)
+            if followee_id != follower_id
+        ][:follows_per_user]
+        follows.extend(
+            {'follower_id': follower_id, 'followee_id': followee_id, 'created_at': now}
+            for followee_id in followees
+        )
+    async with AsyncSessionLocal() as session:
+        if follows:
+            await session.execute(insert(Follow), follows)
+        followers = (
+            select(func.count())
+            .where(Follow.followee_id == User.id)
+            .scalar_subquery()
+        )
+        await session.execute(update(User).values(followers_count=followers))
+        await session.execute(
+            insert(FeedItem).from_select(
+                ['user_id', 'post_id', 'author_id', 'create_date'],
+                select(Follow.follower_id, Post.id, Post.user_id, Post.create_date)
+                .join(Follow, Follow.followee_id == Post.user_id)
+            )
+        )
+        await session.commit()
+    return {
+        'users': seeded['users'],
+        'posts': seeded['posts'],
+        'likes': seeded['likes'],
+        'follows': len(follows),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_scenario(
+        name: str,
+        make_request: Callable[[int], Tuple[str, str, dict]],
+        client: ASGIClient,
+        requests: int,
+        concurrency: int,
+        warmup: int
+) -> dict:
+    """
+    Выполняет запросы сценария с заданной конкурентностью.
+    :param make_request: Функция номера запроса, возвращающая (метод, путь, параметры).
+    :return: Задержки, пропускная способность и распределение кодов ответа.
+    """
+    async def call(index: int) -> Tuple[float, int]:
+        method, path, kwargs = make_request(index)
+        started = time.perf_counter()
+        status, _ = await client.request(method, path, **kwargs)
+        return time.perf_counter() - started, status
+
+    async def worker(indexes, latencies, statuses):
+        for index in indexes:
+            latency, status = await call(index)
+            if latencies is not None:
+                latencies.append(latency)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    async def run(offset: int, count: int, latencies, statuses):
+        workers = min(concurrency, count)
+        await asyncio.gather(*(
+            worker(range(offset + number, offset + count, workers), latencies, statuses)
+            for number in range(workers)
+        ))
+
+    # Приложение печатает в stdout на каждую регистрацию; в отчет это не попадает.
+    with contextlib.redirect_stdout(io.StringIO()):
+        if warmup:
+            await run(0, warmup, None, None)
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        await run(warmup, requests, latencies, statuses)
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 500)
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'duration_s': round(elapsed, 4),
+        'throughput_rps': round(requests / elapsed, 1) if elapsed else 0.0,
+        # Приложение и клиент работают в одном процессе: время процессора
+        # на запрос включает оба, но сравнимо между запусками.
+        'cpu_ms_per_request': round(cpu / requests * 1000, 3) if requests else 0.0,
+        'latency_ms': {
+            'min': round(latencies[0] * 1000, 3) if latencies else 0.0,
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def build_scenarios(args, rng: random.Random, tokens: Dict[int, str], run_id: str):
+    """
+    Генераторы запросов для каждого сценария.
+    """
+    user_ids = list(tokens)
+
+    def auth(user_id: int) -> dict:
+        return {'Authorization': f'Bearer {tokens[user_id]}'}
+
+    def feed(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        # Каждый пятый запрос - первая страница, остальные - страницы
+        # со случайной позиции по курсору.
+        path = f'/Post/?limit={args.page_size}'
+        if index % 5 and args.posts > args.page_size:
+            from app.utils.pagination import encode_cursor
+            offset = rng.randint(1, args.posts - args.page_size)
+            created = datetime.utcnow() - timedelta(seconds=offset)
+            path += '&cursor=' + encode_cursor(created, args.posts - offset)
+        return 'GET', path, {'headers': auth(user_id)}
+
+    def following_feed(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        return 'GET', f'/users/me/feed?limit={args.page_size}', {'headers': auth(user_id)}
+
+    def read_post(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        return 'GET', f'/Post{rng.randint(1, max(args.posts, 1))}', {'headers': auth(user_id)}
+
+    hot_posts = max(1, min(args.hot_posts, args.posts))
+
+    def like_storm(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        post_id = rng.randint(1, hot_posts)
+        if rng.random() < 0.5:
+            return 'POST', f'/Post{post_id}/like', {'headers': auth(user_id)}
+        return 'DELETE', f'/Post{post_id}/remove_like', {'headers': auth(user_id)}
+
+    def my_likes(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        return 'GET', '/Post/my_likes', {'headers': auth(user_id)}
+
+    def register(index: int):
+        return 'POST', '/auth/register', {'json_body': {
+            'email': f'new{run_id}_{index}@bench.example',
+            'password': BENCH_PASSWORD,
+            'username': f'new{run_id}_{index}',
+        }}
+
+    def login(index: int):
+        user_id = rng.randint(1, args.users)
+        return 'POST', '/auth/jwt/login', {'form': {
+            'username': f'seed{user_id}@seed.example',
+            'password': BENCH_PASSWORD,
+        }}
+
+    return {
+        'feed': feed,
+        'following_feed': following_feed,
+        'read_post': read_post,
+        'like_storm': like_storm,
+        'my_likes': my_likes,
+        'register': register,
+        'login': login,
+    }
+
+
+async def run_login_storm(args, scenarios, client: ASGIClient) -> dict:
+    """
+    Сценарий read_post на фоне непрерывного потока входов
+    (--storm-concurrency одновременных логинов): показывает, задерживает ли
+    хэширование паролей обработку остальных запросов.
+    """
+    stop = asyncio.Event()
+    logins = [0]
+
+    async def storm(worker: int) -> None:
+        index = worker
+        while not stop.is_set():
+            method, path, kwargs = scenarios['login'](index)
+            await client.request(method, path, **kwargs)
+            logins[0] += 1
+            index += args.storm_concurrency
+
+    tasks = [asyncio.create_task(storm(worker)) for worker in range(args.storm_concurrency)]
+    try:
+        result = await run_scenario(
+            'read_post', scenarios['read_post'], client, args.requests,
+            args.concurrency, min(args.warmup, args.requests)
+        )
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+    result['background_logins'] = logins[0]
+    return result
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    def git(*command) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ['git', *command], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(status) if status is not None else None}
+
+
+async def run_benchmark(args) -> dict:
+    rng = random.Random(args.seed)
+    runner = await start_kickbox_stub(args.kickbox_port, args.kickbox_delay_ms)
+    try:
+        from app.core.config import settings
+        from app.core.user import jwt_strategy
+        from app.main import app
+        from app.models import User
+
+        seeded = await seed_database(args, rng)
+        await app.router.startup()
+        client = ASGIClient(app)
+        tokens = {}
+        for user_id in range(1, min(args.clients, args.users) + 1):
+            tokens[user_id] = await jwt_strategy.write_token(User(id=user_id))
+        scenarios = build_scenarios(args, rng, tokens, str(args.seed or int(time.time())))
+        results = {}
+        for name in args.scenarios:
+            if name == 'login_storm':
+                results[name] = await run_login_storm(args, scenarios, client)
+                print_result(name, results[name])
+                continue
+            requests = args.auth_requests if name in ('register', 'login') else args.requests
+            results[name] = await run_scenario(
+                name, scenarios[name], client, requests, args.concurrency,
+                min(args.warmup, requests)
+            )
+            print_result(name, results[name])
+        await app.router.shutdown()
+    finally:
+        await runner.cleanup()
+    return {
+        **git_revision(),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'parameters': {
+            key: value for key, value in vars(args).items()
+            if key not in ('output', 'compare', 'kickbox_port')
+        },
+        'settings': {
+            key: getattr(settings, key) for key in (
+                'db_pool_size', 'db_read_pool_size', 'sqlite_journal_mode',
+                'sqlite_synchronous', 'like_write_mode', 'like_durability',
+                'response_cache_enabled', 'auth_cache_ttl_seconds', 'fast_json_enabled',
+                'email_verification_mode', 'metrics_enabled', 'debug_profiler_enabled',
+            )
+        },
+        'seed': seeded,
+        'scenarios': results,
+    }
+
+
+def print_result(name: str, result: dict) -> None:
+    latency = result['latency_ms']
+    print(
+        f'{name:<15} {result["throughput_rps"]:>9.1f} rps  '
+        f'cpu {result.get("cpu_ms_per_request", 0.0):>7.2f} ms/запрос  '
+        f'p50 {latency["p50"]:>8.2f}  p95 {latency["p95"]:>8.2f}  '
+        f'p99 {latency["p99"]:>8.2f} ms  статусы {result["statuses"]}'
+    )
+
+
+def print_comparison(current: dict, previous: dict) -> None:
+    """
+    Изменение пропускной способности и перцентилей относительно
+    предыдущего запуска (в процентах; для задержек меньше - лучше).
+    """
+    print(f'\nСравнение с {previous.get("commit") or "предыдущим запуском"}:')
+    for name, result in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        changes = []
+        for label, now_value, old_value in (
+                ('rps', result['throughput_rps'], before['throughput_rps']),
+                ('cpu', result['cpu_ms_per_request'], before.get('cpu_ms_per_request', 0.0)),
+                ('p50', result['latency_ms']['p50'], before['latency_ms']['p50']),
+                ('p95', result['latency_ms']['p95'], before['latency_ms']['p95']),
+                ('p99', result['latency_ms']['p99'], before['latency_ms']['p99']),
+        ):
+            delta = (now_value - old_value) / old_value * 100 if old_value else 0.0
+            changes.append(f'{label} {delta:+6.1f}%')
+        print(f'{name:<15} ' + '  '.join(changes))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный бенчмарк API.')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'benchmark.db'),
+                        help='Файл базы SQLite бенчмарка (пересоздается).')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--likes', type=int, default=50000)
+    parser.add_argument('--follows', type=int, default=20, help='Подписок на пользователя.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'Сценарии через запятую: {", ".join(SCENARIOS)}.')
+    parser.add_argument('--requests', type=int, default=2000, help='Запросов на сценарий.')
+    parser.add_argument('--auth-requests', type=int, default=100,
+                        help='Запросов в сценариях register и login (хэширование пароля медленное).')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--storm-concurrency', type=int, default=20,
+                        help='Одновременных входов в сценарии login_storm.')
+    parser.add_argument('--warmup', type=int, default=100, help='Неучитываемых запросов перед замером.')
+    parser.add_argument('--clients', type=int, default=200, help='Пользователей, от имени которых идут запросы.')
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--hot-posts', type=int, default=50, help='Постов, на которые идет поток лайков.')
+    parser.add_argument('--kickbox-delay-ms', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42, help='Зерно генератора случайных чисел.')
+    parser.add_argument('--output', help='Файл JSON для результатов.')
+    parser.add_argument('--compare', help='Файл JSON предыдущего запуска для сравнения.')
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'неизвестные сценарии: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    args.kickbox_port = free_port()
+    # Настройки приложения читаются при импорте, поэтому окружение
+    # задается до импорта модулей app.
+    os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{os.path.abspath(args.db)}'
+    os.environ.pop('READ_DATABASE_URL', None)
+    os.environ['KICKBOX_URL'] = f'http://127.0.0.1:{args.kickbox_port}/v2/verify'
+    os.environ.setdefault('KICKBOX_API_KEY', 'bench')
+    # Сценарии нагружают запись от нескольких пользователей с одного адреса:
+    # ограничение частоты иначе измерялось бы вместо эндпоинтов.
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    prepare_database(os.path.abspath(args.db))
+    report = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            print_comparison(report, json.load(file))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+"""
+Бенчмарк сборки страницы ленты постов.
+Сравнивает процессорное время на страницу (по умолчанию 1000 постов,
+больше POSTS_PAGE_MAX_LIMIT, чтобы сериализация преобладала над запросом):
+  - orm_pydantic - get_posts_page, схема PostPage и BaseModel.json
+    (путь по умолчанию);
+  - orm_orjson - тот же путь, но JSON кодирует orjson (serialize
+    при FAST_JSON_ENABLED=true: поиск, лента подписок, пост);
+  - rows_orjson - get_posts_page_rows и make_post_page_json
+    (страницы ленты и постов автора при FAST_JSON_ENABLED=true).
+Все варианты выполняют один и тот же запрос; результат каждого сверяется
+с orm_pydantic байт в байт. Нужен пакет orjson.
+
+Запуск:
+    python -m benchmarks.serialization --posts 20000 --page-size 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.api import git_revision, prepare_database
+
+
+async def measure(
+        build: Callable[[int], Awaitable[bytes]],
+        pages: int
+) -> Dict[str, float]:
+    """
+    Процессорное и общее время сборки страницы.
+    :param build: Корутина, собирающая страницу по ее номеру.
+    :param pages: Количество страниц.
+    """
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    size = 0
+    for number in range(pages):
+        size += len(await build(number))
+    return {
+        'cpu_ms_per_page': round((time.process_time() - cpu_started) / pages * 1000, 3),
+        'wall_ms_per_page': round((time.perf_counter() - started) / pages * 1000, 3),
+        'bytes_per_page': size // pages,
+    }
+
+
+async def run_benchmark(args) -> dict:
+    from app.api.endpoints.post import make_post_page, make_post_page_json
+    from app.core.db import AsyncReadSessionLocal, engine
+    from app.core.fast_json import dumps
+    from app.core.seed import Seeder
+    from app.crud.post import post_crud
+    from app.models import Post
+    from sqlalchemy import select
+
+    rng = random.Random(args.seed)
+    async with engine.connect() as conn:
+        await Seeder(rng).seed(conn, args.users, args.posts, 0)
+    async with AsyncReadSessionLocal() as session:
+        positions = (await session.execute(
+            select(Post.create_date, Post.id)
+            .order_by(Post.create_date.desc(), Post.id.desc())
+        )).all()
+    # Страницы начинаются с разных позиций ленты: первая - без курсора.
+    step = max(1, (len(positions) - args.page_size) // args.pages)
+    afters: List[Optional[Tuple]] = [None] + [
+        tuple(positions[index])
+        for index in range(step, len(positions) - args.page_size, step)
+    ]
+
+    def after_for(number: int) -> Optional[Tuple]:
+        return afters[number % len(afters)]
+
+    async def orm_pydantic(number: int) -> bytes:
+        async with AsyncReadSessionLocal() as session:
+            posts = await post_crud.get_posts_page(session, args.page_size, after_for(number))
+            return make_post_page(posts, args.page_size).json(
+                exclude_none=True, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+
+    async def orm_orjson(number: int) -> bytes:
+        async with AsyncReadSessionLocal() as session:
+            posts = await post_crud.get_posts_page(session, args.page_size, after_for(number))
+            return dumps(make_post_page(posts, args.page_size).dict(exclude_none=True))
+
+    async def rows_orjson(number: int) -> bytes:
+        async with AsyncReadSessionLocal() as session:
+            rows = await post_crud.get_posts_page_rows(session, args.page_size, after_for(number))
+            return make_post_page_json(rows, args.page_size)
+
+    variants = {
+        'orm_pydantic': orm_pydantic,
+        'orm_orjson': orm_orjson,
+        'rows_orjson': rows_orjson,
+    }
+    for number in range(min(args.pages, len(afters))):
+        expected = await orm_pydantic(number)
+        for name, build in variants.items():
+            if await build(number) != expected:
+                raise AssertionError(f'{name}: ответ отличается от orm_pydantic')
+    results = {}
+    for name, build in variants.items():
+        await measure(build, args.warmup)
+        results[name] = await measure(build, args.pages)
+    return {
+        **git_revision(),
+        'parameters': {
+            key: value for key, value in vars(args).items() if key != 'output'
+        },
+        'results': results,
+    }
+
+
+def print_results(report: dict) -> None:
+    baseline = report['results']['orm_pydantic']['cpu_ms_per_page']
+    for name, result in report['results'].items():
+        print(
+            f'{name:<13} cpu {result["cpu_ms_per_page"]:>8.2f} ms/стр  '
+            f'wall {result["wall_ms_per_page"]:>8.2f} ms/стр  '
+            f'{baseline / result["cpu_ms_per_page"]:>5.2f}x  '
+            f'{result["bytes_per_page"]} байт'
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк сборки страницы ленты постов.')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'serialization.db'),
+                        help='Файл базы SQLite бенчмарка (пересоздается).')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--pages', type=int, default=50, help='Замеряемых страниц на вариант.')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Сохранить результаты в JSON.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    # Настройки приложения читаются при импорте, поэтому окружение
+    # задается до импорта модулей app.
+    os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{os.path.abspath(args.db)}'
+    os.environ.pop('READ_DATABASE_URL', None)
+    prepare_database(os.path.abspath(args.db))
+    report = asyncio.run(run_benchmark(args))
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Бенчмарк профиля движка SQLite под параллельной записью.
+Сравнивает на отдельных файлах базы:
+  - default - create_async_engine(url) без PRAGMA и настроек пула
+    (журнал DELETE, ожидание блокировки по умолчанию драйвера);
+  - tuned - профиль приложения из app/core/db.py: PRAGMA из настроек
+    (WAL, synchronous, busy_timeout, ...), пул на одно пишущее соединение
+    и отдельный движок чтения только для чтения.
+Параллельные писатели ставят лайки (CRUDPost.put_a_like) и создают посты
+(CRUDPost.create_object), читатели в это время листают ленту. Для каждого
+профиля выводятся записи в секунду и число ошибок "database is locked".
+
+Запуск:
+    python -m benchmarks.sqlite_profile --writers 32 --writes 20 --readers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.api import git_revision
+
+PROFILES = ('default', 'tuned')
+
+
+def create_engines(profile: str, path: str):
+    """
+    Движки записи и чтения профиля для файла базы path.
+    """
+    from app.core.config import settings
+    from app.core.db import (get_engine_options, get_sqlite_pragmas,
+                             set_sqlite_pragmas)
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = f'sqlite+aiosqlite:///{path}'
+    if profile == 'default':
+        engine = create_async_engine(url)
+        return engine, engine
+    engine = create_async_engine(url, **get_engine_options(
+        url, settings.db_pool_size, settings.db_max_overflow, f'{profile}-write'
+    ))
+    event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas(get_sqlite_pragmas()))
+    read_url = f'sqlite+aiosqlite:///file:{path}?mode=ro&uri=true'
+    read_engine = create_async_engine(read_url, **get_engine_options(
+        url, settings.db_read_pool_size, settings.db_read_max_overflow, f'{profile}-read'
+    ))
+    event.listen(
+        read_engine.sync_engine, 'connect', set_sqlite_pragmas(get_sqlite_pragmas(read_only=True))
+    )
+    return engine, read_engine
+
+
+async def prepare(engine, users: int, posts: int) -> None:
+    """
+    Схема приложения и начальные пользователи и посты.
+    """
+    from app.core.db import Base
+    from app.models import Post, User
+    from app.models.post import utc_now
+    from sqlalchemy import insert
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {
+                'id': user_id, 'email': f'writer{user_id}@example.com', 'hashed_password': '-',
+                'is_active': True, 'is_superuser': False, 'is_verified': True,
+                'username': f'writer{user_id}',
+            }
+            for user_id in range(1, users + 1)
+        ])
+        await conn.execute(insert(Post), [
+            {
+                'id': post_id, 'user_id': post_id % users + 1, 'text': f'post {post_id}',
+                'username': f'writer{post_id % users + 1}', 'create_date': utc_now(),
+            }
+            for post_id in range(1, posts + 1)
+        ])
+
+
+async def run_profile(profile: str, path: str, args) -> Dict[str, float]:
+    """
+    Параллельная запись и чтение на профиле profile.
+    :param profile: default или tuned.
+    :param path: Файл базы (пересоздается).
+    :param args: Параметры нагрузки (writers, writes, readers, users, posts, seed).
+    :return: Записи в секунду, успешные записи и ошибки блокировки.
+    """
+    from app.crud.post import post_crud
+    from app.models import User
+    from app.schemas.post import PostCreate
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import sessionmaker
+
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    engine, read_engine = create_engines(profile, path)
+    await prepare(engine, args.users, args.posts)
+    write_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    read_session = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    async with read_session() as session:
+        users = [await session.get(User, user_id) for user_id in range(1, args.users + 1)]
+    rng = random.Random(args.seed)
+    counters = {'writes': 0, 'lock_errors': 0}
+    writing = True
+
+    async def writer(number: int) -> None:
+        user = users[number % len(users)]
+        for write in range(args.writes):
+            try:
+                async with write_session() as session:
+                    if write % 4:
+                        await post_crud.put_a_like(rng.randint(1, args.posts), user, session)
+                    else:
+                        await post_crud.create_object(PostCreate(text=f'w{number}'), session, user)
+                counters['writes'] += 1
+            except OperationalError as error:
+                if 'locked' not in str(error):
+                    raise
+                counters['lock_errors'] += 1
+
+    async def reader() -> None:
+        while writing:
+            async with read_session() as session:
+                await post_crud.get_posts_page(session, 50, None)
+            await asyncio.sleep(0.01)
+
+    readers = [asyncio.ensure_future(reader()) for _ in range(args.readers)]
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(number) for number in range(args.writers)))
+    elapsed = time.perf_counter() - started
+    writing = False
+    await asyncio.gather(*readers)
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    return {
+        'writes_per_second': round(counters['writes'] / elapsed, 1),
+        'writes': counters['writes'],
+        'lock_errors': counters['lock_errors'],
+    }
+
+
+async def run_benchmark(args) -> dict:
+    results = {}
+    for profile in PROFILES:
+        results[profile] = await run_profile(
+            profile, os.path.join(args.directory, f'{profile}.db'), args
+        )
+    return {
+        **git_revision(),
+        'parameters': {
+            key: value for key, value in vars(args).items() if key != 'output'
+        },
+        'results': results,
+    }
+
+
+def print_results(report: dict) -> None:
+    for name, result in report['results'].items():
+        print(
+            f'{name:<8} {result["writes_per_second"]:>9.1f} записей/с  '
+            f'записано {result["writes"]:>6}  ошибок блокировки {result["lock_errors"]}'
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк профиля SQLite под параллельной записью.')
+    parser.add_argument('--directory', default=tempfile.gettempdir(),
+                        help='Каталог файлов баз бенчмарка (пересоздаются).')
+    parser.add_argument('--writers', type=int, default=32, help='Параллельных писателей.')
+    parser.add_argument('--writes', type=int, default=20, help='Записей на писателя.')
+    parser.add_argument('--readers', type=int, default=8, help='Параллельных читателей ленты.')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Сохранить результаты в JSON.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    # Настройки приложения читаются при импорте; сам бенчмарк работает
+    # со своими файлами баз, DATABASE_URL нужен только для импорта app.
+    os.environ.setdefault(
+        'DATABASE_URL', f'sqlite+aiosqlite:///{os.path.join(args.directory, "unused.db")}'
+    )
+    report = asyncio.run(run_benchmark(args))
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
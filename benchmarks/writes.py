@@ -0,0 +1,159 @@
+"""
+Микробенчмарк записи постов: SQL-запросы и время на созданный пост.
+Сравнивает для пакетов разного размера:
+  - single - create_object на каждый пост (отдельная транзакция);
+  - bulk - create_objects: один многострочный INSERT, идентификаторы
+    по lastrowid (путь по умолчанию в SQLite);
+  - orm - create_objects через ORM, как на базах без последовательных
+    rowid: идентификаторы получает ORM.
+Рассылка в ленты подписчиков (INSERT ... SELECT) входит в каждую запись.
+После замера идентификаторы созданных постов сверяются с базой.
+
+Запуск:
+    python -m benchmarks.writes --batch-sizes 1,10,100 --posts 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.api import git_revision, prepare_database
+
+
+async def measure(
+        write: Callable[[List[str]], Awaitable[list]],
+        texts: List[str],
+        batch_size: int
+) -> Dict[str, float]:
+    """
+    Запросы и время на пост при записи texts пакетами по batch_size.
+    :param write: Корутина, создающая посты с заданными текстами.
+    :param texts: Тексты постов.
+    :param batch_size: Размер пакета.
+    :return: Метрики и поле posts - созданные посты.
+    """
+    from app.core.profiler import query_budget
+
+    posts = []
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    with query_budget(sys.maxsize) as profile:
+        for start in range(0, len(texts), batch_size):
+            posts.extend(await write(texts[start:start + batch_size]))
+    return {
+        'statements_per_post': round(profile.count / len(texts), 3),
+        'cpu_ms_per_post': round((time.process_time() - cpu_started) / len(texts) * 1000, 4),
+        'wall_ms_per_post': round((time.perf_counter() - started) / len(texts) * 1000, 4),
+        'posts': posts,
+    }
+
+
+async def check_ids(posts) -> None:
+    """
+    Сверка идентификаторов созданных постов с базой.
+    """
+    from app.core.db import AsyncSessionLocal
+    from app.models import Post
+    from sqlalchemy import select
+
+    async with AsyncSessionLocal() as session:
+        stored = dict((await session.execute(
+            select(Post.id, Post.text).where(Post.id.in_([post.id for post in posts]))
+        )).all())
+    if stored != {post.id: post.text for post in posts}:
+        raise AssertionError('Идентификаторы созданных постов не совпадают с базой')
+
+
+async def run_benchmark(args) -> dict:
+    from app.core.db import AsyncSessionLocal, engine
+    from app.core.seed import Seeder
+    from app.crud.post import CRUDPost, post_crud
+    from app.models import Post, User
+    from app.schemas.post import PostCreate
+
+    class ORMPostCRUD(CRUDPost):
+        def _has_consecutive_rowids(self, session) -> bool:
+            return False
+
+    orm_post_crud = ORMPostCRUD(Post)
+    async with engine.connect() as conn:
+        await Seeder(random.Random(args.seed)).seed(conn, 1, 0, 0)
+    async with AsyncSessionLocal() as session:
+        user = await session.get(User, 1)
+
+    async def single(texts: List[str]) -> list:
+        posts = []
+        for text in texts:
+            async with AsyncSessionLocal() as session:
+                posts.append(await post_crud.create_object(PostCreate(text=text), session, user))
+        return posts
+
+    async def bulk(texts: List[str]) -> list:
+        async with AsyncSessionLocal() as session:
+            return await post_crud.create_objects([PostCreate(text=text) for text in texts], session, user)
+
+    async def orm(texts: List[str]) -> list:
+        async with AsyncSessionLocal() as session:
+            return await orm_post_crud.create_objects([PostCreate(text=text) for text in texts], session, user)
+
+    variants = {'single': single, 'bulk': bulk, 'orm': orm}
+    results = {}
+    for batch_size in args.batch_sizes:
+        for name, write in variants.items():
+            texts = [f'{name} {batch_size} {number}' for number in range(args.posts)]
+            result = await measure(write, texts, batch_size)
+            await check_ids(result.pop('posts'))
+            results[f'{name}/{batch_size}'] = result
+    return {
+        **git_revision(),
+        'parameters': {
+            key: value for key, value in vars(args).items() if key != 'output'
+        },
+        'results': results,
+    }
+
+
+def print_results(report: dict) -> None:
+    for name, result in report['results'].items():
+        print(
+            f'{name:<12} {result["statements_per_post"]:>7.3f} запр/пост  '
+            f'cpu {result["cpu_ms_per_post"]:>8.3f} ms/пост  '
+            f'wall {result["wall_ms_per_post"]:>8.3f} ms/пост'
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Микробенчмарк записи постов.')
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'writes.db'),
+                        help='Файл базы SQLite бенчмарка (пересоздается).')
+    parser.add_argument('--batch-sizes', default='1,10,100',
+                        type=lambda value: [int(size) for size in value.split(',')],
+                        help='Размеры пакетов через запятую.')
+    parser.add_argument('--posts', type=int, default=2000, help='Постов на вариант.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Сохранить результаты в JSON.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    # Настройки приложения читаются при импорте, поэтому окружение
+    # задается до импорта модулей app.
+    os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{os.path.abspath(args.db)}'
+    os.environ.pop('READ_DATABASE_URL', None)
+    prepare_database(os.path.abspath(args.db))
+    report = asyncio.run(run_benchmark(args))
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f'Результаты сохранены в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Общие фикстуры тестов.
+Тесты работают с временной базой SQLite (миграции применяются один раз
+на сессию), вызывают приложение в том же процессе через ASGI-клиент
+бенчмарка и проверяют email через локальную заглушку Kickbox.
+Настройки приложения читаются при импорте, поэтому окружение задается
+до импорта модулей app.
+
+Запуск: python -m pytest
+"""
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pytest
+from benchmarks.api import ASGIClient, free_port, prepare_database
+
+TEST_DIRECTORY = tempfile.mkdtemp(prefix='fastapi-tests-')
+TEST_DATABASE = os.path.join(TEST_DIRECTORY, 'test.db')
+KICKBOX_PORT = free_port()
+TEST_PASSWORD = 'test-password'
+
+os.environ['DATABASE_URL'] = f'sqlite+aiosqlite:///{TEST_DATABASE}'
+os.environ.pop('READ_DATABASE_URL', None)
+os.environ['KICKBOX_URL'] = f'http://127.0.0.1:{KICKBOX_PORT}/v2/verify'
+os.environ['KICKBOX_API_KEY'] = 'test'
+os.environ['EMAIL_VERIFICATION_MODE'] = 'sync'
+# Минимальная стоимость bcrypt: регистрация и вход в тестах не упираются
+# в хэширование. Кэш пользователей отключен, чтобы число SQL-запросов
+# не зависело от порядка тестов.
+os.environ['PASSWORD_HASH_ROUNDS'] = '4'
+os.environ['AUTH_CACHE_TTL_SECONDS'] = '0'
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+os.environ['LIKE_WRITE_MODE'] = 'sync'
+
+# Бюджеты SQL-запросов эндпоинтов (с проверкой токена и загрузкой
+# пользователя). Превышение означает новый запрос на горячем пути,
+# например N+1; бюджет увеличивается только осознанно.
+QUERY_BUDGETS = {
+    'feed': 2,
+    'post_detail': 2,
+    'like': 4,
+    'unlike': 4,
+    'my_likes': 2,
+}
+
+
+class KickboxStub:
+    """
+    Локальная заглушка Kickbox. По умолчанию все адреса deliverable;
+    ответ для адреса задается в results, задержка - в delay,
+    код ответа для всех адресов - в status; max_in_flight - наибольшее
+    число одновременных запросов.
+    """
+    def __init__(self, port: int):
+        self.port = port
+        self.url = f'http://127.0.0.1:{port}/v2/verify'
+        self.calls: List[str] = []
+        self.results: Dict[str, dict] = {}
+        self.delay = 0.0
+        self.status = 200
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.results.clear()
+        self.delay = 0.0
+        self.status = 200
+        self.max_in_flight = 0
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        async def verify(request):
+            email = request.query['email']
+            self.calls.append(email)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+            finally:
+                self.in_flight -= 1
+            if self.status != 200:
+                return web.Response(status=self.status)
+            return web.json_response(
+                self.results.get(email, {'result': 'deliverable', 'reason': 'accepted_email'})
+            )
+
+        stub = web.Application()
+        stub.router.add_get('/v2/verify', verify)
+        self._runner = web.AppRunner(stub)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', self.port).start()
+
+    async def close(self) -> None:
+        await self._runner.cleanup()
+
+
+class ApiClient(ASGIClient):
+    """
+    ASGI-клиент с разбором JSON-ответа.
+    """
+    async def call(
+            self,
+            method: str,
+            path: str,
+            headers: Optional[Dict[str, str]] = None,
+            json_body=None,
+            form: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, object]:
+        status, body = await self.request(method, path, headers, json_body, form)
+        return status, json.loads(body) if body else None
+
+
+@pytest.fixture(scope='session')
+def loop() -> Iterator[asyncio.AbstractEventLoop]:
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='session')
+def run(loop):
+    """
+    Выполнить корутину в общем цикле событий тестов.
+    """
+    return loop.run_until_complete
+
+
+@pytest.fixture(scope='session')
+def kickbox_server(run) -> Iterator[KickboxStub]:
+    stub = KickboxStub(KICKBOX_PORT)
+    run(stub.start())
+    yield stub
+    run(stub.close())
+
+
+@pytest.fixture
+def kickbox(kickbox_server) -> Iterator[KickboxStub]:
+    kickbox_server.reset()
+    yield kickbox_server
+    kickbox_server.reset()
+
+
+@pytest.fixture(scope='session')
+def client(run, kickbox_server) -> Iterator[ApiClient]:
+    prepare_database(TEST_DATABASE)
+    from app.main import app
+    for handler in app.router.on_startup:
+        run(handler())
+    yield ApiClient(app)
+    for handler in app.router.on_shutdown:
+        run(handler())
+    from app.core.db import engine
+    run(engine.dispose())
+
+
+async def register_user(client: ApiClient, name: str) -> Dict[str, str]:
+    """
+    Регистрирует пользователя и возвращает заголовки с его токеном.
+    """
+    status, body = await client.call('POST', '/auth/register', json_body={
+        'email': f'{name}@example.com', 'password': TEST_PASSWORD, 'username': name,
+    })
+    assert status == 201, body
+    status, body = await client.call('POST', '/auth/jwt/login', form={
+        'username': f'{name}@example.com', 'password': TEST_PASSWORD,
+    })
+    assert status == 200, body
+    return {'Authorization': f'Bearer {body["access_token"]}'}
+
+
+@pytest.fixture(scope='session')
+def users(run, client) -> List[Dict[str, str]]:
+    """
+    Заголовки авторизации пяти пользователей.
+    """
+    return [run(register_user(client, f'user{number}')) for number in range(5)]
+
+
+@pytest.fixture(scope='session')
+def user_ids(run, client, users) -> List[int]:
+    """
+    Идентификаторы пользователей users.
+    """
+    return [run(client.call('GET', '/users/me', headers))[1]['id'] for headers in users]
+
+
+@pytest.fixture
+def create_post(run, client, users):
+    """
+    Создать пост от имени пользователя users[author].
+    :return: Идентификатор поста.
+    """
+    def create(author: int = 0, text: str = 'test post') -> int:
+        status, body = run(client.call('POST', '/Post/', users[author], {'text': text}))
+        assert status == 201, body
+        return body['id']
+    return create
+
+
+@pytest.fixture
+def assert_queries():
+    """
+    Проверка бюджета SQL-запросов эндпоинта из QUERY_BUDGETS:
+
+        with assert_queries('feed'):
+            run(client.call('GET', '/Post/', users[0]))
+    """
+    from app.core.profiler import query_budget
+
+    @contextmanager
+    def check(endpoint: str):
+        with query_budget(QUERY_BUDGETS[endpoint]) as profile:
+            yield profile
+    return check
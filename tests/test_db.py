@@ -0,0 +1,95 @@
+import asyncio
+from argparse import Namespace
+
+from app.core.config import settings
+from app.core.db import get_read_session
+from app.crud.loader import get_loader
+from app.models import User
+from benchmarks.sqlite_profile import run_profile
+
+
+async def stream_feed(app, headers, started: asyncio.Event, release: asyncio.Event) -> bytes:
+    """
+    NDJSON-поток ленты, который после первого фрагмента ждет release,
+    как медленный клиент.
+    """
+    raw_headers = [(b'host', b'test')] + [
+        (name.lower().encode(), value.encode()) for name, value in headers.items()
+    ]
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/Post/', 'raw_path': b'/Post/',
+        'query_string': b'stream=true&limit=1', 'root_path': '', 'headers': raw_headers,
+        'client': ('127.0.0.1', 50000), 'server': ('test', 80),
+    }
+    chunks = []
+
+    async def receive():
+        # Клиент не отключается: ответ завершает сам поток.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not started.is_set():
+                started.set()
+                await release.wait()
+
+    await app(scope, receive, send)
+    return b''.join(chunks)
+
+
+def test_write_while_stream_is_open(run, client, users, create_post):
+    assert settings.db_pool_size == 1 and settings.db_max_overflow == 0
+    for number in range(3):
+        create_post(author=0, text=f'streamed {number}')
+
+    async def write_during_stream():
+        started, release = asyncio.Event(), asyncio.Event()
+        stream = asyncio.ensure_future(stream_feed(client.app, users[1], started, release))
+        await asyncio.wait_for(started.wait(), 5)
+        try:
+            # Единственное пишущее соединение не должно быть занято потоком.
+            return await asyncio.wait_for(
+                client.call('POST', '/Post/', users[2], {'text': 'written during stream'}), 5
+            )
+        finally:
+            release.set()
+            body = await stream
+            assert body.count(b'\n') >= 3
+
+    status, _ = run(write_during_stream())
+    assert status == 201
+
+
+def test_tuned_profile_writes_faster_without_lock_errors(run, tmp_path):
+    load = Namespace(writers=16, writes=10, readers=4, users=20, posts=100, seed=1)
+    results = {
+        profile: run(run_profile(profile, str(tmp_path / f'{profile}.db'), load))
+        for profile in ('default', 'tuned')
+    }
+    tuned, default = results['tuned'], results['default']
+    assert tuned['lock_errors'] == 0
+    assert tuned['writes'] == load.writers * load.writes
+    assert tuned['lock_errors'] <= default['lock_errors']
+    assert tuned['writes_per_second'] > default['writes_per_second'], results
+
+
+def test_loader_batches_and_closes_with_session(run, user_ids):
+    async def scenario():
+        sessions = get_read_session()
+        session = await sessions.__anext__()
+        loader = get_loader(session)
+        found = await asyncio.gather(*(loader.load(User, user_id) for user_id in user_ids[:3]))
+        assert [user.id for user in found] == user_ids[:3]
+        assert loader.batches == 1
+        # Загрузка, начатая, но не дождавшаяся ответа к концу запроса.
+        pending = asyncio.ensure_future(loader.load(User, user_ids[3]))
+        await asyncio.sleep(0)
+        await sessions.aclose()
+        assert pending.cancelled()
+        assert loader.batches == 1
+        assert not loader._tasks
+        assert get_loader(session) is not loader
+
+    run(scenario())
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from app.utils import email_verifier as email_verifier_module
+from app.utils.email_verifier import EmailVerifier
+
+INVALID_DOMAIN = {'result': 'undeliverable', 'reason': 'invalid_domain'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Управляемое время circuit breaker и кэша: clock.now сдвигается тестом.
+    """
+    fake = SimpleNamespace(now=time.monotonic(), perf_counter=time.perf_counter)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(email_verifier_module, 'time', fake)
+    return fake
+
+
+@pytest.fixture
+def make_verifier(run, kickbox):
+    verifiers = []
+
+    def make(**options) -> EmailVerifier:
+        parameters = dict(
+            url=kickbox.url, api_key='test', timeout=1.0, cache_ttl=60,
+            cache_size=100, failure_threshold=2, reset_timeout=30,
+        )
+        parameters.update(options)
+        verifier = EmailVerifier(**parameters)
+        verifiers.append(verifier)
+        return verifier
+
+    yield make
+    for verifier in verifiers:
+        run(verifier.close())
+
+
+def test_cached_result(run, kickbox, make_verifier):
+    verifier = make_verifier()
+    assert run(verifier.verify('Cached@Example.com'))['result'] == 'deliverable'
+    assert run(verifier.verify('cached@example.com'))['result'] == 'deliverable'
+    assert kickbox.calls == ['cached@example.com']
+
+
+def test_cache_expires(run, kickbox, make_verifier, clock):
+    verifier = make_verifier(cache_ttl=10)
+    run(verifier.verify('expire@example.com'))
+    clock.now += 11
+    run(verifier.verify('expire@example.com'))
+    assert kickbox.calls == ['expire@example.com'] * 2
+
+
+def test_invalid_domain_cached_for_domain(run, kickbox, make_verifier):
+    kickbox.results['first@bad.test'] = INVALID_DOMAIN
+    verifier = make_verifier()
+    assert run(verifier.verify('first@bad.test')) == INVALID_DOMAIN
+    assert run(verifier.verify('second@bad.test')) == INVALID_DOMAIN
+    assert kickbox.calls == ['first@bad.test']
+
+
+def test_unknown_result_not_cached(run, kickbox, make_verifier):
+    kickbox.results['later@example.com'] = {'result': 'unknown', 'reason': 'timeout'}
+    verifier = make_verifier()
+    run(verifier.verify('later@example.com'))
+    run(verifier.verify('later@example.com'))
+    assert len(kickbox.calls) == 2
+
+
+def test_timeout_is_failure(run, kickbox, make_verifier):
+    kickbox.delay = 0.3
+    verifier = make_verifier(timeout=0.05, failure_threshold=1)
+    assert run(verifier.verify('slow@example.com')) == {'result': 'unknown', 'reason': 'timeout'}
+    assert verifier.circuit_state() == 'open'
+    # Заглушка досыпает отмененный запрос: не пересекаться со следующими тестами.
+    run(asyncio.sleep(kickbox.delay))
+
+
+def test_circuit_opens_after_failures(run, kickbox, make_verifier, clock):
+    kickbox.status = 500
+    verifier = make_verifier()
+    for number in range(2):
+        assert run(verifier.verify(f'fail{number}@example.com'))['reason'] == 'http_error'
+    assert verifier.circuit_state() == 'open'
+    assert run(verifier.verify('skipped@example.com'))['reason'] == 'circuit_open'
+    assert len(kickbox.calls) == 2
+    assert verifier.stats()['circuit_open'] == 1
+
+
+def test_half_open_trial_failure_reopens(run, kickbox, make_verifier, clock):
+    kickbox.status = 500
+    verifier = make_verifier()
+    run(verifier.verify('fail0@example.com'))
+    run(verifier.verify('fail1@example.com'))
+    clock.now += 31
+    assert verifier.circuit_state() == 'half_open'
+    # Одной ошибки пробного запроса достаточно, порог не учитывается.
+    assert run(verifier.verify('trial@example.com'))['reason'] == 'http_error'
+    assert verifier.circuit_state() == 'open'
+    assert run(verifier.verify('skipped@example.com'))['reason'] == 'circuit_open'
+    assert kickbox.calls[-1] == 'trial@example.com'
+
+
+def test_half_open_trial_success_closes(run, kickbox, make_verifier, clock):
+    kickbox.status = 500
+    verifier = make_verifier()
+    run(verifier.verify('fail0@example.com'))
+    run(verifier.verify('fail1@example.com'))
+    clock.now += 31
+    kickbox.status = 200
+    assert run(verifier.verify('trial@example.com'))['result'] == 'deliverable'
+    assert verifier.circuit_state() == 'closed'
+    assert run(verifier.verify('next@example.com'))['result'] == 'deliverable'
+    assert verifier.stats()['failures'] == 0
+
+
+def test_half_open_allows_one_trial(run, kickbox, make_verifier, clock):
+    kickbox.status = 500
+    verifier = make_verifier()
+    run(verifier.verify('fail0@example.com'))
+    run(verifier.verify('fail1@example.com'))
+    clock.now += 31
+    kickbox.status = 200
+    kickbox.delay = 0.1
+    kickbox.calls.clear()
+
+    async def verify_many():
+        return await asyncio.gather(*[
+            verifier.verify(f'trial{number}@example.com') for number in range(5)
+        ])
+
+    results = run(verify_many())
+    assert [result['result'] for result in results].count('deliverable') == 1
+    assert len(kickbox.calls) == 1
+    assert verifier.circuit_state() == 'closed'
+
+
+def test_background_queue_in_batches(run, kickbox, make_verifier):
+    kickbox.delay = 0.05
+    verifier = make_verifier(batch_size=3)
+    reported = {}
+
+    async def report(email, result):
+        reported[email] = result['result']
+
+    async def verify_in_background():
+        await verifier.start()
+        emails = [f'queued{number}@example.com' for number in range(7)]
+        for email in emails:
+            assert verifier.verify_later(email, report)
+        await verifier.close()
+        return emails
+
+    emails = run(verify_in_background())
+    assert reported == {email: 'deliverable' for email in emails}
+    assert kickbox.max_in_flight == 3
+
+
+def test_background_callback_error_does_not_stop_queue(run, kickbox, make_verifier):
+    verifier = make_verifier(batch_size=1)
+    reported = []
+
+    async def report(email, result):
+        if email == 'broken@example.com':
+            raise RuntimeError('callback failed')
+        reported.append(email)
+
+    async def verify_in_background():
+        await verifier.start()
+        verifier.verify_later('broken@example.com', report)
+        verifier.verify_later('ok@example.com', report)
+        await verifier.close()
+
+    run(verify_in_background())
+    assert reported == ['ok@example.com']
+
+
+def test_verify_later_rejected(run, make_verifier):
+    verifier = make_verifier(queue_size=1)
+
+    async def report(email, result):
+        pass
+
+    assert not verifier.verify_later('stopped@example.com', report)
+
+    async def overflow():
+        await verifier.start()
+        return [verifier.verify_later(f'full{number}@example.com', report) for number in range(2)]
+
+    assert run(overflow()) == [True, False]
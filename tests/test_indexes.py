@@ -0,0 +1,49 @@
+import pytest
+from app.core.db import engine
+from app.core.indexes import (HOT_PATHS, capture_statements,
+                              find_index_mismatches, find_table_scans,
+                              is_table_scan)
+from app.models import Post, PostLike, User
+from sqlalchemy import func, select
+
+
+@pytest.fixture
+def connection(run, client):
+    connection = run(engine.connect())
+    yield connection
+    run(connection.close())
+
+
+def test_models_match_schema(run, connection):
+    assert run(connection.run_sync(find_index_mismatches)) == []
+
+
+def test_hot_paths_have_no_table_scans(run, connection):
+    assert run(find_table_scans(connection)) == {}
+
+
+def test_hot_paths_are_captured_and_rolled_back(run, connection):
+    async def counts():
+        return [
+            await connection.scalar(select(func.count()).select_from(model))
+            for model in (User, Post, PostLike)
+        ]
+
+    before = run(counts())
+    for name, hot_path in HOT_PATHS.items():
+        statements = run(capture_statements(connection, hot_path))
+        assert statements, name
+    assert run(counts()) == before
+
+
+@pytest.mark.parametrize('detail, statement, expected', [
+    ('SCAN post', 'SELECT post.id FROM post', True),
+    ('SCAN post USING INDEX ix_post_create_date_id', 'SELECT post.id FROM post LIMIT ?', False),
+    ('SCAN postlike USING COVERING INDEX ix_postlike_user_id_post_id', 'SELECT postlike.id FROM postlike', True),
+    ('SEARCH postlike USING INDEX post_like_user_index (post_id=? AND user_id=?)', '', False),
+    ('SCAN post_fts VIRTUAL TABLE INDEX 32:M1', '', False),
+    ('SCAN 2 CONSTANT ROWS', '', False),
+    ('USE TEMP B-TREE FOR ORDER BY', '', True),
+])
+def test_is_table_scan(detail, statement, expected):
+    assert is_table_scan(detail, statement) is expected
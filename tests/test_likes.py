@@ -0,0 +1,229 @@
+import asyncio
+import random
+
+import logging
+
+from app.core.db import AsyncSessionLocal
+from app.core import like_writer
+from app.core.like_writer import LikeWriter
+from app.crud.post import (LIKE_WRITE_ATTEMPTS, CRUDPost, LikeAction,
+                           LikeStatus, post_crud)
+from app.models import Post, PostLike, User
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+
+async def like_state(post_id: int):
+    """
+    Счетчик поста, количество и уникальность его лайков в базе.
+    """
+    async with AsyncSessionLocal() as session:
+        like_count = await session.scalar(select(Post.like_count).where(Post.id == post_id))
+        pairs = (await session.execute(
+            select(PostLike.user_id).where(PostLike.post_id == post_id)
+        )).scalars().all()
+    return like_count, pairs
+
+
+async def likes_given(user_ids):
+    async with AsyncSessionLocal() as session:
+        given = dict((await session.execute(
+            select(User.id, User.likes_given).where(User.id.in_(user_ids))
+        )).all())
+        actual = dict((await session.execute(
+            select(PostLike.user_id, func.count(PostLike.id))
+            .where(PostLike.user_id.in_(user_ids))
+            .group_by(PostLike.user_id)
+        )).all())
+    return given, {user_id: actual.get(user_id, 0) for user_id in user_ids}
+
+
+def test_parallel_duplicate_likes(run, client, users, create_post):
+    post_id = create_post(author=0)
+
+    async def like_many():
+        return await asyncio.gather(*[
+            client.call('POST', f'/Post{post_id}/like', users[1]) for _ in range(10)
+        ])
+
+    statuses = sorted(status for status, _ in run(like_many()))
+    assert statuses == [201] + [409] * 9
+    like_count, pairs = run(like_state(post_id))
+    assert like_count == 1
+    assert len(pairs) == 1
+
+
+def test_parallel_likes_and_unlikes(run, client, users, user_ids, create_post):
+    post_id = create_post(author=0)
+    rng = random.Random(7)
+    requests = [
+        (rng.choice(('POST', 'DELETE')), rng.choice(users[1:]))
+        for _ in range(60)
+    ]
+
+    async def storm():
+        return await asyncio.gather(*[
+            client.call(
+                method,
+                f'/Post{post_id}/like' if method == 'POST' else f'/Post{post_id}/remove_like',
+                user
+            )
+            for method, user in requests
+        ])
+
+    for status, _ in run(storm()):
+        assert status in (201, 204, 404, 409)
+    like_count, pairs = run(like_state(post_id))
+    assert len(pairs) == len(set(pairs))
+    assert like_count == len(pairs)
+    given, actual = run(likes_given(user_ids))
+    assert given == actual
+
+
+def test_bulk_likes_conflict_after_attempts(run, client, users, create_post, monkeypatch):
+    post_ids = [create_post(author=0) for _ in range(2)]
+    attempts = []
+    original_attempt = CRUDPost._try_put_likes_bulk.__func__
+    original_execute = AsyncSession.execute
+
+    async def counted_attempt(cls, *args):
+        attempts.append(args)
+        return await original_attempt(cls, *args)
+
+    async def conflicting_execute(self, statement, *args, **kwargs):
+        # Каждая вставка натыкается на лайк, поставленный параллельно.
+        if isinstance(statement, Insert) and statement.table.name == PostLike.__tablename__:
+            raise IntegrityError(str(statement), {}, Exception('UNIQUE constraint failed'))
+        return await original_execute(self, statement, *args, **kwargs)
+
+    monkeypatch.setattr(CRUDPost, '_try_put_likes_bulk', classmethod(counted_attempt))
+    monkeypatch.setattr(AsyncSession, 'execute', conflicting_execute)
+    status, results = run(client.call(
+        'POST', '/Post/likes/bulk', users[1], {'post_ids': post_ids + [10 ** 9]}
+    ))
+    monkeypatch.undo()
+    assert status == 200
+    assert [result['status'] for result in results] == [409, 409, 404]
+    assert len(attempts) == LIKE_WRITE_ATTEMPTS
+    assert run(like_state(post_ids[0])) == (0, [])
+
+
+def test_like_actions_conflict_status(run, user_ids, create_post, monkeypatch):
+    post_id = create_post(author=0)
+
+    async def conflicting(cls, actions, session):
+        return [LikeStatus.CREATED for _ in actions], False
+
+    monkeypatch.setattr(CRUDPost, '_try_apply_like_actions', classmethod(conflicting))
+
+    async def apply():
+        async with AsyncSessionLocal() as session:
+            return await post_crud.apply_like_actions(
+                [(LikeAction.LIKE, post_id, user_ids[1])], session
+            )
+
+    assert run(apply()) == [LikeStatus.CONFLICT]
+
+
+def test_apply_like_actions(run, user_ids, create_post):
+    post_ids = [create_post(author=0) for _ in range(2)]
+    first, second = post_ids
+    actions = [
+        (LikeAction.LIKE, first, user_ids[1]),
+        (LikeAction.LIKE, first, user_ids[1]),
+        (LikeAction.LIKE, second, user_ids[2]),
+        (LikeAction.LIKE, first, user_ids[2]),
+        (LikeAction.UNLIKE, first, user_ids[2]),
+        (LikeAction.LIKE, first, user_ids[0]),
+        (LikeAction.UNLIKE, second, user_ids[1]),
+    ]
+
+    async def apply(batch):
+        async with AsyncSessionLocal() as session:
+            return await post_crud.apply_like_actions(batch, session)
+
+    assert run(apply(actions)) == [
+        LikeStatus.CREATED, LikeStatus.ALREADY_EXISTS, LikeStatus.CREATED,
+        LikeStatus.CREATED, LikeStatus.REMOVED, LikeStatus.OWN_POST,
+        LikeStatus.NOT_FOUND,
+    ]
+    assert run(like_state(first)) == (1, [user_ids[1]])
+    assert run(like_state(second)) == (1, [user_ids[2]])
+    assert run(apply([
+        (LikeAction.UNLIKE, first, user_ids[1]),
+        (LikeAction.LIKE, second, user_ids[1]),
+    ])) == [LikeStatus.REMOVED, LikeStatus.CREATED]
+    assert run(like_state(first)) == (0, [])
+    assert sorted(run(like_state(second))[1]) == sorted([user_ids[1], user_ids[2]])
+
+
+def run_like_writer(durability, actions):
+    """
+    Запись actions через отдельную очередь LikeWriter.
+    :return: Очередь и корутина, которая возвращает статусы операций.
+    """
+    writer = LikeWriter(
+        AsyncSessionLocal, durability, flush_interval_ms=5, flush_max_ops=100,
+        queue_size=100, flush_attempts=3, retry_delay_ms=0
+    )
+
+    async def write():
+        await writer.start()
+        async with AsyncSessionLocal() as session:
+            statuses = await asyncio.gather(*[
+                writer.submit(action, post_id, user_id, session)
+                for action, post_id, user_id in actions
+            ], return_exceptions=True)
+        await writer.close()
+        return statuses
+
+    return writer, write()
+
+
+def test_like_writer_retries_failed_batch(run, user_ids, create_post, monkeypatch):
+    post_id = create_post(author=0)
+    original = CRUDPost.apply_like_actions.__func__
+    failures = []
+
+    async def flaky(cls, actions, session):
+        if len(failures) < 2:
+            failures.append(len(actions))
+            raise OperationalError('UPDATE', {}, Exception('database is locked'))
+        return await original(cls, actions, session)
+
+    monkeypatch.setattr(CRUDPost, 'apply_like_actions', classmethod(flaky))
+    writer, write = run_like_writer(
+        'enqueue', [(LikeAction.LIKE, post_id, user_ids[1])]
+    )
+    assert run(write) == [LikeStatus.CREATED]
+    assert failures == [1, 1]
+    assert writer.stats()['errors'] == 2
+    assert writer.stats()['dropped_ops'] == 0
+    assert run(like_state(post_id)) == (1, [user_ids[1]])
+
+
+def test_like_writer_counts_dropped_ops(run, user_ids, create_post, monkeypatch, caplog):
+    post_id = create_post(author=0)
+    attempts = []
+
+    async def failing(cls, actions, session):
+        attempts.append(len(actions))
+        raise OperationalError('UPDATE', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(CRUDPost, 'apply_like_actions', classmethod(failing))
+    # fileConfig миграций в conftest отключает уже созданные логгеры.
+    monkeypatch.setattr(like_writer.logger, 'disabled', False)
+    writer, write = run_like_writer(
+        'commit', [(LikeAction.LIKE, post_id, user_ids[1])]
+    )
+    with caplog.at_level(logging.ERROR, logger='app.core.like_writer'):
+        statuses = run(write)
+    assert [type(status) for status in statuses] == [OperationalError]
+    assert len(attempts) == 3
+    assert writer.stats()['errors'] == 3
+    assert writer.stats()['dropped_ops'] == 1
+    assert writer.stats()['pending_pairs'] == 0
+    assert any(record.exc_info for record in caplog.records)
+    assert run(like_state(post_id)) == (0, [])
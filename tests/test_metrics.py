@@ -0,0 +1,28 @@
+import pytest
+from app.api.endpoints.metrics import check_metrics_token
+from app.core.config import settings
+from fastapi import HTTPException
+from starlette.requests import Request
+
+
+def metrics_request(authorization=None) -> Request:
+    headers = [(b'authorization', authorization.encode())] if authorization else []
+    return Request({'type': 'http', 'method': 'GET', 'path': '/metrics', 'headers': headers})
+
+
+def test_metrics_require_superuser(run, client, users):
+    assert run(client.call('GET', '/metrics'))[0] == 401
+    assert run(client.call('GET', '/metrics', users[0]))[0] == 403
+
+
+@pytest.mark.parametrize('authorization', [None, 'Bearer wrong', 'Basic scrape-token'])
+def test_metrics_token_rejected(run, monkeypatch, authorization):
+    monkeypatch.setattr(settings, 'metrics_token', 'scrape-token')
+    with pytest.raises(HTTPException) as error:
+        run(check_metrics_token(metrics_request(authorization)))
+    assert error.value.status_code == 401
+
+
+def test_metrics_token_accepted(run, monkeypatch):
+    monkeypatch.setattr(settings, 'metrics_token', 'scrape-token')
+    assert run(check_metrics_token(metrics_request('Bearer scrape-token'))) is None
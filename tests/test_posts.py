@@ -0,0 +1,69 @@
+from app.api.endpoints import post as post_endpoints
+from app.core.db import AsyncSessionLocal
+from app.core.response_cache import MemoryCacheBackend, ResponseCache
+from app.crud.post import CRUDPost, post_crud
+from app.models import Post, User
+from app.schemas.post import PostCreate
+from sqlalchemy import select
+
+
+class ORMPostCRUD(CRUDPost):
+    def _has_consecutive_rowids(self, session) -> bool:
+        return False
+
+
+async def create_posts(crud, user_id, texts):
+    async with AsyncSessionLocal() as session:
+        user = await session.get(User, user_id)
+        return await crud.create_objects([PostCreate(text=text) for text in texts], session, user)
+
+
+async def stored_texts(posts):
+    async with AsyncSessionLocal() as session:
+        return dict((await session.execute(
+            select(Post.id, Post.text).where(Post.id.in_([post.id for post in posts]))
+        )).all())
+
+
+def test_bulk_create_ids_match_database(run, client, users, user_ids):
+    texts = [f'bulk ids {number}' for number in range(5)]
+    posts = run(create_posts(post_crud, user_ids[0], texts))
+    assert run(stored_texts(posts)) == {post.id: post.text for post in posts}
+    # Без AUTOINCREMENT идентификатор удаленного последнего поста
+    # переиспользуется: последовательность от lastrowid сохраняется.
+    status, _ = run(client.call('DELETE', f'/Post{posts[-1].id}', users[0]))
+    assert status == 204
+    again = run(create_posts(post_crud, user_ids[0], texts))
+    assert again[0].id == posts[-1].id
+    assert run(stored_texts(again)) == {post.id: post.text for post in again}
+
+
+def test_bulk_create_through_orm(run, client, user_ids):
+    texts = [f'orm ids {number}' for number in range(3)]
+    posts = run(create_posts(ORMPostCRUD(Post), user_ids[1], texts))
+    assert [post.text for post in posts] == texts
+    assert run(stored_texts(posts)) == {post.id: post.text for post in posts}
+    assert all(post.like_count == 0 and post.user_id == user_ids[1] for post in posts)
+
+
+def test_search_snippet_is_escaped(run, client, users, create_post):
+    create_post(author=0, text='<script>alert(1)</script> xsscheck & <b>bold</b>')
+    status, page = run(client.call('GET', '/Post/search?q=xsscheck', users[1]))
+    assert status == 200
+    snippet = page['items'][0]['snippet']
+    assert '<script>' not in snippet and '<b>' not in snippet
+    assert snippet == (
+        '&lt;script&gt;alert(1)&lt;/script&gt; <mark>xsscheck</mark> '
+        '&amp; &lt;b&gt;bold&lt;/b&gt;'
+    )
+
+
+def test_if_none_match_any_requires_existing_post(run, client, users, create_post, monkeypatch):
+    cache = ResponseCache(MemoryCacheBackend(max_size=10, ttl_seconds=30))
+    monkeypatch.setattr(post_endpoints, 'post_response_cache', cache)
+    post_id = create_post(author=0)
+    headers = {**users[1], 'If-None-Match': '*'}
+    status, _ = run(client.call('GET', f'/Post{post_id}', headers))
+    assert status == 304
+    status, _ = run(client.call('GET', f'/Post{10 ** 9}', headers))
+    assert status == 404
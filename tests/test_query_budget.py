@@ -0,0 +1,58 @@
+import pytest
+from app.core.profiler import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def liked_posts(run, client, users, create_post):
+    """
+    30 постов, каждый лайкнут тремя пользователями.
+    """
+    post_ids = [create_post(author=number % 2) for number in range(30)]
+    for post_id in post_ids:
+        for user in users[2:]:
+            status, _ = run(client.call('POST', f'/Post{post_id}/like', user))
+            assert status == 201
+    return post_ids
+
+
+def test_feed(run, client, users, liked_posts, assert_queries):
+    with assert_queries('feed'):
+        status, page = run(client.call('GET', '/Post/?limit=20', users[1]))
+    assert status == 200
+    assert len(page['items']) == 20
+    with assert_queries('feed'):
+        status, page = run(client.call(
+            'GET', f'/Post/?limit=20&cursor={page["next_cursor"]}', users[1]
+        ))
+    assert status == 200
+    assert page['items']
+
+
+def test_post_detail(run, client, users, liked_posts, assert_queries):
+    with assert_queries('post_detail'):
+        status, post = run(client.call('GET', f'/Post{liked_posts[0]}', users[1]))
+    assert status == 200
+    assert post['like_count'] == 3
+
+
+def test_like_and_unlike(run, client, users, create_post, assert_queries):
+    post_id = create_post(author=0)
+    with assert_queries('like'):
+        status, _ = run(client.call('POST', f'/Post{post_id}/like', users[1]))
+    assert status == 201
+    with assert_queries('unlike'):
+        status, _ = run(client.call('DELETE', f'/Post{post_id}/remove_like', users[1]))
+    assert status == 204
+
+
+def test_my_likes(run, client, users, liked_posts, assert_queries):
+    with assert_queries('my_likes'):
+        status, body = run(client.call('GET', '/Post/my_likes', users[2]))
+    assert status == 200
+    assert body['my_likes_count'] >= len(liked_posts)
+
+
+def test_budget_exceeded(run, client, users):
+    with pytest.raises(QueryBudgetExceeded, match='при бюджете 1'):
+        with query_budget(1):
+            run(client.call('GET', '/Post/?limit=5', users[1]))
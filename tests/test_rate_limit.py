@@ -0,0 +1,34 @@
+import pytest
+from app.core.config import settings
+from app.core.rate_limit import MemoryRateLimitBackend, parse_rate, rate_limiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'backend', MemoryRateLimitBackend(100))
+    return rate_limiter
+
+
+def test_bulk_posts_charged_per_item(run, client, users, limiter):
+    limit = parse_rate(settings.rate_limit_posts).limit
+
+    def bulk(count):
+        return run(client.call(
+            'POST', '/Post/bulk', users[3], {'items': [{'text': 'bulk'}] * count}
+        ))[0]
+
+    assert bulk(limit + 1) == 429
+    assert bulk(limit - 1) == 201
+    assert bulk(2) == 429
+    assert run(client.call('POST', '/Post/', users[3], {'text': 'single'}))[0] == 201
+    assert run(client.call('POST', '/Post/', users[3], {'text': 'single'}))[0] == 429
+
+
+def test_bulk_likes_charged_per_item(run, client, users, create_post, limiter):
+    limit = parse_rate(settings.rate_limit_likes).limit
+    post_id = create_post(author=0)
+    status, results = run(client.call(
+        'POST', '/Post/likes/bulk', users[4], {'post_ids': [post_id] * limit}
+    ))
+    assert status == 200
+    assert run(client.call('POST', f'/Post{post_id}/like', users[4]))[0] == 429